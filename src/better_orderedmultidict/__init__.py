@@ -1,3 +1,11 @@
 from ._orderedmultidict import OrderedMultiDict, DeOrderedMultiDict
+from ._typedorderedmultidict import TypedOrderedMultiDict
+from ._denseintorderedmultidict import DenseIntOrderedMultiDict
+from ._boundedorderedmultidict import BoundedOrderedMultiDict
+from ._expiringorderedmultidict import ExpiringOrderedMultiDict
+from ._keyedqueue import KeyedQueue, AsyncKeyedQueue, ThreadSafeKeyedQueue
+from ._diff import OrderedMultiDictDiff
+from ._sealed import SealedOrderedMultiDict
+from ._spilling import SpillingOrderedMultiDict
 
-__all__ = ['OrderedMultiDict', 'DeOrderedMultiDict']
\ No newline at end of file
+__all__ = ['OrderedMultiDict', 'DeOrderedMultiDict', 'TypedOrderedMultiDict', 'DenseIntOrderedMultiDict', 'BoundedOrderedMultiDict', 'ExpiringOrderedMultiDict', 'KeyedQueue', 'AsyncKeyedQueue', 'ThreadSafeKeyedQueue', 'OrderedMultiDictDiff', 'SealedOrderedMultiDict', 'SpillingOrderedMultiDict']
\ No newline at end of file
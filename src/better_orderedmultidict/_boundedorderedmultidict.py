@@ -0,0 +1,272 @@
+from __future__ import annotations
+
+from array import array
+from typing import Any, Callable, Hashable, Iterable, Self, Sequence, override
+
+from ._orderedmultidict import DeOrderedMultiDict, OrderedMultiDictBase, _MutationObserver, _SENTINEL, _SupportsKeysAndGetItem
+
+
+def _check_limit(name: str, limit: int | float | None) -> None:
+	if limit is not None and limit < 1:
+		raise ValueError(f"{name} must be at least 1 or None, got {limit}.")
+
+
+class _WeightTracker[TK: Hashable, TV](_MutationObserver[TK, TV]):
+	"""
+	The total weight of all items of a BoundedOrderedMultiDict.
+	"""
+
+	def __init__(self, weigher: Callable[[TK, TV], int | float]):
+		self.weigher: Callable[[TK, TV], int | float] = weigher
+		self.weight: int | float = 0
+
+	@override
+	def on_add(self, index: int, key: TK, value: TV) -> None:
+		self.weight += self.weigher(key, value)
+
+	@override
+	def on_remove(self, index: int, key: TK, value: TV) -> None:
+		self.weight -= self.weigher(key, value)
+
+	@override
+	def on_clear(self) -> None:
+		self.weight = 0
+
+	@override
+	def copy_for(self, omd: OrderedMultiDictBase[TK, TV, Any]) -> None:
+		return None  # a BoundedOrderedMultiDict creates its own tracker.
+
+
+def _weigh_one(key: Any, value: Any) -> int:
+	return 1
+
+
+class BoundedOrderedMultiDict[TK: Hashable, TV](DeOrderedMultiDict[TK, TV]):
+	"""
+	A DeOrderedMultiDict with a limited size, e.g. for a cache of the most recent values per key. Whenever an item is
+	added, the oldest items are evicted until:
+		- there are at most <max_items> items,
+		- the total weight of all items is at most <max_weight>. The weight of an item is weigher(key, value), or 1 if
+		  no <weigher> is given,
+		- the key of the added item has at most <max_per_key> values (only the oldest values of that key are evicted).
+	A limit that is None is not enforced. <on_evict>(key, value) is called for every evicted item.
+
+	If <lru> is True, reading a key with get(), getfirst(), getlast(), getall() or omd[key] moves all of its values to
+	the end (see move_to_end()), so the least recently used items are evicted first. hit_count and miss_count count the
+	reads of present and absent keys, and eviction_count counts the evicted items.
+
+	Example:
+		>>> omd = BoundedOrderedMultiDict(max_items=3, max_per_key=2)
+		>>> omd.extend([('a', 1), ('b', 2), ('a', 11), ('a', 111)])  # list(omd.items()) == [('b', 2), ('a', 11), ('a', 111)]
+		>>> omd.add('c', 3)                                           # list(omd.items()) == [('a', 11), ('a', 111), ('c', 3)]
+		>>> print(omd.eviction_count)                                 # 2
+	"""
+
+	def __init__(
+			self,
+			iterable_or_map: Iterable[tuple[TK, TV]] | _SupportsKeysAndGetItem[TK, TV] = _SENTINEL,  # type: ignore
+			/,
+			*,
+			max_items: int | None = None,
+			max_weight: int | float | None = None,
+			weigher: Callable[[TK, TV], int | float] | None = None,
+			max_per_key: int | None = None,
+			lru: bool = False,
+			on_evict: Callable[[TK, TV], Any] | None = None,
+	):
+		_check_limit('max_items', max_items)
+		_check_limit('max_per_key', max_per_key)
+		if max_weight is not None and max_weight < 0:
+			raise ValueError(f"max_weight must not be negative, got {max_weight}.")
+		self._max_items: int | None = max_items
+		self._max_weight: int | float | None = max_weight
+		self._weigher: Callable[[TK, TV], int | float] | None = weigher
+		self._max_per_key: int | None = max_per_key
+		self._lru: bool = lru
+		self._on_evict: Callable[[TK, TV], Any] | None = on_evict
+		self._hit_count: int = 0
+		self._miss_count: int = 0
+		self._eviction_count: int = 0
+		super().__init__()
+		# the weight is only tracked if it is needed, because observers slow down every modification:
+		self._weight_tracker: _WeightTracker[TK, TV] | None = None
+		if weigher is not None or max_weight is not None:
+			self._weight_tracker = _WeightTracker(_weigh_one if weigher is None else weigher)
+			self._observers.append(self._weight_tracker)
+		if iterable_or_map is not _SENTINEL:
+			self._load(iterable_or_map)
+
+	@property
+	def max_items(self) -> int | None:
+		return self._max_items
+
+	@property
+	def max_weight(self) -> int | float | None:
+		return self._max_weight
+
+	@property
+	def max_per_key(self) -> int | None:
+		return self._max_per_key
+
+	@property
+	def weight(self) -> int | float:
+		"""
+		The total weight of all items. Without a <weigher> and <max_weight>, this is the number of items.
+		"""
+		return len(self) if self._weight_tracker is None else self._weight_tracker.weight
+
+	@property
+	def hit_count(self) -> int:
+		"""
+		The number of reads of keys that were in the dictionary so far.
+		"""
+		return self._hit_count
+
+	@property
+	def miss_count(self) -> int:
+		"""
+		The number of reads of keys that were not in the dictionary so far.
+		"""
+		return self._miss_count
+
+	@property
+	def eviction_count(self) -> int:
+		"""
+		The number of items that were evicted so far.
+		"""
+		return self._eviction_count
+
+	def _evicted(self, item: tuple[TK, TV]) -> None:
+		self._eviction_count += 1
+		if self._on_evict is not None:
+			self._on_evict(*item)
+
+	def _evict(self, key: TK = _SENTINEL) -> None:  # type: ignore
+		"""
+		Evicts the oldest values of <key> while it has more than max_per_key values, and then the oldest items while the
+		dictionary is too large.
+		"""
+		if self._max_per_key is not None and key is not _SENTINEL and (values := self._get_all_or_none(key)) is not None:
+			for _ in range(len(values) - self._max_per_key):
+				self._evicted((key, self.popfirst(key)))
+		if (max_items := self._max_items) is not None:
+			while len(self._items) > max_items:
+				self._evicted(self.popfirstitem())
+		if (max_weight := self._max_weight) is not None:
+			tracker = self._weight_tracker
+			while tracker.weight > max_weight and self._items:  # type: ignore
+				self._evicted(self.popfirstitem())
+
+	def _evict_all(self) -> None:
+		"""
+		Like _evict(), but for all keys.
+		"""
+		if (max_per_key := self._max_per_key) is not None:
+			for key in [key for key, values in self._map.items() if len(values) > max_per_key]:
+				self._evict(key)
+		self._evict()
+
+	def _read(self, key: TK) -> None:
+		if key in self._map:
+			self._hit_count += 1
+			if self._lru:
+				self.move_to_end(key)
+		else:
+			self._miss_count += 1
+
+	@override
+	def get[TT](self, key: TK, default: TT | None = None) -> TV | TT | None:
+		self._read(key)
+		return super().get(key, default)
+
+	@override
+	def getfirst[TT](self, key: TK, default: TT | None = None) -> TV | TT | None:
+		self._read(key)
+		return super().getfirst(key, default)
+
+	@override
+	def getlast[TT](self, key: TK, default: TT | None = None) -> TV | TT | None:
+		self._read(key)
+		return super().getlast(key, default)
+
+	@override
+	def getall[TT](self, key: TK, default: TT = _SENTINEL) -> list[TV] | TT | None:  # type: ignore
+		self._read(key)
+		return super().getall(key, default)
+
+	@override
+	def __getitem__(self, key: TK) -> TV:
+		self._read(key)
+		return super().__getitem__(key)
+
+	@override
+	def add(self, key: TK, value: TV) -> None:
+		super().add(key, value)
+		self._evict(key)
+
+	@override
+	def addall(self, key: TK, value_list: list[TV]) -> None:
+		super().addall(key, value_list)
+		self._evict(key)
+
+	@override
+	def replaceall(self, key: TK, value_list: list[TV]) -> None:
+		super().replaceall(key, value_list)
+		self._evict(key)  # the new values might be heavier.
+
+	@override
+	def _extend_iterable(self, items: Iterable[tuple[TK, TV]]) -> None:
+		# item by item, so that the dictionary never grows much larger than its limits:
+		add = self.add
+		for k, v in items:
+			add(k, v)
+
+	@override
+	def _extend_omd(self, other: OrderedMultiDictBase[TK, TV, Any]) -> None:
+		self._extend_iterable(other.items())
+
+	@override
+	def _update_iterable(self, items: Iterable[tuple[TK, TV]], start: int) -> None:
+		# item by item, like _extend_iterable(), so that the dictionary never grows much larger than its limits:
+		add = self.add
+		for k, v in items:
+			values = self._get_all_or_none(k)  # might raise TypeError: unhashable type
+			if values is not None and values[-1][0] < start:  # the key has only old values, so we see it for the first time.
+				self.popall(k)
+			add(k, v)
+
+	@override
+	def _copy_from(self, others: OrderedMultiDictBase[TK, TV, Any]) -> Self:
+		super()._copy_from(others)
+		if (tracker := self._weight_tracker) is not None:
+			weigher = tracker.weigher
+			tracker.weight = sum(weigher(k, v) for k, v in self._items.values())
+		self._evict_all()
+		return self
+
+	@override
+	def _load_packed(self, keys: list[TK], key_codes: array | None, values: Sequence[TV]) -> None:
+		self._extend_iterable(zip(keys if key_codes is None else map(keys.__getitem__, key_codes), values))
+
+	@override
+	def _new_empty(self) -> Self:
+		return type(self)(**self._constructor_kwargs())
+
+	@override
+	def _constructor_kwargs(self) -> dict[str, Any]:
+		return {
+			'max_items': self._max_items,
+			'max_weight': self._max_weight,
+			'weigher': self._weigher,
+			'max_per_key': self._max_per_key,
+			'lru': self._lru,
+			'on_evict': self._on_evict,
+		}
+
+	@override
+	def __repr__(self) -> str:
+		limits = ''.join(f', {name}={limit!r}' for name, limit in [('max_items', self._max_items), ('max_weight', self._max_weight), ('max_per_key', self._max_per_key)] if limit is not None)
+		return f'{self.__class__.__name__}({list(self.items())!r}{limits})'
+
+
+__all__ = ['BoundedOrderedMultiDict']
@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+from typing import Any, Hashable, Iterable, override, TYPE_CHECKING
+
+from ._orderedmultidict import _MutationObserver
+
+if TYPE_CHECKING:
+	from ._orderedmultidict import OrderedMultiDictBase
+
+# the changes are tuples of: (ADD, index, key, value), (REMOVE, index), (REPLACE, index, value) or (CLEAR,).
+ADD: int = 1
+REMOVE: int = 2
+REPLACE: int = 3
+CLEAR: int = 4
+
+type Change = tuple[Any, ...]
+type ChangeDelta = tuple[int, list[Change]]
+
+
+class _ChangeLog[TK: Hashable, TV](_MutationObserver[TK, TV]):
+	"""
+	All changes of an OrderedMultiDict since the oldest version that a subscriber hasn't acknowledged yet. See
+	OrderedMultiDictBase.subscribe().
+
+	Every change increments the version. changes[i] is the change that produced version base_version + i + 1.
+	"""
+
+	def __init__(self):
+		self.changes: list[Change] = []
+		self.base_version: int = 0
+		self.acknowledged: dict[int, int] = {}  # subscriber -> version
+		self._next_subscriber: int = 0
+
+	@property
+	def version(self) -> int:
+		return self.base_version + len(self.changes)
+
+	def _append(self, change: Change) -> None:
+		if self.acknowledged:
+			self.changes.append(change)
+		else:
+			self.base_version += 1  # nobody will ever ask for this change.
+
+	@override
+	def on_add(self, index: int, key: TK, value: TV) -> None:
+		self._append((ADD, index, key, value))
+
+	@override
+	def on_remove(self, index: int, key: TK, value: TV) -> None:
+		self._append((REMOVE, index))
+
+	@override
+	def on_replace(self, index: int, key: TK, old_value: TV, value: TV) -> None:
+		self._append((REPLACE, index, value))
+
+	@override
+	def on_clear(self) -> None:
+		self._append((CLEAR,))
+
+	@override
+	def copy_for(self, omd: OrderedMultiDictBase[TK, TV, Any]) -> None:
+		return None  # a copy has no subscribers.
+
+	def subscribe(self) -> int:
+		subscriber = self._next_subscriber
+		self._next_subscriber += 1
+		self.acknowledged[subscriber] = self.version
+		return subscriber
+
+	def unsubscribe(self, subscriber: int) -> None:
+		del self.acknowledged[subscriber]
+		self._truncate()
+
+	def acknowledge(self, subscriber: int, version: int) -> None:
+		if subscriber not in self.acknowledged:
+			raise KeyError(subscriber)
+		if version > self.version:
+			raise ValueError(f"version {version} is newer than the current version {self.version}.")
+		if version > self.acknowledged[subscriber]:
+			self.acknowledged[subscriber] = version
+			self._truncate()
+
+	def _truncate(self) -> None:
+		"""
+		Drops all changes that every subscriber has acknowledged.
+		"""
+		oldest = min(self.acknowledged.values(), default=self.version)
+		if oldest > self.base_version:
+			del self.changes[:oldest - self.base_version]
+			self.base_version = oldest
+
+	def changes_since(self, version: int) -> list[Change] | None:
+		"""
+		Returns: The changes since <version>, or None if they have already been truncated.
+		"""
+		if version > self.version:
+			raise ValueError(f"version {version} is newer than the current version {self.version}.")
+		if version < self.base_version:
+			return None
+		return self.changes[version - self.base_version:]
+
+
+def full_changes(indexed_items: Iterable[tuple[int, Any, Any]]) -> list[Change]:
+	"""
+	Returns: Changes that turn any replica into a copy of the dictionary with <indexed_items>.
+	"""
+	changes: list[Change] = [(CLEAR,)]
+	changes.extend((ADD, index, key, value) for index, key, value in indexed_items)
+	return changes
+
+
+def apply_changes(omd: OrderedMultiDictBase[Any, Any, Any], changes: Iterable[Change]) -> None:
+	for change in changes:
+		op = change[0]
+		if op == ADD:
+			# the replica must use the same indices as the original, so that REMOVE and REPLACE find the right items:
+			index = change[1]
+			if index < omd._index:
+				if omd:
+					raise ValueError("the replica has diverged from the original dictionary.")
+				omd._key_codes_cache = None  # (_index, len(_items)) might repeat now.
+			omd._index = index
+			omd.add(change[2], change[3])
+		elif op == REMOVE or op == REPLACE:
+			if change[1] not in omd._items:
+				raise ValueError("the replica has diverged from the original dictionary.")
+			if op == REMOVE:
+				omd._remove_at(change[1])
+			else:
+				omd._replace_at(change[1], change[2])
+		elif op == CLEAR:
+			omd.clear()
+		else:
+			raise ValueError(f"unknown change {change!r}.")
@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+from array import array
+from typing import Any, Callable, ClassVar, Iterable, Iterator, Self, Sequence, Type, override
+
+from ._orderedmultidict import OrderedMultiDict, OrderedMultiDictBase, _SENTINEL, _SupportsKeysAndGetItem
+
+
+def _key_error(key: object, key_range: int) -> Exception:
+	if not isinstance(key, int):
+		return TypeError(f"keys of a DenseIntOrderedMultiDict must be ints, but got {type(key).__name__}.")
+	return ValueError(f"key must be in range({key_range}), but got {key}.")
+
+
+class _DenseIntMap[TV]:
+	"""
+	Drop-in replacement for the defaultdict in OrderedMultiDictBase._map for keys in range(key_range). The per-key lists
+	are stored in a list indexed by the key; absent keys have None in their slot.
+	"""
+	__slots__ = ('slots', 'size', '_factory')
+
+	def __init__(self, factory: Callable[[], list[tuple[int, TV]]], key_range: int):
+		self.slots: list[list[tuple[int, TV]] | None] = [None] * key_range
+		self.size: int = 0
+		self._factory = factory
+
+	def __getitem__(self, key: int) -> list[tuple[int, TV]]:
+		# creates the entry if necessary, like a defaultdict:
+		if not isinstance(key, int) or not 0 <= key < len(self.slots):
+			raise _key_error(key, len(self.slots))
+		if (values := self.slots[key]) is None:
+			values = self.slots[key] = self._factory()
+			self.size += 1
+		return values
+
+	def get(self, key: int, default: list[tuple[int, TV]] | None = None) -> list[tuple[int, TV]] | None:
+		if isinstance(key, int) and 0 <= key < len(self.slots) and (values := self.slots[key]) is not None:
+			return values
+		return default
+
+	def __delitem__(self, key: int) -> None:
+		if self.get(key) is None:
+			raise KeyError(key)
+		self.slots[key] = None
+		self.size -= 1
+
+	def __contains__(self, key: object) -> bool:
+		return self.get(key) is not None  # type: ignore
+
+	def __len__(self) -> int:
+		return self.size
+
+	def __bool__(self) -> bool:
+		return self.size != 0
+
+	def __iter__(self) -> Iterator[int]:
+		return (key for key, values in enumerate(self.slots) if values is not None)
+
+	def keys(self) -> Iterator[int]:
+		return iter(self)
+
+	def values(self) -> Iterator[list[tuple[int, TV]]]:
+		return (values for values in self.slots if values is not None)
+
+	def items(self) -> Iterator[tuple[int, list[tuple[int, TV]]]]:
+		return ((key, values) for key, values in enumerate(self.slots) if values is not None)
+
+	def clear(self) -> None:
+		self.slots[:] = [None] * len(self.slots)
+		self.size = 0
+
+	def __eq__(self, other) -> bool:
+		if isinstance(other, _DenseIntMap):
+			return self.slots == other.slots
+		return dict(self.items()) == other
+
+
+class DenseIntOrderedMultiDict[TV](OrderedMultiDict[int, TV]):
+	"""
+	An OrderedMultiDict for small, dense int keys in range(<key_range>), e.g. shard ids or port numbers. The values
+	of a key are found by indexing a list with the key instead of hashing it.
+	Using a key that is not an int in range(<key_range>) for adding values raises a TypeError or a ValueError.
+
+	Example:
+		>>> omd = DenseIntOrderedMultiDict([(3, 'c'), (0, 'a'), (3, 'cc')], key_range=4)
+		>>> print(omd.getall(3))  # ['c', 'cc']
+		>>> omd.add(4, 'd')       # raises ValueError
+	"""
+	_ItemsDictCls: ClassVar[Type[dict]] = dict
+
+	def __init__(self, iterable_or_map: Iterable[tuple[int, TV]] | _SupportsKeysAndGetItem[int, TV] = _SENTINEL, /, *, key_range: int):  # type: ignore
+		if key_range < 0:
+			raise ValueError(f"key_range must not be negative, but got {key_range}.")
+		self._key_range: int = key_range
+		super().__init__()
+		self._map: _DenseIntMap[TV] = _DenseIntMap(self._DequeCls, key_range)  # type: ignore
+		if iterable_or_map is not _SENTINEL:
+			self._load(iterable_or_map)
+
+	@property
+	def key_range(self) -> int:
+		return self._key_range
+
+	@override
+	def _get_all_or_none(self, key: int) -> list[tuple[int, TV]] | None:
+		try:
+			# list indexing raises a TypeError for non-int keys, and an IndexError for keys >= key_range.
+			return self._map.slots[key] if key >= 0 else None
+		except (TypeError, IndexError):
+			return None
+
+	@override
+	def _extend_iterable(self, items: Iterable[tuple[int, TV]]) -> None:
+		index: int = self._index
+		s_map = self._map
+		slots = s_map.slots
+		s_items = self._items
+		factory = self._DequeCls
+		try:
+			for k, v in items:
+				try:
+					if k < 0:
+						raise IndexError(k)
+					values = slots[k]
+				except (TypeError, IndexError):
+					raise _key_error(k, self._key_range) from None
+				if values is None:
+					values = slots[k] = factory()
+					s_map.size += 1
+				values.append((index, v))
+				s_items[index] = (k, v)
+				index += 1
+		finally:
+			start = self._index
+			self._index = index
+			if self._observers:
+				for i in range(start, index):
+					self._notify_add(i, *s_items[i])
+
+	@override
+	def _extend_omd(self, other: OrderedMultiDictBase[int, TV, Any]) -> None:
+		if isinstance(other, DenseIntOrderedMultiDict) and other._key_range <= self._key_range:
+			super()._extend_omd(other)  # all keys of other are valid keys for us.
+		else:
+			self._extend_iterable(other.items())
+
+	@override
+	def add(self, key: int, value: TV) -> None:
+		s_map = self._map
+		if not isinstance(key, int) or not 0 <= key < self._key_range:
+			raise _key_error(key, self._key_range)
+		index: int = self._index
+		self._index = index + 1
+		if (values := s_map.slots[key]) is None:
+			values = s_map.slots[key] = self._DequeCls()
+			s_map.size += 1
+		values.append((index, value))
+		self._items[index] = (key, value)
+		if self._observers:
+			self._notify_add(index, key, value)
+
+	@override
+	def _copy_from(self, others: OrderedMultiDictBase[int, TV, list[tuple[int, TV]]]) -> Self:
+		if not isinstance(others, DenseIntOrderedMultiDict) or others._key_range != self._key_range:
+			self.clear()
+			self._extend_iterable(others.items())
+			return self
+		self._items = self._ItemsDictCls(others._items)
+		self._index = others._index
+		self._map.slots = [None if values is None else values.copy() for values in others._map.slots]
+		self._map.size = others._map.size
+		self._key_codes_cache = None
+		return self
+
+	@override
+	def _new_empty(self) -> Self:
+		return type(self)(key_range=self._key_range)
+
+	@override
+	def _constructor_kwargs(self) -> dict[str, Any]:
+		return {'key_range': self._key_range}
+
+	@override
+	def _load_packed(self, keys: list[int], key_codes: array | None, values: Sequence[TV]) -> None:
+		self._extend_iterable(zip(keys if key_codes is None else map(keys.__getitem__, key_codes), values))
+
+	@override
+	def __contains__(self, key: int) -> bool:  # type: ignore
+		return self._map.get(key) is not None
+
+	@override
+	def __repr__(self) -> str:
+		return f'{self.__class__.__name__}({list(self.items())!r}, key_range={self._key_range})'
+
+
+__all__ = ['DenseIntOrderedMultiDict']
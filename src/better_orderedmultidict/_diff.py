@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+from collections import Counter
+from typing import Any, Hashable, TYPE_CHECKING
+
+if TYPE_CHECKING:
+	from ._orderedmultidict import OrderedMultiDictBase
+
+
+def _multiset_difference(xs: list[Any], ys: list[Any]) -> tuple[list[Any], list[Any]]:
+	"""
+	Returns: The values of <xs> that are not in <ys>, and the values of <ys> that are not in <xs>, each in their original
+	order. Values that occur several times are matched one by one.
+	"""
+	try:
+		counts = Counter(ys)
+		only_xs = []
+		for x in xs:
+			if counts[x] > 0:
+				counts[x] -= 1
+			else:
+				only_xs.append(x)
+		counts = Counter(xs)
+		only_ys = []
+		for y in ys:
+			if counts[y] > 0:
+				counts[y] -= 1
+			else:
+				only_ys.append(y)
+		return only_xs, only_ys
+	except TypeError:  # unhashable values.
+		only_ys = list(ys)
+		only_xs = []
+		for x in xs:
+			for i, y in enumerate(only_ys):
+				if x == y:
+					del only_ys[i]
+					break
+			else:
+				only_xs.append(x)
+		return only_xs, only_ys
+
+
+def _ranks(keys: list[Any]) -> dict[Any, list[int]]:
+	result: dict[Any, list[int]] = {}
+	for pos, key in enumerate(keys):
+		if (positions := result.get(key)) is None:
+			result[key] = [pos]
+		else:
+			positions.append(pos)
+	return result
+
+
+class OrderedMultiDictDiff[TK: Hashable, TV]:
+	"""
+	The difference between two OrderedMultiDicts, as returned by OrderedMultiDictBase.diff(). Per key, it contains the
+	values that were added and removed, and the keys whose items are all still there, but in a different order.
+	patch() uses it to turn the first dictionary into the second one.
+
+	Example:
+		>>> a = OrderedMultiDict([('a', 1), ('b', 2), ('a', 11)])
+		>>> b = OrderedMultiDict([('a', 1), ('b', 22), ('c', 3)])
+		>>> diff = a.diff(b)
+		>>> print(diff.added)    # {'b': [22], 'c': [3]}
+		>>> print(diff.removed)  # {'a': [11], 'b': [2]}
+		>>> a.patch(diff)        # a == b
+	"""
+
+	def __init__(self, a: OrderedMultiDictBase[TK, TV, Any], b: OrderedMultiDictBase[TK, TV, Any]):
+		self.added: dict[TK, list[TV]] = {}
+		self.removed: dict[TK, list[TV]] = {}
+		self.moved: list[TK] = []
+		changed: dict[TK, None] = {}
+
+		for key in a.unique_keys():
+			a_values = a._get_all_or_none(key)
+			b_values = b._get_all_or_none(key)
+			if a_values is b_values:
+				continue  # shared, so nothing has changed.
+			# the containers are read directly, because getall() might count as a read (see BoundedOrderedMultiDict):
+			a_list = [pair[1] for pair in a_values]
+			if b_values is None:
+				self.removed[key] = a_list
+				changed[key] = None
+				continue
+			b_list = [pair[1] for pair in b_values]
+			if a_list == b_list:
+				continue
+			only_a, only_b = _multiset_difference(a_list, b_list)
+			if only_a:
+				self.removed[key] = only_a
+			if only_b:
+				self.added[key] = only_b
+			if not only_a and not only_b:
+				self.moved.append(key)
+			changed[key] = None
+		for key in b.unique_keys():
+			if key not in a:
+				self.added[key] = [pair[1] for pair in b._get_all_or_none(key)]
+				changed[key] = None
+
+		# the items of the other keys are the same in a and b, but they might have moved relative to each other:
+		a_keys = [key for key in a.keys() if key not in changed]
+		b_keys = [key for key in b.keys() if key not in changed]
+		if a_keys != b_keys:
+			b_ranks = _ranks(b_keys)
+			for key, positions in _ranks(a_keys).items():
+				if positions != b_ranks[key]:
+					self.moved.append(key)
+					changed[key] = None
+
+		self._changed_keys: list[TK] = list(changed)
+		# the items of all changed keys in b with their positions. The items of all other keys are in the same order in
+		# a and b, so patch() can put these in between:
+		self._new_items: list[tuple[int, TK, TV]] = [
+			(pos, key, value) for pos, (key, value) in enumerate(b.items()) if key in changed
+		]
+		self._source_len: int = len(a)
+		self._target_len: int = len(b)
+
+	def __bool__(self) -> bool:
+		return bool(self._changed_keys)
+
+	def __repr__(self) -> str:
+		return f'{type(self).__name__}(added={self.added!r}, removed={self.removed!r}, moved={self.moved!r})'
+
+
+def patch[TK: Hashable, TV](omd: OrderedMultiDictBase[TK, TV, Any], diff: OrderedMultiDictDiff[TK, TV]) -> None:
+	from ._orderedmultidict import _SENTINEL
+	if len(omd) != diff._source_len or len(omd) + sum(map(len, diff.added.values())) - sum(map(len, diff.removed.values())) != diff._target_len:
+		raise ValueError("the diff was not created for this dictionary.")
+	new_items = diff._new_items
+	new_values: dict[TK, list[TV]] = {key: [] for key in diff._changed_keys}
+	for _, key, value in new_items:
+		new_values[key].append(value)
+	# replaceall() keeps the values in place, which often already gives the right order (e.g. if only values were
+	# replaced, removed, or added at the end):
+	for key, values in new_values.items():
+		omd.replaceall(key, values)
+	if [(pos, key) for pos, key in enumerate(omd.keys()) if key in new_values] == [item[:2] for item in new_items]:
+		return
+
+	for key in diff._changed_keys:
+		omd._try_delete_all(key)
+	# all items before the first new item are already in place, the rest is removed and added again in the right order:
+	first = new_items[0][0]
+	tail = [omd._popitem(_SENTINEL, last=True) for _ in range(len(omd) - first)]
+	tail.reverse()
+	items = []
+	old_items = iter(tail)
+	new_pos = 0
+	for pos in range(first, diff._target_len):
+		if new_pos < len(new_items) and new_items[new_pos][0] == pos:
+			items.append(new_items[new_pos][1:])
+			new_pos += 1
+		else:
+			items.append(next(old_items))
+	omd._extend_iterable(items)
+
+
+__all__ = ['OrderedMultiDictDiff']
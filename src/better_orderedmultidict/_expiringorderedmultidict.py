@@ -0,0 +1,388 @@
+from __future__ import annotations
+
+import time
+from array import array
+from contextlib import contextmanager
+from heapq import heapify, heappop, heappush
+from itertools import dropwhile, islice
+from operator import itemgetter
+from typing import Any, Callable, Hashable, Iterable, Iterator, Self, Sequence, TYPE_CHECKING, override
+
+from ._orderedmultidict import (
+	DeOrderedMultiDict, OrderedMultiDictBase, _ItemsView, _KeysView, _MutationObserver, _SENTINEL, _SupportsKeysAndGetItem,
+	_UniqueKeysView, _ValuesView,
+)
+
+if TYPE_CHECKING:
+	from ._diff import OrderedMultiDictDiff
+
+
+class _Expiry[TK: Hashable, TV](_MutationObserver[TK, TV]):
+	"""
+	The deadlines of the items of an ExpiringOrderedMultiDict, in a dict index -> deadline and in a min-heap of
+	(deadline, index) pairs. Heap entries of removed items, or of items that got a new deadline, are only dropped when
+	they reach the top of the heap, or when they make up more than half of it.
+	"""
+
+	def __init__(self, default_ttl: float | None, clock: Callable[[], float]):
+		self.default_ttl: float | None = default_ttl
+		self.clock: Callable[[], float] = clock
+		self.deadlines: dict[int, float] = {}
+		self.heap: list[tuple[float, int]] = []
+		self.expired_count: int = 0  # lets iterations notice that items were removed while they were suspended.
+
+	def set_deadline(self, index: int, deadline: float | None) -> None:
+		if deadline is None:
+			self.deadlines.pop(index, None)
+			return
+		self.deadlines[index] = deadline
+		heap = self.heap
+		heappush(heap, (deadline, index))
+		if len(heap) > 2 * len(self.deadlines) + 64:
+			self.heap = [(deadline, index) for index, deadline in self.deadlines.items()]
+			heapify(self.heap)
+
+	def expire(self, omd: OrderedMultiDictBase[TK, TV, Any]) -> int:
+		"""
+		Removes all items of <omd> whose deadline has passed.
+
+		Returns: The number of removed items.
+		"""
+		heap = self.heap
+		if not heap:
+			return 0
+		now = self.clock()
+		deadlines = self.deadlines
+		count = 0
+		while heap and heap[0][0] <= now:
+			deadline, index = heappop(heap)
+			if deadlines.get(index) == deadline:
+				omd._remove_at(index)  # also removes the deadline, see on_remove().
+				count += 1
+		self.expired_count += count
+		return count
+
+	@override
+	def on_add(self, index: int, key: TK, value: TV) -> None:
+		if self.default_ttl is not None:
+			self.set_deadline(index, self.clock() + self.default_ttl)
+
+	@override
+	def on_remove(self, index: int, key: TK, value: TV) -> None:
+		self.deadlines.pop(index, None)
+
+	@override
+	def on_replace(self, index: int, key: TK, old_value: TV, value: TV) -> None:
+		pass  # the item keeps its deadline.
+
+	@override
+	def on_clear(self) -> None:
+		self.deadlines.clear()
+		self.heap.clear()
+
+	@override
+	def on_reindex(self, indices: Sequence[int]) -> None:
+		self.deadlines = {indices[index]: deadline for index, deadline in self.deadlines.items()}
+		self.heap = [(deadline, index) for index, deadline in self.deadlines.items()]
+		heapify(self.heap)
+
+	@override
+	def copy_for(self, omd: OrderedMultiDictBase[TK, TV, Any]) -> None:
+		return None  # an ExpiringOrderedMultiDict creates its own, see ExpiringOrderedMultiDict._copy_from().
+
+
+class ExpiringOrderedMultiDict[TK: Hashable, TV](DeOrderedMultiDict[TK, TV]):
+	"""
+	A DeOrderedMultiDict whose items expire after a time to live, e.g. for short-lived session attributes.
+	add(key, value, ttl=...) sets the ttl of a single item. All other items, including those added by extend(),
+	update(), etc., get <default_ttl>, or never expire if it is None. Time is measured by <clock>, which returns seconds.
+
+	Expired items are removed lazily, before an item is added, before an iteration over the dictionary or one of its
+	views starts, and before len(), `in`, omd[key], get(), getfirst(), getlast(), getall() and all pop methods. Each
+	removal takes O(log n) for the heap of deadlines. Items that expire while an iteration is in progress are removed as
+	usual, e.g. by a get() in the body of the loop, and the iteration skips them.
+
+	Values that are replaced in place (see replaceall()) keep their deadline, and so do items that are moved by
+	move_to_end(). Deadlines are not pickled; unpickled items get <default_ttl>.
+
+	Example:
+		>>> now = 0.0
+		>>> omd = ExpiringOrderedMultiDict(default_ttl=10, clock=lambda: now)
+		>>> omd.add('a', 1)
+		>>> omd.add('b', 2, ttl=5)
+		>>> now = 7.0
+		>>> print(omd.getall('b'))   # []
+		>>> now = 10.0
+		>>> print(omd.expire_now())  # 1
+	"""
+
+	def __init__(
+			self,
+			iterable_or_map: Iterable[tuple[TK, TV]] | _SupportsKeysAndGetItem[TK, TV] = _SENTINEL,  # type: ignore
+			/,
+			*,
+			default_ttl: float | None = None,
+			clock: Callable[[], float] = time.monotonic,
+	):
+		self._expiry: _Expiry[TK, TV] = _Expiry(default_ttl, clock)
+		# the number of operations in progress that removals would break. Expired items are not removed while it is not 0:
+		self._expiry_paused: int = 0
+		super().__init__()
+		self._observers.append(self._expiry)
+		if iterable_or_map is not _SENTINEL:
+			self._load(iterable_or_map)
+
+	@property
+	def default_ttl(self) -> float | None:
+		return self._expiry.default_ttl
+
+	@property
+	def clock(self) -> Callable[[], float]:
+		return self._expiry.clock
+
+	def expire_now(self) -> int:
+		"""
+		Removes all items whose deadline has passed.
+
+		Returns: The number of removed items.
+		"""
+		return self._expiry.expire(self)
+
+	def _expire(self) -> None:
+		if not self._expiry_paused:
+			self._expiry.expire(self)
+
+	@contextmanager
+	def _expiry_paused_for(self) -> Iterator[None]:
+		"""
+		Keeps expired items from being removed in the middle of an operation, e.g. between counting and removing items.
+		"""
+		self._expiry_paused += 1
+		try:
+			yield
+		finally:
+			self._expiry_paused -= 1
+
+	def _iterate[T](self, project: Callable[[tuple[TK, TV]], T], reverse: bool = False) -> Iterator[T]:
+		"""
+		Removes the expired items, and returns an iterator over project(item) for all items, in reverse order if
+		<reverse>. Expiry is not paused while the iterator is open: if items expire while it is suspended, it continues
+		after the last item it returned, and skips the removed items.
+		"""
+		self._expire()
+		return self._iterate_items(project, reverse)
+
+	def _iterate_items[T](self, project: Callable[[tuple[TK, TV]], T], reverse: bool) -> Iterator[T]:
+		items = self._items
+		expiry = self._expiry
+		pairs = reversed(items.items()) if reverse else iter(items.items())
+		while True:
+			expired_count = expiry.expired_count
+			for index, item in pairs:
+				yield project(item)
+				if expiry.expired_count != expired_count:
+					break
+			else:
+				return
+			# the removals invalidated the iterator over <items>. The indices increase in insertion order, so we can
+			# find our position again:
+			if reverse:
+				pairs = dropwhile(lambda pair: pair[0] >= index, reversed(items.items()))
+			else:
+				pairs = ((i, items[i]) for i in self._iter_indices_from(index))
+
+	@override
+	def add(self, key: TK, value: TV, ttl: float | None = None) -> None:
+		"""
+		Adds <value> to the values of <key>. It expires after <ttl> seconds, or after the default_ttl if <ttl> is None.
+		"""
+		expiry = self._expiry
+		self._expire()
+		super().add(key, value)
+		if ttl is not None:
+			expiry.set_deadline(self._index - 1, expiry.clock() + ttl)
+
+	def _deadlines_of(self, indices: Iterable[int]) -> list[float | None]:
+		deadlines = self._expiry.deadlines
+		return [deadlines.get(index) for index in indices]
+
+	def _restore_deadlines(self, deadlines: list[float | None]) -> None:
+		"""
+		Gives the last len(<deadlines>) items the <deadlines> of the items that they replace.
+		"""
+		indices = list(islice(reversed(self._items), len(deadlines)))
+		indices.reverse()
+		set_deadline = self._expiry.set_deadline
+		for index, deadline in zip(indices, deadlines):
+			set_deadline(index, deadline)
+
+	@override
+	def move_to_end(self, key: TK) -> None:
+		values = self._get_all_or_none(key)
+		deadlines = self._deadlines_of([pair[0] for pair in values] if values is not None else [])
+		with self._expiry_paused_for():
+			super().move_to_end(key)
+		self._restore_deadlines(deadlines)
+
+	@override
+	def get[TT](self, key: TK, default: TT | None = None) -> TV | TT | None:
+		self._expire()
+		return super().get(key, default)
+
+	@override
+	def getfirst[TT](self, key: TK, default: TT | None = None) -> TV | TT | None:
+		self._expire()
+		return super().getfirst(key, default)
+
+	@override
+	def getlast[TT](self, key: TK, default: TT | None = None) -> TV | TT | None:
+		self._expire()
+		return super().getlast(key, default)
+
+	@override
+	def getall[TT](self, key: TK, default: TT = _SENTINEL) -> list[TV] | TT | None:  # type: ignore
+		self._expire()
+		return super().getall(key, default)
+
+	@override
+	def __getitem__(self, key: TK) -> TV:
+		self._expire()
+		return super().__getitem__(key)
+
+	@override
+	def __contains__(self, key: TK) -> bool:  # type: ignore
+		self._expire()
+		return super().__contains__(key)
+
+	@override
+	def __len__(self) -> int:
+		self._expire()
+		return len(self._items)
+
+	@override
+	def __bool__(self) -> bool:
+		return len(self) != 0
+
+	@override
+	def items(self) -> _ItemsView[TK, TV]:  # type: ignore
+		return _ExpiringItemsView(self)
+
+	@override
+	def keys(self) -> _KeysView[TK]:  # type: ignore
+		return _ExpiringKeysView(self)
+
+	@override
+	def unique_keys(self) -> _UniqueKeysView[TK]:
+		return _ExpiringUniqueKeysView(self)
+
+	@override
+	def values(self) -> _ValuesView[TV]:  # type: ignore
+		return _ExpiringValuesView(self)
+
+	@override
+	def popall[TT](self, key: TK, /, default: TT = _SENTINEL) -> list[TV] | TT:  # type: ignore
+		self._expire()
+		return super().popall(key, default)
+
+	@override
+	def drain_until(self, predicate: Callable[[TK, TV], bool], out: list[tuple[TK, TV]] | None = None) -> list[tuple[TK, TV]]:
+		self._expire()
+		# the items are counted first, and removed afterward, so nothing may expire in between:
+		with self._expiry_paused_for():
+			return super().drain_until(predicate, out)
+
+	@override
+	def patch(self, diff: OrderedMultiDictDiff[TK, TV]) -> None:
+		self._expire()
+		with self._expiry_paused_for():
+			super().patch(diff)
+
+	@override
+	def _pop[TT](self, key: TK, default: TT, *, last: bool) -> TV | TT:
+		self._expire()
+		return super()._pop(key, default, last=last)
+
+	@override
+	def _popitem[TT](self, default: TT, *, last: bool) -> tuple[TK, TV] | TT:
+		self._expire()
+		return super()._popitem(default, last=last)
+
+	@override
+	def _popitems(self, count: int, out: list[tuple[TK, TV]], *, last: bool) -> list[tuple[TK, TV]]:
+		self._expire()
+		return super()._popitems(count, out, last=last)
+
+	@override
+	def _copy_from(self, others: OrderedMultiDictBase[TK, TV, Any]) -> Self:
+		super()._copy_from(others)
+		expiry = self._expiry
+		expiry.on_clear()
+		if isinstance(others, ExpiringOrderedMultiDict) and others._STORES_PAIRS:
+			# the items kept their indices, so they keep their deadlines as well:
+			expiry.deadlines = others._expiry.deadlines.copy()
+			expiry.heap = [(deadline, index) for index, deadline in expiry.deadlines.items()]
+			heapify(expiry.heap)
+		else:
+			for index in self._items:
+				expiry.on_add(index, *self._items[index])
+		return self
+
+	@override
+	def _load_packed(self, keys: list[TK], key_codes: array | None, values: Sequence[TV]) -> None:
+		self._extend_iterable(zip(keys if key_codes is None else map(keys.__getitem__, key_codes), values))
+
+	@override
+	def _new_empty(self) -> Self:
+		return type(self)(**self._constructor_kwargs())
+
+	@override
+	def _constructor_kwargs(self) -> dict[str, Any]:
+		return {'default_ttl': self._expiry.default_ttl, 'clock': self._expiry.clock}
+
+
+class _ExpiringViewMixin:
+	"""
+	Removes the expired items before an iteration over a view of an ExpiringOrderedMultiDict starts, and skips the items
+	that expire during the iteration, see ExpiringOrderedMultiDict._iterate(). <_project> maps an item to the element of
+	the view.
+	"""
+	_impl: ExpiringOrderedMultiDict
+	_project: Callable[[tuple[Any, Any]], Any]
+
+	def __iter__(self) -> Iterator[Any]:
+		return self._impl._iterate(self._project)
+
+	def __reversed__(self) -> Iterator[Any]:
+		return self._impl._iterate(self._project, reverse=True)
+
+	def __len__(self) -> int:
+		self._impl._expire()
+		return super().__len__()  # type: ignore
+
+	def __contains__(self, item: Any) -> bool:
+		self._impl._expire()
+		return super().__contains__(item)  # type: ignore
+
+
+class _ExpiringItemsView[TK: Hashable, TV](_ExpiringViewMixin, _ItemsView[TK, TV]):
+	_project = staticmethod(lambda item: item)
+
+
+class _ExpiringKeysView[TK: Hashable](_ExpiringViewMixin, _KeysView[TK]):
+	_project = staticmethod(itemgetter(0))
+
+
+class _ExpiringUniqueKeysView[TK: Hashable](_ExpiringViewMixin, _UniqueKeysView[TK]):
+
+	def __iter__(self) -> Iterator[TK]:
+		return iter(dict.fromkeys(self._impl._iterate(itemgetter(0))))
+
+	def __reversed__(self) -> Iterator[TK]:
+		return reversed(dict.fromkeys(self._impl._iterate(itemgetter(0))))
+
+
+class _ExpiringValuesView[TV](_ExpiringViewMixin, _ValuesView[TV]):
+	_project = staticmethod(itemgetter(1))
+
+
+__all__ = ['ExpiringOrderedMultiDict']
@@ -0,0 +1,246 @@
+from __future__ import annotations
+
+import os
+import pickle
+import struct
+from array import array
+from os import PathLike
+from typing import Any, BinaryIO, Hashable, override, TYPE_CHECKING
+from zlib import crc32
+
+from ._orderedmultidict import _MutationObserver
+
+if TYPE_CHECKING:
+	from ._orderedmultidict import OrderedMultiDictBase
+
+SNAPSHOT_FILE_NAME: str = 'snapshot.omd'
+JOURNAL_FILE_NAME: str = 'journal.omdj'
+
+_SNAPSHOT_MAGIC: bytes = b'OMDSNAP1'
+_JOURNAL_MAGIC: bytes = b'OMDJRNL1'
+# magic, generation. A journal belongs to the snapshot with the same generation:
+_FILE_HEADER = struct.Struct('=8sQ')
+# op, index, payload length. Every record is followed by its payload and the crc32 of the record and the payload:
+_RECORD = struct.Struct('=BQI')
+_CRC = struct.Struct('=I')
+
+_ADD: int = 1  # payload: the pickled (key, value) pair.
+_REMOVE: int = 2
+_REPLACE: int = 3  # payload: the pickled value.
+_CLEAR: int = 4
+
+
+def _fsync_directory(directory: str | PathLike[str]) -> None:
+	if os.name == 'nt':
+		return  # directories cannot be opened on Windows, and renames are durable once they return.
+	fd = os.open(directory, os.O_RDONLY)
+	try:
+		os.fsync(fd)
+	finally:
+		os.close(fd)
+
+
+def _replace_file(directory: str | PathLike[str], name: str, chunks: list[bytes | array]) -> None:
+	"""
+	Atomically replaces the file <name> in <directory> with <chunks>, and makes the new file durable.
+	"""
+	path = os.path.join(directory, name)
+	tmp_path = path + '.tmp'
+	with open(tmp_path, 'wb') as file:
+		for chunk in chunks:
+			file.write(chunk)
+		file.flush()
+		os.fsync(file.fileno())
+	os.replace(tmp_path, path)
+	_fsync_directory(directory)
+
+
+class _Journal[TK: Hashable, TV](_MutationObserver[TK, TV]):
+	"""
+	A write-ahead journal of all modifications of an OrderedMultiDict. See OrderedMultiDictBase.enable_journal().
+
+	Records are collected in a buffer and written and fsync'ed together once <sync_every> records are pending
+	(group commit). After <snapshot_every> records, the whole dictionary is written into a new snapshot, and the journal
+	is started over.
+	"""
+
+	def __init__(self, omd: OrderedMultiDictBase[TK, TV, Any], directory: str | PathLike[str], *, sync_every: int, snapshot_every: int | None):
+		if sync_every < 1:
+			raise ValueError(f"sync_every must be at least 1, got {sync_every}.")
+		if snapshot_every is not None and snapshot_every < 1:
+			raise ValueError(f"snapshot_every must be at least 1 or None, got {snapshot_every}.")
+		self._omd: OrderedMultiDictBase[TK, TV, Any] = omd
+		self.directory: str | PathLike[str] = directory
+		self.sync_every: int = sync_every
+		self.snapshot_every: int | None = snapshot_every
+		self._generation: int = 0
+		self._file: BinaryIO | None = None
+		self._buffer: bytearray = bytearray()
+		self._pending: int = 0
+		self._records_since_snapshot: int = 0
+
+	def _record(self, op: int, index: int, payload: bytes = b'') -> None:
+		head = _RECORD.pack(op, index, len(payload))
+		buffer = self._buffer
+		buffer += head
+		buffer += payload
+		buffer += _CRC.pack(crc32(payload, crc32(head)))
+		self._records_since_snapshot += 1
+		self._pending += 1
+		if self._pending >= self.sync_every:
+			self.sync()
+
+	@override
+	def on_add(self, index: int, key: TK, value: TV) -> None:
+		self._record(_ADD, index, pickle.dumps((key, value), pickle.HIGHEST_PROTOCOL))
+		# snapshots are only taken after an item was added, because then the dictionary is never in the middle of a
+		# removal. It might already contain items whose records are still to come; recovery skips those.
+		if self.snapshot_every is not None and self._records_since_snapshot >= self.snapshot_every:
+			self.checkpoint()
+
+	@override
+	def on_remove(self, index: int, key: TK, value: TV) -> None:
+		self._record(_REMOVE, index)
+
+	@override
+	def on_replace(self, index: int, key: TK, old_value: TV, value: TV) -> None:
+		self._record(_REPLACE, index, pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+
+	@override
+	def on_clear(self) -> None:
+		self._record(_CLEAR, 0)
+
+	def sync(self) -> None:
+		"""
+		Writes all pending records to the journal file and fsyncs it.
+		"""
+		if not self._buffer or self._file is None:
+			return
+		self._file.write(self._buffer)
+		self._file.flush()
+		os.fsync(self._file.fileno())
+		self._buffer.clear()
+		self._pending = 0
+
+	def checkpoint(self) -> None:
+		"""
+		Writes the whole dictionary into a new snapshot and starts a new, empty journal.
+		"""
+		omd = self._omd
+		generation = self._generation + 1
+		# the indices are saved as well, because the records in the journal refer to the items by their index:
+		indices = array('q', omd._items.keys())
+		snapshot = pickle.dumps((omd._index, indices, omd), pickle.HIGHEST_PROTOCOL)
+		_replace_file(self.directory, SNAPSHOT_FILE_NAME, [_FILE_HEADER.pack(_SNAPSHOT_MAGIC, generation), snapshot])
+		# from here on, a journal of an older generation is ignored by recovery, so it can be replaced:
+		self.close()
+		_replace_file(self.directory, JOURNAL_FILE_NAME, [_FILE_HEADER.pack(_JOURNAL_MAGIC, generation)])
+		self.open(generation, _FILE_HEADER.size, 0)
+
+	def open(self, generation: int, length: int, records: int) -> None:
+		"""
+		Continues the journal of <generation>, which has <records> valid records in its first <length> bytes.
+		"""
+		self._file = open(os.path.join(self.directory, JOURNAL_FILE_NAME), 'r+b')
+		self._file.truncate(length)  # drops an incomplete record at the end.
+		self._file.seek(length)
+		self._generation = generation
+		self._buffer.clear()
+		self._pending = 0
+		self._records_since_snapshot = records
+
+	def close(self) -> None:
+		"""
+		Writes all pending records and closes the journal file.
+		"""
+		if self._file is not None:
+			self.sync()
+			self._file.close()
+			self._file = None
+
+	@override
+	def copy_for(self, omd: OrderedMultiDictBase[TK, TV, Any]) -> None:
+		return None  # copies are not journaled.
+
+
+def _read_header(data: bytes | memoryview, magic: bytes, path: str) -> int:
+	if len(data) < _FILE_HEADER.size:
+		raise ValueError(f"{path} is not a valid file.")
+	file_magic, generation = _FILE_HEADER.unpack_from(data)
+	if file_magic != magic:
+		raise ValueError(f"{path} is not a valid file.")
+	return generation
+
+
+def _replay(omd: OrderedMultiDictBase[Any, Any, Any], data: memoryview) -> tuple[int, int]:
+	"""
+	Applies all complete records in <data> to <omd>, which has just been loaded from the snapshot. Records of items
+	that are already in the snapshot, or that were already removed from it, are skipped.
+	Stops at the first incomplete or corrupt record, which is what a crash while writing leaves behind.
+
+	Returns: The length of the valid part of <data> and the number of records in it.
+	"""
+	pos = _FILE_HEADER.size
+	end = len(data)
+	records = 0
+	items = omd._items
+	while pos + _RECORD.size + _CRC.size <= end:
+		op, index, length = _RECORD.unpack_from(data, pos)
+		payload_start = pos + _RECORD.size
+		payload_end = payload_start + length
+		if op not in (_ADD, _REMOVE, _REPLACE, _CLEAR) or payload_end + _CRC.size > end:
+			break
+		payload = data[payload_start:payload_end]
+		if crc32(payload, crc32(data[pos:payload_start])) != _CRC.unpack_from(data, payload_end)[0]:
+			break
+		pos = payload_end + _CRC.size
+		records += 1
+		if op == _ADD:
+			# indices are added in ascending order, so smaller ones are already in the snapshot, or removed from it.
+			if index >= omd._index:
+				omd._index = index
+				omd.add(*pickle.loads(payload))
+		elif op == _REMOVE:
+			if index in items:
+				omd._remove_at(index)
+		elif op == _REPLACE:
+			if index in items:
+				omd._replace_at(index, pickle.loads(payload))
+		else:
+			omd.clear()
+	return pos, records
+
+
+def enable_journal(omd: OrderedMultiDictBase[TK, TV, Any], directory: str | PathLike[str], *, sync_every: int, snapshot_every: int | None) -> None:
+	os.makedirs(directory, exist_ok=True)
+	journal = _Journal(omd, directory, sync_every=sync_every, snapshot_every=snapshot_every)
+	journal.checkpoint()
+	omd._observers.append(journal)
+
+
+def recover(directory: str | PathLike[str], *, sync_every: int, snapshot_every: int | None) -> OrderedMultiDictBase[Any, Any, Any]:
+	snapshot_path = os.path.join(directory, SNAPSHOT_FILE_NAME)
+	with open(snapshot_path, 'rb') as file:
+		data = file.read()
+	generation = _read_header(data, _SNAPSHOT_MAGIC, snapshot_path)
+	next_index, indices, omd = pickle.loads(memoryview(data)[_FILE_HEADER.size:])
+	del data
+	omd._restore_indices(indices, next_index)
+	del indices
+
+	journal = _Journal(omd, directory, sync_every=sync_every, snapshot_every=snapshot_every)
+	journal_path = os.path.join(directory, JOURNAL_FILE_NAME)
+	try:
+		with open(journal_path, 'rb') as file:
+			data = file.read()
+	except FileNotFoundError:
+		data = b''
+	if data and _read_header(data, _JOURNAL_MAGIC, journal_path) == generation:
+		length, records = _replay(omd, memoryview(data))
+		journal.open(generation, length, records)
+	else:
+		# a journal of an older generation is left over from a crash during a checkpoint. Its records are all in the
+		# snapshot.
+		journal.checkpoint()
+	omd._observers.append(journal)
+	return omd
@@ -0,0 +1,316 @@
+from __future__ import annotations
+
+import asyncio
+import queue
+import threading
+import time
+from collections import deque
+from collections.abc import Mapping
+from typing import Any, Hashable, Iterable
+
+from ._orderedmultidict import DeOrderedMultiDict
+
+
+def _check_weight(weight: int) -> None:
+	if weight < 1:
+		raise ValueError(f"weight must be at least 1, got {weight}.")
+
+
+class KeyedQueue[TK: Hashable, TV]:
+	"""
+	A queue of (key, value) items that are taken fairly across keys, e.g. jobs of several tenants. The items of each key
+	are taken in insertion order, and the keys take turns: get() takes up to weight items of the key whose turn it is
+	before the next key gets its turn. The weight of a key is weights[key] or <default_weight>. A key whose last item
+	was taken leaves the rotation, and takes its next turn after all other keys when it gets new items.
+	put() and get() take O(1). The items are stored in a DeOrderedMultiDict.
+
+	Example:
+		>>> q = KeyedQueue([('a', 1), ('a', 2), ('a', 3), ('b', 4)], weights={'a': 2})
+		>>> print([q.get() for _ in range(4)])  # [('a', 1), ('a', 2), ('b', 4), ('a', 3)]
+	"""
+
+	def __init__(
+			self,
+			iterable: Iterable[tuple[TK, TV]] = (),
+			/,
+			*,
+			weights: Mapping[TK, int] | None = None,
+			default_weight: int = 1,
+	):
+		_check_weight(default_weight)
+		self._weights: dict[TK, int] = {}
+		self._default_weight: int = default_weight
+		self._omd: DeOrderedMultiDict[TK, TV] = DeOrderedMultiDict()
+		# the keys that have items, the key whose turn it is first:
+		self._rotation: deque[TK] = deque()
+		# the number of items taken from _rotation[0] during its current turn:
+		self._taken: int = 0
+		if weights is not None:
+			for key, weight in weights.items():
+				self.set_weight(key, weight)
+		put = self.put
+		for key, value in iterable:
+			put(key, value)
+
+	def set_weight(self, key: TK, weight: int) -> None:
+		"""
+		Sets the number of items that get() takes from <key> per turn.
+		"""
+		_check_weight(weight)
+		self._weights[key] = weight
+
+	def weight(self, key: TK) -> int:
+		return self._weights.get(key, self._default_weight)
+
+	def put(self, key: TK, value: TV) -> None:
+		"""
+		Adds <value> after the other values of <key>.
+		"""
+		omd = self._omd
+		if key not in omd._map:
+			self._rotation.append(key)
+		omd.add(key, value)
+
+	def get(self) -> tuple[TK, TV]:
+		"""
+		Removes and returns the next item of the key whose turn it is.
+
+		Raises: KeyError if the queue is empty.
+		"""
+		rotation = self._rotation
+		if not rotation:
+			raise KeyError("queue is empty")
+		key = rotation[0]
+		omd = self._omd
+		value = omd.popfirst(key)
+		if key not in omd._map:
+			rotation.popleft()
+			self._taken = 0
+		else:
+			self._taken += 1
+			if self._taken >= self._weights.get(key, self._default_weight):
+				rotation.rotate(-1)
+				self._taken = 0
+		return key, value
+
+	def count(self, key: TK) -> int:
+		"""
+		Returns: The number of items of <key> in the queue.
+		"""
+		values = self._omd._get_all_or_none(key)
+		return 0 if values is None else len(values)
+
+	def keys(self) -> list[TK]:
+		"""
+		Returns: The keys that have items, in the order of their turns.
+		"""
+		return list(self._rotation)
+
+	def clear(self) -> None:
+		self._omd.clear()
+		self._rotation.clear()
+		self._taken = 0
+
+	def __len__(self) -> int:
+		return len(self._omd)
+
+	def __bool__(self) -> bool:
+		return bool(self._rotation)
+
+	def __repr__(self) -> str:
+		return f'{self.__class__.__name__}({list(self._omd.items())!r})'
+
+
+def _wake_up_next(waiters: deque[asyncio.Future[None]]) -> None:
+	while waiters:
+		waiter = waiters.popleft()
+		if not waiter.done():
+			waiter.set_result(None)
+			break
+
+
+class AsyncKeyedQueue[TK: Hashable, TV]:
+	"""
+	A KeyedQueue for asyncio tasks, with the interface of asyncio.Queue. If <maxsize> is greater than 0, put() waits
+	while the queue holds <maxsize> items. get() waits while the queue is empty. Waiting tasks are woken up in the order
+	in which they started to wait, so no polling is needed. Not thread-safe, see ThreadSafeKeyedQueue.
+
+	Example:
+		>>> q = AsyncKeyedQueue(maxsize=100)
+		>>> await q.put('tenant 1', job)
+		>>> tenant, job = await q.get()
+	"""
+
+	def __init__(self, maxsize: int = 0, *, weights: Mapping[TK, int] | None = None, default_weight: int = 1):
+		self._queue: KeyedQueue[TK, TV] = KeyedQueue(weights=weights, default_weight=default_weight)
+		self._maxsize: int = maxsize
+		self._getters: deque[asyncio.Future[None]] = deque()
+		self._putters: deque[asyncio.Future[None]] = deque()
+
+	@property
+	def maxsize(self) -> int:
+		return self._maxsize
+
+	def qsize(self) -> int:
+		return len(self._queue)
+
+	def empty(self) -> bool:
+		return not self._queue
+
+	def full(self) -> bool:
+		return 0 < self._maxsize <= len(self._queue)
+
+	def set_weight(self, key: TK, weight: int) -> None:
+		self._queue.set_weight(key, weight)
+
+	def count(self, key: TK) -> int:
+		return self._queue.count(key)
+
+	def put_nowait(self, key: TK, value: TV) -> None:
+		"""
+		Raises: asyncio.QueueFull if the queue is full.
+		"""
+		if self.full():
+			raise asyncio.QueueFull
+		self._queue.put(key, value)
+		_wake_up_next(self._getters)
+
+	def get_nowait(self) -> tuple[TK, TV]:
+		"""
+		Raises: asyncio.QueueEmpty if the queue is empty.
+		"""
+		if not self._queue:
+			raise asyncio.QueueEmpty
+		item = self._queue.get()
+		_wake_up_next(self._putters)
+		return item
+
+	async def put(self, key: TK, value: TV) -> None:
+		await self._wait(self._putters, self.full)
+		self.put_nowait(key, value)
+
+	async def get(self) -> tuple[TK, TV]:
+		await self._wait(self._getters, self.empty)
+		return self.get_nowait()
+
+	async def _wait(self, waiters: deque[asyncio.Future[None]], must_wait: Any) -> None:
+		while must_wait():
+			waiter = asyncio.get_running_loop().create_future()
+			waiters.append(waiter)
+			try:
+				await waiter
+			except BaseException:
+				waiter.cancel()
+				try:
+					waiters.remove(waiter)
+				except ValueError:
+					pass  # the waiter has already been woken up...
+				if not must_wait() and not waiter.cancelled():
+					_wake_up_next(waiters)  # ...so the next waiter gets its turn instead.
+				raise
+
+	def __len__(self) -> int:
+		return len(self._queue)
+
+	def __repr__(self) -> str:
+		return f'{self.__class__.__name__}(maxsize={self._maxsize!r}, items={list(self._queue._omd.items())!r})'
+
+
+class ThreadSafeKeyedQueue[TK: Hashable, TV]:
+	"""
+	A KeyedQueue that can be shared between threads, with the interface of queue.Queue. If <maxsize> is greater than 0,
+	put() blocks while the queue holds <maxsize> items. get() blocks while the queue is empty.
+
+	Example:
+		>>> q = ThreadSafeKeyedQueue(maxsize=100)
+		>>> q.put('tenant 1', job)                 # in one thread
+		>>> tenant, job = q.get(timeout=1.0)       # in another thread
+	"""
+
+	def __init__(self, maxsize: int = 0, *, weights: Mapping[TK, int] | None = None, default_weight: int = 1):
+		self._queue: KeyedQueue[TK, TV] = KeyedQueue(weights=weights, default_weight=default_weight)
+		self._maxsize: int = maxsize
+		self._mutex: threading.Lock = threading.Lock()
+		self._not_empty: threading.Condition = threading.Condition(self._mutex)
+		self._not_full: threading.Condition = threading.Condition(self._mutex)
+
+	@property
+	def maxsize(self) -> int:
+		return self._maxsize
+
+	def qsize(self) -> int:
+		with self._mutex:
+			return len(self._queue)
+
+	def empty(self) -> bool:
+		with self._mutex:
+			return not self._queue
+
+	def full(self) -> bool:
+		with self._mutex:
+			return self._full()
+
+	def _full(self) -> bool:
+		return 0 < self._maxsize <= len(self._queue)
+
+	def set_weight(self, key: TK, weight: int) -> None:
+		with self._mutex:
+			self._queue.set_weight(key, weight)
+
+	def count(self, key: TK) -> int:
+		with self._mutex:
+			return self._queue.count(key)
+
+	def put(self, key: TK, value: TV, block: bool = True, timeout: float | None = None) -> None:
+		"""
+		Raises: queue.Full if the queue is still full after <timeout> seconds, or right away if <block> is False.
+		"""
+		with self._not_full:
+			self._wait(self._not_full, self._full, block, timeout, queue.Full)
+			self._queue.put(key, value)
+			self._not_empty.notify()
+
+	def get(self, block: bool = True, timeout: float | None = None) -> tuple[TK, TV]:
+		"""
+		Raises: queue.Empty if the queue is still empty after <timeout> seconds, or right away if <block> is False.
+		"""
+		with self._not_empty:
+			self._wait(self._not_empty, lambda: not self._queue, block, timeout, queue.Empty)
+			item = self._queue.get()
+			self._not_full.notify()
+			return item
+
+	def put_nowait(self, key: TK, value: TV) -> None:
+		self.put(key, value, block=False)
+
+	def get_nowait(self) -> tuple[TK, TV]:
+		return self.get(block=False)
+
+	@staticmethod
+	def _wait(condition: threading.Condition, must_wait: Any, block: bool, timeout: float | None, error: type[Exception]) -> None:
+		if not block:
+			if must_wait():
+				raise error
+		elif timeout is None:
+			while must_wait():
+				condition.wait()
+		elif timeout < 0:
+			raise ValueError("'timeout' must be a non-negative number")
+		else:
+			end = time.monotonic() + timeout
+			while must_wait():
+				remaining = end - time.monotonic()
+				if remaining <= 0.0:
+					raise error
+				condition.wait(remaining)
+
+	def __len__(self) -> int:
+		return self.qsize()
+
+	def __repr__(self) -> str:
+		with self._mutex:
+			items = list(self._queue._omd.items())
+		return f'{self.__class__.__name__}(maxsize={self._maxsize!r}, items={items!r})'
+
+
+__all__ = ['KeyedQueue', 'AsyncKeyedQueue', 'ThreadSafeKeyedQueue']
@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+import json
+import mmap
+import os
+from operator import itemgetter, methodcaller
+from os import PathLike
+from typing import Any, Callable, Hashable, Iterator, TYPE_CHECKING
+
+if TYPE_CHECKING:
+	from ._orderedmultidict import OrderedMultiDictBase
+
+
+def _chunks(path: str | PathLike[str], encoding: str, chunk_size: int) -> Iterator[tuple[int, list[str]]]:
+	"""
+	Reads the file at <path> through a memory map in chunks of about <chunk_size> bytes that end at a line break. Every
+	chunk is decoded at once.
+
+	Yields: The line number of the first line of each chunk, and its lines without line breaks.
+	"""
+	if chunk_size < 1:
+		raise ValueError(f"chunk_size must be positive, but got {chunk_size}.")
+	with open(path, 'rb') as file:
+		size = os.fstat(file.fileno()).st_size
+		if size == 0:
+			return  # empty files cannot be memory-mapped.
+		with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+			start = 0
+			line_no = 1
+			while start < size:
+				if start + chunk_size >= size:
+					end = size
+				else:
+					end = mapped.rfind(b'\n', start, start + chunk_size) + 1
+					if end == 0:  # the line is longer than chunk_size.
+						end = mapped.find(b'\n', start + chunk_size) + 1 or size
+				text = mapped[start:end].decode(encoding)
+				if '\r' in text:
+					text = text.replace('\r\n', '\n')
+				lines = text.split('\n')
+				if not lines[-1]:
+					lines.pop()  # the chunk ends with a line break.
+				yield line_no, lines
+				line_no += len(lines)
+				start = end
+
+
+def _intern(keys: list[Any], cache: dict[Any, Any]) -> list[Any]:
+	"""
+	Returns: <keys>, with all equal keys replaced by the same object.
+	"""
+	return list(map(cache.setdefault, keys, keys))
+
+
+def load_delimited(
+		omd: OrderedMultiDictBase[Any, Any, Any],
+		path: str | PathLike[str],
+		*,
+		sep: str,
+		key_col: int,
+		value_col: int,
+		convert: Callable[[str], Any] | None,
+		skip_header: bool,
+		intern_keys: bool,
+		encoding: str,
+		chunk_size: int,
+) -> None:
+	if key_col < 0 or value_col < 0:
+		raise ValueError(f"key_col and value_col must not be negative, but got {key_col} and {value_col}.")
+	if not sep:
+		raise ValueError("sep must not be empty.")
+	# the columns after the last needed one are not split:
+	split = methodcaller('split', sep, max(key_col, value_col) + 1)
+	get_item = itemgetter(key_col, value_col)
+	get_key = itemgetter(key_col)
+	get_value = itemgetter(value_col)
+	cache: dict[Hashable, Hashable] = {}
+	for line_no, lines in _chunks(path, encoding, chunk_size):
+		if skip_header and line_no == 1 and lines:
+			del lines[0]
+			line_no += 1
+		try:
+			if intern_keys or convert is not None:
+				# splitting every line twice is faster than keeping all split lines alive, which makes the garbage collector
+				# run over and over:
+				keys = list(map(get_key, map(split, lines)))
+				values = list(map(get_value, map(split, lines)))
+			else:
+				omd._extend_iterable(map(get_item, map(split, lines)))
+				continue
+		except IndexError:
+			min_len = max(key_col, value_col) + 1
+			bad = next((i for i, line in enumerate(lines) if len(split(line)) < min_len), None)
+			if bad is None:
+				raise  # the IndexError does not come from a short line.
+			raise ValueError(f"{path}, line {line_no + bad}: expected at least {min_len} columns separated by {sep!r}.") from None
+		if intern_keys:
+			keys = _intern(keys, cache)
+		omd._extend_iterable(zip(keys, values if convert is None else map(convert, values)))
+
+
+_decoder = json.JSONDecoder()
+
+
+def _loads_lines(path: str | PathLike[str], line_no: int, lines: list[str]) -> list[Any]:
+	result = []
+	for i, line in enumerate(lines):
+		if not line.strip():
+			continue
+		try:
+			result.append(json.loads(line))
+		except json.JSONDecodeError as e:
+			raise ValueError(f"{path}, line {line_no + i}: {e.msg} (column {e.colno}).") from None
+	return result
+
+
+def _has_fields(get_item: Callable[[Any], Any], obj: Any) -> bool:
+	try:
+		get_item(obj)
+	except (KeyError, IndexError, TypeError):
+		return False
+	return True
+
+
+def _is_hashable(key: Any) -> bool:
+	try:
+		hash(key)
+	except TypeError:
+		return False
+	return True
+
+
+def _line_of_value(line_no: int, lines: list[str], position: int) -> int:
+	"""
+	Returns: The number of the line in <lines> (which starts at line <line_no>) that holds the value at <position>,
+	skipping blank lines like _loads_lines() does.
+	"""
+	return line_no + [i for i, line in enumerate(lines) if line.strip()][position]
+
+
+def load_jsonl(
+		omd: OrderedMultiDictBase[Any, Any, Any],
+		path: str | PathLike[str],
+		*,
+		key_field: str | int,
+		value_field: str | int,
+		intern_keys: bool,
+		encoding: str,
+		chunk_size: int,
+) -> None:
+	get_item = itemgetter(key_field, value_field)
+	get_key = itemgetter(key_field)
+	get_value = itemgetter(value_field)
+	cache: dict[Hashable, Hashable] = {}
+	for line_no, lines in _chunks(path, encoding, chunk_size):
+		lines_with_values = list(filter(None, lines))
+		# raw_decode() is more than twice as fast as json.loads(), and returns where each value ends, so a line that holds
+		# only part of a value or more than one value is found. If a line fails to decode or does not end with its value,
+		# e.g. because of whitespace around it, the chunk is parsed with json.loads(), which also finds the malformed line:
+		try:
+			decoded = list(map(_decoder.raw_decode, lines_with_values))
+		except json.JSONDecodeError:
+			decoded = None
+		if decoded is not None and [end for _, end in decoded] == list(map(len, lines_with_values)):
+			objects = [obj for obj, _ in decoded]
+		else:
+			objects = _loads_lines(path, line_no, lines)
+		del lines_with_values, decoded
+		try:
+			keys = list(map(get_key, objects))
+			values = list(map(get_value, objects))
+		except (KeyError, IndexError, TypeError) as e:
+			bad = next(i for i, obj in enumerate(objects) if not _has_fields(get_item, obj))
+			raise ValueError(
+				f"{path}, line {_line_of_value(line_no, lines, bad)}: every line must contain a {key_field!r} and a "
+				f"{value_field!r} field: {e!r}."
+			) from None
+		del objects
+		try:
+			if intern_keys:
+				keys = _intern(keys, cache)
+			omd._extend_iterable(zip(keys, values))
+		except TypeError as e:
+			bad = next((i for i, key in enumerate(keys) if not _is_hashable(key)), None)
+			if bad is None:
+				raise  # the TypeError does not come from an unhashable key.
+			raise TypeError(f"{path}, line {_line_of_value(line_no, lines, bad)}: {e}") from None
@@ -1,8 +1,21 @@
 from __future__ import annotations
 
-from collections import OrderedDict, defaultdict, deque
+import pickle
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from collections import Counter, OrderedDict, defaultdict, deque
+from heapq import merge
+from itertools import dropwhile, islice, takewhile
 from operator import eq, itemgetter
-from typing import Any, ClassVar, Hashable, Iterable, Iterator, Protocol, Self, Sized, Type, overload, Union, MutableMapping, override, runtime_checkable, MutableSequence
+from typing import Any, AsyncIterable, Callable, ClassVar, Hashable, Iterable, Iterator, Protocol, Self, Sequence, Sized, Type, overload, Union, MutableMapping, override, runtime_checkable, MutableSequence, TYPE_CHECKING
+
+if TYPE_CHECKING:
+	from os import PathLike
+	import numpy as np
+	from ._changelog import _ChangeLog, ChangeDelta
+	from ._diff import OrderedMultiDictDiff
+	from ._journal import _Journal
+	from ._sealed import SealedOrderedMultiDict
 
 _BUGREPORT_MSG: str = "Please file a bugreport if ypu have not fiddled with any internal fields or methods of OrderedMultiDict."
 _DESYNCED_ERROR_MSG: str = f"OrderedMultiDict._items and OrderedMultiDict._map have de-synced. {_BUGREPORT_MSG}"
@@ -12,6 +25,15 @@ _SENTINEL = object()
 _SENTINEL2 = object()
 
 
+def _import_numpy():
+	# numpy is an optional dependency, so it is only imported when it is actually needed.
+	try:
+		import numpy
+	except ImportError:
+		raise ImportError("This feature requires numpy. Install it with `pip install better_orderedmultidict[numpy]`.") from None
+	return numpy
+
+
 @runtime_checkable
 class _SupportsKeysAndGetItem[TK: Hashable, TV](Protocol):
 	def keys(self) -> Iterable[TK]: ...
@@ -39,6 +61,37 @@ def _iter_values[TV](values: Iterable[tuple[Any, TV]]) -> Iterator[TV]:
 	return map(itemgetter(1), values)
 
 
+def _key_code_typecode(key_count: int) -> str:
+	"""
+	Returns: The smallest unsigned array typecode that can hold all codes in range(<key_count>).
+	"""
+	for typecode in 'BHI':
+		if key_count <= 1 << (8 * array(typecode).itemsize):
+			return typecode
+	return 'Q'
+
+
+def _to_array(typecode: str, data: array | Any) -> array:
+	"""
+	Returns: <data> if it already is an array or None, otherwise a new array of <typecode> with the contents of the
+	buffer <data>.
+	"""
+	if data is None or isinstance(data, array):
+		return data
+	result = array(typecode)
+	result.frombytes(memoryview(data).cast('B'))
+	return result
+
+
+def _unpack[T: OrderedMultiDictBase](cls: type[T], kwargs: dict[str, Any], keys: list, key_codes_typecode: str, key_codes: array | Any | None, values: Any) -> T:
+	"""
+	Reconstructs a dictionary pickled by OrderedMultiDictBase.__reduce_ex__().
+	"""
+	result = cls(**kwargs)
+	result._load_packed(keys, _to_array(key_codes_typecode, key_codes), values)
+	return result
+
+
 class _CopyableCtor[T](Protocol):
 	@overload
 	def __call__(self) -> T: ...
@@ -51,13 +104,50 @@ class _CopyableCtor[T](Protocol):
 class OrderedMultiDictBase[TK: Hashable, TV, _Q: MutableSequence[tuple[int, Any]]](MutableMapping[TK, TV]):  # _Q: MutableSequence[tuple[int, TV]] is not allowed by python :(
 	_ItemsDictCls: ClassVar[type[dict]]
 	_DequeCls: _CopyableCtor[_Q]  # ClassVar[_CopyableCtor[_Q]]
+	# whether _items maps index -> (key, value) and _map maps key -> [(index, value), ...]:
+	_STORES_PAIRS: ClassVar[bool] = True
 
 	def _items_pop_first(self, items: dict) -> tuple[int, tuple[TK, TV]]:
 		raise NotImplementedError('_items_pop_first()')
 
+	def _items_pop_firsts(self, count: int) -> list[tuple[int, Any]]:
+		"""
+		Removes the first <count> entries of _items, which must be a dict.
+
+		Returns: The removed (index, item) pairs.
+		"""
+		items = self._items
+		run = list(islice(items.items(), count))
+		for index, _ in run:
+			del items[index]
+		# a dict keeps the slots of removed entries until it is resized, and iterating it has to skip them. So it is
+		# compacted once the removed entries at the front outnumber the remaining ones. This happens in place, because
+		# views keep a reference to _items:
+		self._items_removed_at_front += count
+		if self._items_removed_at_front > len(items):
+			remaining = items.copy()
+			items.clear()
+			items.update(remaining)
+			self._items_removed_at_front = 0
+		return run
+
 	def _q_popleft(self, que: _Q) -> tuple[int, TV]:
 		raise NotImplementedError('_q_popleft()')
 
+	def _shorten_values(self, counts: dict[TK, int], *, last: bool) -> None:
+		"""
+		Removes the first (or the last) counts[key] values of each key from _map.
+		"""
+		s_map = self._map
+		for key, count in counts.items():
+			values = s_map[key]
+			if count == len(values):
+				del s_map[key]
+			elif last:
+				del values[len(values) - count:]
+			else:
+				del values[:count]
+
 	@overload
 	def __init__(self) -> None: ...
 	@overload
@@ -82,6 +172,9 @@ class OrderedMultiDictBase[TK: Hashable, TV, _Q: MutableSequence[tuple[int, Any]
 		self._items: dict[int, tuple[TK, TV]] = self._ItemsDictCls()
 		self._map: defaultdict[TK, _Q] = defaultdict(self._DequeCls)
 		self._index: int = 0  # _index is only used to have a unique id for each entry, not to track their order.
+		self._key_codes_cache: tuple[tuple[int, int], _KeyGrouping[TK]] | None = None
+		self._observers: list[_MutationObserver[TK, TV]] = []
+		self._items_removed_at_front: int = 0  # see _items_pop_firsts().
 
 		if iterable_or_map is not _SENTINEL:
 			self._load(iterable_or_map)
@@ -94,7 +187,7 @@ class OrderedMultiDictBase[TK: Hashable, TV, _Q: MutableSequence[tuple[int, Any]
 		<mapping>. If multiple values exist for the same key in <mapping>, they
 		are all be imported.
 		"""
-		if isinstance(iterable_or_map, OrderedMultiDictBase):
+		if isinstance(iterable_or_map, OrderedMultiDictBase) and not self._observers:
 			self._copy_from(iterable_or_map)  # special case
 		else:
 			self.clear()
@@ -121,28 +214,54 @@ class OrderedMultiDictBase[TK: Hashable, TV, _Q: MutableSequence[tuple[int, Any]
 			>>> omd = OrderedMultiDict([(1,1), (2,2), (1,11), (2, 22), (3,3)])
 			>>> omd.update([(1, '1'), (3, '3'), (1, '11')])  # type: ignore
 			>>> print(omd.items())    # _ItemsView([(2, 2), (2, 22), (1, '1'), (3, '3'), (1, '11')])
-		"""
 
+		<iterable_or_map> is only iterated once, so it can be a generator.
+		"""
+		if iterable_or_map is self:
+			iterable_or_map = list(self.items())  # we cannot iterate over ourselves while modifying ourselves.
+		# all values with an index below start are old, and have to be removed when we first encounter their key.
+		start = self._index
 		if iterable_or_map is not _SENTINEL:
-			self._try_delete_all_keys(iterable_or_map)
+			self._update(iterable_or_map, start)
 		if kwargs:
-			self._try_delete_all_keys(kwargs)  # type: ignore
+			self._update_iterable(kwargs.items(), start)  # type: ignore
 
-		self.extend(iterable_or_map, **kwargs)
-
-	def _try_delete_all_keys(self, iterable_or_map: Iterable[tuple[TK, TV]] | _SupportsKeysAndGetItem[TK, TV]):
-		if hasattr(iterable_or_map, 'unique_keys'):
-			for k in iterable_or_map.unique_keys():
-				self._try_delete_all(k)
-		elif hasattr(iterable_or_map, 'keys'):
-			for k in iterable_or_map.keys():
-				self._try_delete_all(k)
-		elif hasattr(iterable_or_map, 'items'):
-			for k in dict.fromkeys(_iter_keys(iterable_or_map.items)):
-				self._try_delete_all(k)
+	def _update(self, iterable_or_map: Iterable[tuple[TK, TV]] | _SupportsKeysAndGetItem[TK, TV], start: int):
+		if hasattr(iterable_or_map, 'items'):
+			self._update_iterable(iterable_or_map.items(), start)
+		elif isinstance(iterable_or_map, _SupportsKeysAndGetItem):
+			self._update_iterable(((k, iterable_or_map[k]) for k in iterable_or_map.keys()), start)
 		else:
-			for k in dict.fromkeys(_iter_keys(iterable_or_map)):
-				self._try_delete_all(k)
+			self._update_iterable(iterable_or_map, start)
+
+	def _update_iterable(self, items: Iterable[tuple[TK, TV]], start: int) -> None:
+		"""
+		Same as _extend_iterable(), but when a key is encountered for the first time, all of its values with an index
+		below <start> are removed first.
+		"""
+		index: int = self._index
+		s_map = self._map
+		s_items = self._items
+		observers = self._observers
+		try:
+			for k, v in items:
+				values = s_map[k]  # might raise TypeError: unhashable type
+				if values and values[-1][0] < start:  # the key has only old values, so we see it for the first time.
+					for val in values:
+						del s_items[val[0]]
+					if observers:
+						for val in values:
+							self._notify_remove(val[0], k, val[1])
+					values.clear()
+				values.append((index, v))
+				s_items[index] = (k, v)  # recreate the tuple, because we are not guaranteed to get an actual pure & immutable tuple.
+				index += 1
+		finally:
+			first = self._index
+			self._index = index
+			if observers:
+				for i in range(first, index):
+					self._notify_add(i, *s_items[i])
 
 	@overload
 	def extend(self, __m: _SupportsKeysAndGetItem[TK, TV], /) -> None: ...
@@ -170,8 +289,38 @@ class OrderedMultiDictBase[TK: Hashable, TV, _Q: MutableSequence[tuple[int, Any]
 		if kwargs:
 			self._extend(kwargs)  # type: ignore
 
+	async def extend_async(self, aiterable: AsyncIterable[tuple[TK, TV]], /, *, batch_size: int = 10_000) -> None:
+		"""
+		Adds all key:value items from the async iterable <aiterable>, e.g. a network stream, like extend(). The items
+		are added in batches of <batch_size>, so only one batch is held in memory at a time, and other tasks can run
+		between two batches.
+		If <aiterable> raises, or the task is cancelled, all items received so far are added before the exception
+		propagates, so no item is lost and the dictionary is never left half-updated.
+
+		Example:
+			>>> omd = OrderedMultiDict()
+			>>> await omd.extend_async(read_pairs(stream), batch_size=1000)
+		"""
+		import asyncio
+
+		if batch_size < 1:
+			raise ValueError(f"batch_size must be positive, but got {batch_size}.")
+		batch: list[tuple[TK, TV]] = []
+		try:
+			async for item in aiterable:
+				batch.append(item)
+				if len(batch) >= batch_size:
+					full_batch, batch = batch, []
+					self._extend_iterable(full_batch)
+					await asyncio.sleep(0)  # lets other tasks run.
+		finally:
+			if batch:
+				self._extend_iterable(batch)
+
 	def _extend(self, iterable_or_map: Iterable[tuple[TK, TV]] | _SupportsKeysAndGetItem[TK, TV]):
-		if hasattr(iterable_or_map, 'items'):
+		if isinstance(iterable_or_map, OrderedMultiDictBase):
+			self._extend_omd(iterable_or_map)
+		elif hasattr(iterable_or_map, 'items'):
 			self._extend_iterable(iterable_or_map.items())
 		elif isinstance(iterable_or_map, _SupportsKeysAndGetItem):
 			for k in iterable_or_map.keys():
@@ -190,22 +339,161 @@ class OrderedMultiDictBase[TK: Hashable, TV, _Q: MutableSequence[tuple[int, Any]
 				s_items[index] = (k, v)  # recreate the tuple, because we are not guaranteed to get an actual pure & immutable tuple.
 				index += 1
 		finally:
+			start = self._index
 			self._index = index
+			if self._observers:
+				for i in range(start, index):
+					self._notify_add(i, *s_items[i])
+
+	def _extend_omd(self, other: OrderedMultiDictBase[TK, TV, Any]) -> None:
+		"""
+		Fast path of extend() for another OrderedMultiDict: The items of <other> are taken over with their indices
+		shifted behind our own, so the (key, value)-tuples in _items can be shared and every key is hashed only once.
+		"""
+		if not other._STORES_PAIRS:
+			self._extend_iterable(other.items())
+			return
+		if other is self:
+			other = self._new_empty()._copy_from(self)
+		o_items = other._items
+		if not o_items:
+			return
+		start = self._index
+		offset = start - next(iter(o_items))
+		s_map = self._map
+		for key, values in other._map.items():
+			s_map[key].extend([(index + offset, value) for index, value in values])
+		self._items.update(zip(map(offset.__add__, o_items), o_items.values()))
+		self._index = next(reversed(o_items)) + offset + 1
+		if self._observers:
+			for index, item in zip(map(offset.__add__, o_items), o_items.values()):
+				self._notify_add(index, *item)
 
 	def _copy_from(self, others: OrderedMultiDictBase[TK, TV, Any]) -> Self:
+		if not others._STORES_PAIRS:
+			self.clear()
+			self._extend_iterable(others.items())
+			return self
 		self._items = self._ItemsDictCls(others._items)
 		self._index = others._index
 		deque_cls = self._DequeCls
 		self._map = defaultdict(deque_cls, {key: deque_cls(que) for key, que in others._map.items()})
+		self._key_codes_cache = None
 		return self
 
+	def _new_empty(self) -> Self:
+		"""
+		Returns: A new empty dictionary of the same type and configuration as <self>.
+		"""
+		return type(self)()  # type: ignore
+
 	def copy(self) -> Self:
-		return type(self)()._copy_from(self)  # type: ignore
+		result = self._new_empty()._copy_from(self)
+		for observer in self._observers:
+			if (observer_copy := observer.copy_for(result)) is not None:
+				result._observers.append(observer_copy)
+		return result
+
+	def diff(self, other: OrderedMultiDictBase[TK, TV, Any]) -> OrderedMultiDictDiff[TK, TV]:
+		"""
+		Returns: The difference between this dictionary and <other>: per key, the values that were added and removed,
+		and the keys whose items were moved (see OrderedMultiDictDiff). The dictionaries are compared key by key, and keys
+		that share their list of values are skipped. <other> can be any kind of OrderedMultiDict.
+		"""
+		from ._diff import OrderedMultiDictDiff
+		return OrderedMultiDictDiff(self, other)
+
+	def patch(self, diff: OrderedMultiDictDiff[TK, TV]) -> None:
+		"""
+		Applies <diff> = a.diff(b) to this dictionary, which must be equal to a. Afterward, it is equal to b. All items
+		of changed keys are removed, and only the items from the first position where a and b differ onward are added
+		again, so this takes O(n - p + c), where p is that position and c is the number of items of changed keys.
+
+		Raises: ValueError if this dictionary does not have the size of a, or if applying <diff> results in a wrong size.
+		"""
+		from ._diff import patch
+		patch(self, diff)
 
 	def clear(self) -> None:
+		"""
+		Removes all items. The internal index is not reset, so items that are added afterwards still get larger cursors
+		than all items before (see iter_from()), and the journal and change log can tell them apart from old items.
+		"""
 		self._map.clear()
 		self._items.clear()
-		self._index = 0
+		# _index is not reset, which also means that (_index, len(_items)) never repeats (see _get_key_grouping()).
+		for observer in self._observers:
+			observer.on_clear()
+
+	def _iter_indexed_items(self) -> Iterator[tuple[int, TK, TV]]:
+		"""
+		Returns: An iterator over all (index, key, value) triples in insertion order.
+		"""
+		return ((index, item[0], item[1]) for index, item in self._items.items())
+
+	def _notify_add(self, index: int, key: TK, value: TV) -> None:
+		for observer in self._observers:
+			observer.on_add(index, key, value)
+
+	def _notify_remove(self, index: int, key: TK, value: TV) -> None:
+		for observer in self._observers:
+			observer.on_remove(index, key, value)
+
+	def _notify_replace(self, index: int, key: TK, old_value: TV, value: TV) -> None:
+		for observer in self._observers:
+			observer.on_replace(index, key, old_value, value)
+
+	def _key_at(self, index: int) -> TK:
+		return self._items[index][0]
+
+	def _remove_at(self, index: int) -> None:
+		"""
+		Removes the item with the internal <index>. Takes O(log m) to find it among the m values of its key.
+
+		Raises: KeyError if there is no item with <index>.
+		"""
+		key = self._key_at(index)
+		values = self._map[key]
+		# the (index, value)-pairs of each key are sorted by index:
+		pos = bisect_left(values, index, key=itemgetter(0))
+		value = values[pos][1]
+		del values[pos]
+		del self._items[index]
+		if not values:
+			del self._map[key]
+		if self._observers:
+			self._notify_remove(index, key, value)
+
+	def _restore_indices(self, indices: Sequence[int], next_index: int) -> None:
+		"""
+		Gives the items the internal <indices> (in insertion order), that they had before the dictionary was
+		serialized. Only valid right after unpickling, while the indices are 0 ... n-1.
+		"""
+		assert not self._items or next(reversed(self._items)) == len(self._items) - 1
+		for values in self._map.values():
+			restored = [(indices[index], value) for index, value in values]
+			values.clear()
+			values.extend(restored)
+		self._items = self._ItemsDictCls(zip(indices, self._items.values()))
+		self._index = max(next_index, indices[-1] + 1) if indices else next_index
+		self._key_codes_cache = None
+		for observer in self._observers:
+			observer.on_reindex(indices)
+
+	def _replace_at(self, index: int, value: TV) -> None:
+		"""
+		Replaces the value of the item with the internal <index> in place, like replaceall() does.
+
+		Raises: KeyError if there is no item with <index>.
+		"""
+		key = self._key_at(index)
+		values = self._map[key]
+		pos = bisect_left(values, index, key=itemgetter(0))
+		old_value = values[pos][1]
+		values[pos] = (index, value)
+		self._items[index] = (key, value)
+		if self._observers:
+			self._notify_replace(index, key, old_value, value)
 
 	def _get_all_or_none(self, key: TK) -> _Q | None:
 		result = self._map.get(key)
@@ -307,6 +595,65 @@ class OrderedMultiDictBase[TK: Hashable, TV, _Q: MutableSequence[tuple[int, Any]
 		self._try_delete_all(key)
 		self.addall(key, value_list)
 
+	def replace(self, key: TK, value: TV) -> None:
+		"""
+		Like omd[key] = value, but <value> takes the place of the first value of <key> instead of being added at the end.
+		All other values of <key> are removed. If <key> is not in the dictionary, <value> is added at the end.
+
+		Example:
+			>>> omd = OrderedMultiDict([(1, 1), (2, 2), (1, 11)])
+			>>> omd.replace(1, 'one')  # list(omd.items()) == [(1, 'one'), (2, 2)]
+		"""
+		self.replaceall(key, [value])
+
+	def replaceall(self, key: TK, value_list: list[TV]) -> None:
+		"""
+		Like setall(), but keeps the positions of the values of <key>: The n-th value in <value_list> takes the place of
+		the n-th value of <key>. Surplus values are added at the end. If <value_list> is shorter than the list of values
+		of <key>, the remaining values of <key> are removed.
+
+		Example:
+			>>> omd = OrderedMultiDict([(1, 1), (2, 2), (1, 11)])
+			>>> omd.replaceall(1, ['a', 'b', 'c'])  # list(omd.items()) == [(1, 'a'), (2, 2), (1, 'b'), (1, 'c')]
+			>>> omd.replaceall(1, ['x'])            # list(omd.items()) == [(1, 'x'), (2, 2)]
+		"""
+		if (values := self._get_all_or_none(key)) is None:  # if key not in self:
+			self.addall(key, value_list)
+			return
+		items = self._items
+		observers = self._observers
+		count = min(len(values), len(value_list))
+		for i in range(count):
+			index, old_value = values[i]
+			value = value_list[i]
+			values[i] = (index, value)
+			items[index] = (key, value)
+			if observers:
+				self._notify_replace(index, key, old_value, value)
+		if len(value_list) > count:
+			self.addall(key, value_list[count:])
+		elif len(values) > count:
+			removed = [values.pop() for _ in range(len(values) - count)]
+			for index, _ in removed:
+				del items[index]
+			if not values:
+				del self._map[key]
+			if observers:
+				for index, value in reversed(removed):
+					self._notify_remove(index, key, value)
+
+	def move_to_end(self, key: TK) -> None:
+		"""
+		Move all values of <key> to the end, keeping their order. Takes O(m), where m is the number of values of <key>.
+
+		Example:
+			>>> omd = OrderedMultiDict([(1, 1), (2, 2), (1, 11), (3, 3)])
+			>>> omd.move_to_end(1)  # list(omd.items()) == [(2, 2), (3, 3), (1, 1), (1, 11)]
+
+		Raises: KeyError if <key> is not in the dictionary.
+		"""
+		self.addall(key, self.popall(key))
+
 	def add(self, key: TK, value: TV) -> None:
 		"""
 		Add <value> to the list of values for <key>. If <key> is not in the
@@ -327,6 +674,8 @@ class OrderedMultiDictBase[TK: Hashable, TV, _Q: MutableSequence[tuple[int, Any]
 		# entry in _map is created here if necessary, because _map is a defaultdict:
 		self._map[key].append((index, value))
 		self._items[index] = (key, value)
+		if self._observers:
+			self._notify_add(index, key, value)
 
 	def addall(self, key: TK, value_list: list[TV]) -> None:
 		"""
@@ -352,6 +701,9 @@ class OrderedMultiDictBase[TK: Hashable, TV, _Q: MutableSequence[tuple[int, Any]
 		for value in value_list:
 			items[index] = (key, value)
 			index += 1
+		if self._observers:
+			for index, value in enumerate(value_list, self._index - len(value_list)):
+				self._notify_add(index, key, value)
 
 	@overload
 	def popall(self, key: TK, /) -> Union[list[TV]]:
@@ -419,6 +771,9 @@ class OrderedMultiDictBase[TK: Hashable, TV, _Q: MutableSequence[tuple[int, Any]
 				result.append(val[1])
 				del self._items[val[0]]
 			del self._map[key]
+			if self._observers:
+				for val in values:
+					self._notify_remove(val[0], key, val[1])
 			return result
 		elif default is not _SENTINEL:
 			return default
@@ -450,9 +805,76 @@ class OrderedMultiDictBase[TK: Hashable, TV, _Q: MutableSequence[tuple[int, Any]
 	def poplastitem[TT](self, *, default: TT = _SENTINEL) -> tuple[TK, TV] | TT:  # type: ignore
 		return self._popitem(default, last=True)
 
+	def popfirstitems(self, count: int, out: list[tuple[TK, TV]] | None = None) -> list[tuple[TK, TV]]:
+		"""
+		Removes the first <count> items (or all items, if there are fewer) at once. This is much faster than calling
+		popfirstitem() <count> times, because the values of each key are removed together.
+
+		Returns: The removed items in insertion order, appended to <out> if it is given.
+
+		Example:
+			>>> omd = OrderedMultiDict([(1, 1), (2, 2), (1, 11), (3, 3)])
+			>>> omd.popfirstitems(3)  # [(1, 1), (2, 2), (1, 11)]
+			>>> print(omd.items())    # _ItemsView([(3, 3)])
+		"""
+		return self._popitems(count, [] if out is None else out, last=False)
+
+	def poplastitems(self, count: int, out: list[tuple[TK, TV]] | None = None) -> list[tuple[TK, TV]]:
+		"""
+		Removes the last <count> items (or all items, if there are fewer) at once, see popfirstitems().
+
+		Returns: The removed items in the order in which poplastitem() would return them (the last item first), appended
+		to <out> if it is given.
+
+		Example:
+			>>> omd = OrderedMultiDict([(1, 1), (2, 2), (1, 11), (3, 3)])
+			>>> omd.poplastitems(2)  # [(3, 3), (1, 11)]
+		"""
+		return self._popitems(count, [] if out is None else out, last=True)
+
+	def drain_until(self, predicate: Callable[[TK, TV], bool], out: list[tuple[TK, TV]] | None = None) -> list[tuple[TK, TV]]:
+		"""
+		Removes items from the front until predicate(key, value) is True for the first remaining item, or the dictionary
+		is empty. The items are removed at once, see popfirstitems().
+
+		Returns: The removed items in insertion order, appended to <out> if it is given.
+
+		Example:
+			>>> omd = OrderedMultiDict([('a', 1), ('b', 2), ('a', 11), ('c', 3)])
+			>>> omd.drain_until(lambda k, v: v > 10)  # [('a', 1), ('b', 2)]
+			>>> print(omd.items())                    # _ItemsView([('a', 11), ('c', 3)])
+		"""
+		count = 0
+		for key, value in self.items():
+			if predicate(key, value):
+				break
+			count += 1
+		return self._popitems(count, [] if out is None else out, last=False)
+
+	def _popitems(self, count: int, out: list[tuple[TK, TV]], *, last: bool) -> list[tuple[TK, TV]]:
+		"""
+		Implementation of popfirstitems() and poplastitems(). The removed values of each key are the first (or the last)
+		values of that key, so each list of values is only shortened once. The observers are notified afterward, see
+		_MutationObserver.
+		"""
+		count = min(count, len(self._items))
+		if count <= 0:
+			return out
+		if last:
+			pop = self._items.popitem
+			run = [pop() for _ in range(count)]
+		else:
+			run = self._items_pop_firsts(count)
+		self._shorten_values(Counter(map(itemgetter(0), map(itemgetter(1), run))), last=last)
+		out.extend(map(itemgetter(1), run))
+		if self._observers:
+			for index, item in run:
+				self._notify_remove(index, *item)
+		return out
+
 	def _popitem[TT](self, default: TT, *, last: bool) -> tuple[TK, TV] | TT:
 		try:
-			item = (_pop_last(self._items) if last else self._items_pop_first(self._items))[1]
+			index, item = _pop_last(self._items) if last else self._items_pop_first(self._items)
 		except (StopIteration, KeyError):
 			if default is not _SENTINEL:
 				return default
@@ -465,6 +887,8 @@ class OrderedMultiDictBase[TK: Hashable, TV, _Q: MutableSequence[tuple[int, Any]
 		if not values:
 			del self._map[item[0]]
 		assert popped[1] is item[1], _DESYNCED_ERROR_MSG
+		if self._observers:
+			self._notify_remove(index, *item)
 		return item
 
 	@overload
@@ -522,6 +946,8 @@ class OrderedMultiDictBase[TK: Hashable, TV, _Q: MutableSequence[tuple[int, Any]
 			del self._items[popped[0]]
 			if not values:
 				del self._map[key]
+			if self._observers:
+				self._notify_remove(popped[0], key, popped[1])
 			return popped[1]
 		elif default is not _SENTINEL:
 			return default
@@ -549,6 +975,9 @@ class OrderedMultiDictBase[TK: Hashable, TV, _Q: MutableSequence[tuple[int, Any]
 			for val in values:
 				del self._items[val[0]]
 			del self._map[key]
+			if self._observers:
+				for val in values:
+					self._notify_remove(val[0], key, val[1])
 			return True
 		else:
 			return False
@@ -607,13 +1036,464 @@ class OrderedMultiDictBase[TK: Hashable, TV, _Q: MutableSequence[tuple[int, Any]
 		# the same implementation as in _ValuesView.__contains__()
 		return value in _iter_values(self._items.values())
 
+	def _get_key_grouping(self) -> _KeyGrouping[TK]:
+		# (_index, len(_items)) changes with every add or removal, so it can be used to validate the cache.
+		token = (self._index, len(self._items))
+		if (cache := self._key_codes_cache) is not None and cache[0] == token:
+			return cache[1]
+		np = _import_numpy()
+		codes: dict[TK, int] = {}
+		setdefault = codes.setdefault
+		key_codes = np.fromiter((setdefault(k, len(codes)) for k in self.keys()), dtype=np.intp, count=len(self._items))
+		grouping = _KeyGrouping(np, key_codes, list(codes))
+		self._key_codes_cache = (token, grouping)
+		return grouping
+
+	def _values_array(self, dtype: np.typing.DTypeLike = None) -> np.ndarray:
+		np = _import_numpy()
+		if dtype is None:
+			return np.array(list(self.values()))
+		return np.fromiter(self.values(), dtype=dtype, count=len(self._items))
+
+	def to_arrays(self, dtype: np.typing.DTypeLike = None) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+		"""
+		Exports all items as three numpy arrays in insertion order: the key codes, the values and the insertion indices.
+		The key code of an item is the position of its key in unique_keys(). Requires numpy.
+
+		Example:
+			>>> omd = OrderedMultiDict([('a', 1), ('b', 2), ('a', 11)])
+			>>> key_codes, values, indices = omd.to_arrays()  # array([0, 1, 0]), array([1, 2, 11]), array([0, 1, 2])
+		"""
+		np = _import_numpy()
+		grouping = self._get_key_grouping()
+		indices = np.fromiter(self._items.keys(), dtype=np.int64, count=len(self._items))
+		return grouping.key_codes.copy(), self._values_array(dtype), indices
+
+	@classmethod
+	def from_arrays(cls, key_codes: np.typing.ArrayLike, values: np.typing.ArrayLike, keys: Sequence[TK], **kwargs: Any) -> Self:
+		"""
+		The reverse of to_arrays(): Creates a new dictionary with the items (keys[key_codes[i]], values[i]). Requires numpy.
+		<kwargs> are passed to the constructor of <cls>, e.g. key_range for a DenseIntOrderedMultiDict.
+
+		Example:
+			>>> omd = OrderedMultiDict([('a', 1), ('b', 2), ('a', 11)])
+			>>> key_codes, values, _ = omd.to_arrays()
+			>>> OrderedMultiDict.from_arrays(key_codes, values, list(omd.unique_keys())) == omd  # True
+		"""
+		np = _import_numpy()
+		codes_list = np.asarray(key_codes).tolist()
+		values_list = np.asarray(values).tolist()
+		if len(codes_list) != len(values_list):
+			raise ValueError(f"key_codes and values must have the same length, but got {len(codes_list)} and {len(values_list)}.")
+		result = cls(**kwargs)
+		result._extend_iterable(zip(map(list(keys).__getitem__, codes_list), values_list))
+		return result
+
+	def reduce_by_key(self, ufunc: np.ufunc, dtype: np.typing.DTypeLike = None) -> dict[TK, Any]:
+		"""
+		Reduces all values of each key with the binary numpy <ufunc> (e.g. numpy.add, numpy.maximum). Requires numpy.
+
+		Returns: A dict of key: reduced value, in order of first appearance of the keys.
+
+		Example:
+			>>> omd = OrderedMultiDict([('a', 1), ('b', 2), ('a', 11)])
+			>>> omd.reduce_by_key(numpy.maximum)  # {'a': 11, 'b': 2}
+		"""
+		grouping = self._get_key_grouping()
+		if not grouping.keys:
+			return {}
+		values = self._values_array(dtype)
+		return dict(zip(grouping.keys, ufunc.reduceat(values[grouping.order], grouping.starts).tolist()))
+
+	def sum_by_key(self, dtype: np.typing.DTypeLike = None) -> dict[TK, Any]:
+		"""
+		Returns: A dict of key: sum of all its values, in order of first appearance of the keys. Requires numpy.
+		"""
+		grouping = self._get_key_grouping()
+		values = self._values_array(dtype)
+		if values.dtype.kind == 'f':
+			# np.bincount() does not need to sort, but it always sums up as float64.
+			sums = grouping.np.bincount(grouping.key_codes, weights=values, minlength=len(grouping.keys))
+			return dict(zip(grouping.keys, sums.astype(values.dtype, copy=False).tolist()))
+		return self.reduce_by_key(grouping.np.add, dtype)
+
+	def mean_by_key(self) -> dict[TK, float]:
+		"""
+		Returns: A dict of key: mean of all its values, in order of first appearance of the keys. Requires numpy.
+		"""
+		grouping = self._get_key_grouping()
+		if not grouping.keys:
+			return {}
+		sums = grouping.np.bincount(grouping.key_codes, weights=self._values_array(), minlength=len(grouping.keys))
+		return dict(zip(grouping.keys, (sums / grouping.counts).tolist()))
+
+	def count_by_key(self) -> dict[TK, int]:
+		"""
+		Returns: A dict of key: number of values for that key, in order of first appearance of the keys. Requires numpy.
+		"""
+		grouping = self._get_key_grouping()
+		return dict(zip(grouping.keys, grouping.counts.tolist()))
+
+	def _find_observer[TO: _MutationObserver](self, observer_cls: type[TO]) -> TO | None:
+		return next((observer for observer in self._observers if type(observer) is observer_cls), None)
+
+	def create_sorted_key_index(self) -> None:
+		"""
+		Creates an index of all unique keys in sorted order, that is kept up to date with every modification. It makes
+		.irange(), .items_in_range() and .keys_with_prefix() O(log u + k) instead of O(u*log(u) + k), at the cost of
+		O(log u) for every added or removed item (u = number of unique keys). All keys must be comparable with each other.
+		Does nothing if the index already exists.
+		"""
+		if self._find_observer(_SortedKeyIndex) is None:
+			self._observers.append(_SortedKeyIndex(self))
+
+	def drop_sorted_key_index(self) -> None:
+		"""
+		Removes the index created by .create_sorted_key_index(). Does nothing if there is no such index.
+		"""
+		if (index := self._find_observer(_SortedKeyIndex)) is not None:
+			self._observers.remove(index)
+
+	def _sorted_unique_keys(self) -> list[TK]:
+		if (index := self._find_observer(_SortedKeyIndex)) is not None:
+			return index.keys
+		return sorted(self._map)
+
+	def irange(self, lo: TK | None = None, hi: TK | None = None, *, inclusive: tuple[bool, bool] = (True, True)) -> list[TK]:
+		"""
+		Returns: All unique keys between <lo> and <hi> in sorted order. A bound that is None is ignored. <inclusive>
+		determines whether <lo> and <hi> themselves are included.
+
+		Example:
+			>>> omd = OrderedMultiDict([('b', 2), ('d', 4), ('a', 1), ('c', 3), ('b', 22)])
+			>>> omd.irange('b', 'c')                            # ['b', 'c']
+			>>> omd.irange('b', 'c', inclusive=(False, True))   # ['c']
+		"""
+		keys = self._sorted_unique_keys()
+		start = 0 if lo is None else (bisect_left if inclusive[0] else bisect_right)(keys, lo)
+		end = len(keys) if hi is None else (bisect_right if inclusive[1] else bisect_left)(keys, hi)
+		return keys[start:end]
+
+	def items_in_range(self, lo: TK | None = None, hi: TK | None = None, *, inclusive: tuple[bool, bool] = (True, True), key_order: bool = False) -> list[tuple[TK, TV]]:
+		"""
+		Returns: All (key, value) pairs whose key is in .irange(<lo>, <hi>, inclusive=<inclusive>). The pairs are in
+		insertion order, or sorted by key if <key_order> is True.
+
+		Example:
+			>>> omd = OrderedMultiDict([('b', 2), ('d', 4), ('a', 1), ('c', 3), ('b', 22)])
+			>>> omd.items_in_range('b', 'c')                  # [('b', 2), ('c', 3), ('b', 22)]
+			>>> omd.items_in_range('b', 'c', key_order=True)  # [('b', 2), ('b', 22), ('c', 3)]
+		"""
+		keys = self.irange(lo, hi, inclusive=inclusive)
+		s_map = self._map
+		if key_order:
+			return [(key, val[1]) for key in keys for val in s_map[key]]
+		# the (index, value)-pairs of each key are sorted by index, so we can merge them back into insertion order:
+		per_key = [[(val[0], key, val[1]) for val in s_map[key]] for key in keys]
+		return [(entry[1], entry[2]) for entry in merge(*per_key, key=itemgetter(0))]
+
+	def keys_with_prefix(self, prefix: str | bytes) -> list[TK]:
+		"""
+		Returns: All unique str (or bytes) keys that start with <prefix> in sorted order.
+
+		Example:
+			>>> omd = OrderedMultiDict([('X-Id', 1), ('Host', 2), ('X-Tag', 3)])
+			>>> omd.keys_with_prefix('X-')  # ['X-Id', 'X-Tag']
+		"""
+		keys = self._sorted_unique_keys()
+		start = end = bisect_left(keys, prefix)  # type: ignore
+		while end < len(keys) and keys[end].startswith(prefix):  # type: ignore
+			end += 1
+		return keys[start:end]
+
+	def create_cursor_index(self) -> None:
+		"""
+		Creates an index of the internal indices of all items (see .iter_from()), that is kept up to date with every
+		modification. It makes .iter_from() O(log n + k) instead of O(min(p, n - p) + k), at the cost of O(1) amortized
+		for every added or removed item. Does nothing if the index already exists.
+		"""
+		if self._find_observer(_CursorIndex) is None:
+			self._observers.append(_CursorIndex(self, list(self._items)))
+
+	def drop_cursor_index(self) -> None:
+		"""
+		Removes the index created by .create_cursor_index(). Does nothing if there is no such index.
+		"""
+		if (index := self._find_observer(_CursorIndex)) is not None:
+			self._observers.remove(index)
+
+	def last_cursor(self) -> int:
+		"""
+		Returns: A cursor behind all items of the dictionary, so that .iter_from(omd.last_cursor()) only returns items
+		that are added later. A cursor before all items is -1.
+		"""
+		return self._index - 1
+
+	def iter_from(self, cursor: int, limit: int | None = None) -> Iterator[tuple[int, TK, TV]]:
+		"""
+		Returns: An iterator over the (cursor, key, value) triples of the (at most <limit>) items after <cursor>, in
+		insertion order. The cursor of an item is its internal index, which never changes, and which is larger than the
+		cursors of all items that were added before it. So a consumer can resume with the cursor of the last item it has
+		seen, no matter how many items have been removed in the meantime. Items that are moved by move_to_end() get new
+		cursors, and show up again. Values replaced by replaceall() keep their cursor.
+
+		Example:
+			>>> omd = OrderedMultiDict([('a', 1), ('b', 2), ('a', 11)])
+			>>> page = list(omd.iter_from(-1, limit=2))   # [(0, 'a', 1), (1, 'b', 2)]
+			>>> omd.popfirstitem()
+			>>> omd.add('c', 3)
+			>>> list(omd.iter_from(page[-1][0]))          # [(2, 'a', 11), (3, 'c', 3)]
+
+		Takes O(min(p, n - p) + k), where p is the position of <cursor>, or O(log n + k) with create_cursor_index().
+		The dictionary must not be modified while the iterator is in use.
+		"""
+		if (index := self._find_observer(_CursorIndex)) is not None:
+			indices = index.iter_from(cursor)
+		else:
+			indices = self._iter_indices_from(cursor)
+		if limit is not None:
+			indices = islice(indices, limit)
+		item_at = self._item_at
+		return ((i, *item_at(i)) for i in indices)
+
+	def _iter_indices_from(self, cursor: int) -> Iterator[int]:
+		items = self._items
+		if not items or cursor >= (last := next(reversed(items))):
+			return iter(())
+		if cursor < (first := next(iter(items))):
+			return iter(items)
+		if cursor - first > last - cursor:
+			# the cursor is closer to the end (e.g. when tailing the dictionary), so we search from there:
+			tail = list(takewhile(lambda i: i > cursor, reversed(items)))
+			tail.reverse()
+			return iter(tail)
+		return dropwhile(lambda i: i <= cursor, items)
+
+	def _item_at(self, index: int) -> tuple[TK, TV]:
+		return self._items[index]
+
+	def enable_fingerprint(self) -> None:
+		"""
+		Starts maintaining the fingerprint of the dictionary (see .fingerprint()) incrementally. Afterward, adding an item,
+		and removing the first or the last item takes O(1), and .fingerprint() takes O(1) as well. Other removals and
+		in-place replacements invalidate the fingerprint, which is then recomputed by the next call of .fingerprint().
+		`==` returns False right away if both dictionaries maintain a fingerprint and their fingerprints differ.
+		Does nothing if the fingerprint is already maintained.
+
+		Raises: TypeError if a key or value is unhashable.
+		"""
+		if self._find_observer(_Fingerprint) is None:
+			fingerprint = _Fingerprint(self)
+			fingerprint.get()
+			self._observers.append(fingerprint)
+
+	def disable_fingerprint(self) -> None:
+		"""
+		Stops maintaining the fingerprint started by .enable_fingerprint(). Does nothing if it isn't maintained.
+		"""
+		if (fingerprint := self._find_observer(_Fingerprint)) is not None:
+			self._observers.remove(fingerprint)
+
+	def fingerprint(self) -> int:
+		"""
+		Returns: A hash of all (key, value) pairs and their positions. Equal dictionaries have equal fingerprints, and
+		dictionaries that only differ in the order of their items almost certainly have different ones. Takes O(n),
+		or O(1) with .enable_fingerprint().
+
+		Like hash(), the fingerprint of str and bytes keys and values changes between processes, unless PYTHONHASHSEED is
+		set.
+
+		Raises: TypeError if a key or value is unhashable.
+		"""
+		if (fingerprint := self._find_observer(_Fingerprint)) is not None:
+			return fingerprint.get()
+		return _Fingerprint.compute(self.items())[0]
+
+	def _get_value_index(self, name: str) -> _ValueIndex[TK, TV] | None:
+		return next((observer for observer in self._observers if type(observer) is _ValueIndex and observer.name == name), None)
+
+	def create_index(self, name: str, func: Callable[[TV], Hashable]) -> None:
+		"""
+		Creates a secondary index called <name> over the values, that is kept up to date with every modification.
+		.lookup(<name>, x) then returns all items whose value v satisfies func(v) == x in O(k). <func> must return
+		hashable results and must not raise. Building the index is O(n), keeping it up to date is O(1) per item.
+
+		Example:
+			>>> omd = OrderedMultiDict([('a', (1, 'x')), ('b', (2, 'y')), ('a', (3, 'x'))])
+			>>> omd.create_index('second', lambda v: v[1])
+			>>> omd.lookup('second', 'x')  # [('a', (1, 'x')), ('a', (3, 'x'))]
+
+		Raises: ValueError if an index called <name> already exists.
+		"""
+		if self._get_value_index(name) is not None:
+			raise ValueError(f"an index called {name!r} already exists.")
+		self._observers.append(_ValueIndex(name, func, self._iter_indexed_items()))
+
+	def drop_index(self, name: str) -> None:
+		"""
+		Removes the index created by .create_index(<name>, ...).
+
+		Raises: KeyError if there is no index called <name>.
+		"""
+		if (index := self._get_value_index(name)) is None:
+			raise KeyError(name)
+		self._observers.remove(index)
+
+	def lookup(self, name: str, indexed_value: Hashable) -> list[tuple[TK, TV]]:
+		"""
+		Returns: All (key, value) pairs in insertion order, for which func(value) == <indexed_value>, where func is
+		the function of the index called <name>. See .create_index().
+
+		Raises: KeyError if there is no index called <name>.
+		"""
+		if (index := self._get_value_index(name)) is None:
+			raise KeyError(name)
+		return index.lookup(indexed_value)
+
+	@classmethod
+	def concat(cls, *omds: OrderedMultiDictBase[TK, TV, Any], **kwargs: Any) -> Self:
+		"""
+		Returns: A new dictionary with all items of <omds>, in order. The result is created with the constructor
+		arguments <kwargs>, if given. Otherwise, if the first of <omds> is an instance of <cls>, the result has the same
+		configuration as the first one.
+
+		This is faster than extending a dictionary with each of <omds>, because the items are taken over without
+		rebuilding their tuples, and every key is hashed only once per dictionary.
+
+		Example:
+			>>> omd = OrderedMultiDict.concat(OrderedMultiDict([(1, 1), (2, 2)]), OrderedMultiDict([(1, 11)]))
+			>>> print(omd.items())  # _ItemsView([(1, 1), (2, 2), (1, 11)])
+		"""
+		result = cls._new_for(omds, kwargs)
+		for omd in omds:
+			result._extend_omd(omd)
+		return result
+
+	@classmethod
+	def merge_many(cls, omds: Iterable[OrderedMultiDictBase[TK, TV, Any]], *, key: Callable[[tuple[TK, TV]], Any] | None = None, **kwargs: Any) -> Self:
+		"""
+		k-way merge of <omds>, whose items each must already be sorted by <key>. <key> is called with a (key, value)-pair
+		and defaults to the key of the pair. Items that compare equal keep the order of <omds>. Takes O(n log k).
+		The result is configured like in concat().
+
+		Example:
+			>>> omd = OrderedMultiDict.merge_many([OrderedMultiDict([(1, 'a'), (3, 'c')]), OrderedMultiDict([(2, 'b'), (3, 'cc')])])
+			>>> print(omd.items())  # _ItemsView([(1, 'a'), (2, 'b'), (3, 'c'), (3, 'cc')])
+		"""
+		omds = list(omds)
+		result = cls._new_for(omds, kwargs)
+		result._extend_iterable(merge(*(omd.items() for omd in omds), key=key or itemgetter(0)))
+		return result
+
+	@classmethod
+	async def from_async(cls, aiterable: AsyncIterable[tuple[TK, TV]], /, *, batch_size: int = 10_000, **kwargs: Any) -> Self:
+		"""
+		Returns: A new dictionary with all items of the async iterable <aiterable>, see extend_async(). <kwargs> are passed
+		to the constructor of <cls>.
+		"""
+		result = cls(**kwargs)
+		await result.extend_async(aiterable, batch_size=batch_size)
+		return result
+
+	@classmethod
+	def from_delimited(
+			cls,
+			path: str | PathLike[str],
+			*,
+			sep: str = '\t',
+			key_col: int = 0,
+			value_col: int = 1,
+			convert: Callable[[str], TV] | None = None,
+			skip_header: bool = False,
+			intern_keys: bool = False,
+			encoding: str = 'utf-8',
+			chunk_size: int = 1 << 26,
+			**kwargs: Any,
+	) -> Self:
+		"""
+		Returns: A new dictionary with one item per line of the delimited text file (e.g. a TSV file) at <path>. The key
+		is the column <key_col> and the value is the column <value_col>, converted with <convert> if it is given.
+		Columns are separated by <sep>, and counted from 0. No quoting is supported (unlike in the csv module).
+		<kwargs> are passed to the constructor of <cls>, e.g. value_type for a TypedOrderedMultiDict.
+
+		The file is memory-mapped and read in chunks of about <chunk_size> bytes. Every chunk is decoded at once, and
+		the columns after the last needed one are not split. If <intern_keys> is True, all equal keys share a single
+		object, which saves a lot of memory if keys repeat.
+
+		Example:
+			>>> omd = OrderedMultiDict.from_delimited('scores.tsv', value_col=2, convert=float, skip_header=True)
+
+		Raises: ValueError if a line has too few columns.
+		"""
+		from ._loaders import load_delimited
+		result = cls(**kwargs)
+		load_delimited(
+			result, path, sep=sep, key_col=key_col, value_col=value_col, convert=convert, skip_header=skip_header,
+			intern_keys=intern_keys, encoding=encoding, chunk_size=chunk_size,
+		)
+		return result
+
+	@classmethod
+	def from_jsonl(
+			cls,
+			path: str | PathLike[str],
+			*,
+			key_field: str | int = 'key',
+			value_field: str | int = 'value',
+			intern_keys: bool = False,
+			encoding: str = 'utf-8',
+			chunk_size: int = 1 << 26,
+			**kwargs: Any,
+	) -> Self:
+		"""
+		Returns: A new dictionary with one item per line of the JSON Lines file at <path>. Every line is a JSON object
+		with the key in the field <key_field> and the value in the field <value_field>, or a JSON array with the key and
+		the value at these positions. Blank lines are skipped.
+		The file is memory-mapped and read in chunks of about <chunk_size> bytes, see from_delimited(), which also
+		explains <intern_keys> and <kwargs>.
+
+		Example:
+			>>> omd = OrderedMultiDict.from_jsonl('events.jsonl', key_field='user', value_field='event')
+
+		Raises: ValueError if a line is not valid JSON, or lacks one of the fields.
+		"""
+		from ._loaders import load_jsonl
+		result = cls(**kwargs)
+		load_jsonl(
+			result, path, key_field=key_field, value_field=value_field, intern_keys=intern_keys, encoding=encoding,
+			chunk_size=chunk_size,
+		)
+		return result
+
+	@classmethod
+	def _new_for(cls, omds: Sequence[OrderedMultiDictBase[TK, TV, Any]], kwargs: dict[str, Any]) -> Self:
+		if not kwargs and omds and type(omds[0]) is cls:
+			return omds[0]._new_empty()  # type: ignore
+		return cls(**kwargs)
+
+	def __add__(self, other: OrderedMultiDictBase[TK, TV, Any]) -> Self:
+		if not isinstance(other, OrderedMultiDictBase):
+			return NotImplemented
+		result = self._new_empty()._copy_from(self)
+		result._extend_omd(other)
+		return result
+
+	def __iadd__(self, other: Iterable[tuple[TK, TV]] | _SupportsKeysAndGetItem[TK, TV]) -> Self:
+		self._extend(other)
+		return self
+
 	def __eq__(self, other) -> bool:
 		if type(self) is not type(other):
 			return NotImplemented
 		other: OrderedMultiDictBase  # type: ignore
 		if len(self) != len(other):
 			return False
-		return all(map(eq, self._items.values(), other._items.values()))
+		if self._observers and other._observers:
+			fingerprint = self._find_observer(_Fingerprint)
+			other_fingerprint = other._find_observer(_Fingerprint)
+			if fingerprint is not None and other_fingerprint is not None and not fingerprint.dirty and not other_fingerprint.dirty and fingerprint.value != other_fingerprint.value:
+				return False
+		return all(map(eq, self.items(), other.items()))
 
 	def __ne__(self, other) -> bool:
 		return not self.__eq__(other)
@@ -642,16 +1522,571 @@ class OrderedMultiDictBase[TK: Hashable, TV, _Q: MutableSequence[tuple[int, Any]
 		return bool(self._map)
 
 	def __str__(self) -> str:
-		return '{%s}' % ', '.join(f'{p[0]!r}: {p[1]!r}' for p in self._items.values())
+		return '{%s}' % ', '.join(f'{p[0]!r}: {p[1]!r}' for p in self.items())
 
 	def __repr__(self) -> str:
-		return f'{self.__class__.__name__}({list(self._items.values())!r})'
+		return f'{self.__class__.__name__}({list(self.items())!r})'
+
+	def _constructor_kwargs(self) -> dict[str, Any]:
+		"""
+		Returns: The keyword arguments needed to create a new empty dictionary with the same configuration as <self>.
+		"""
+		return {}
+
+	def _pack(self) -> tuple[list[TK], array | None, Any]:
+		"""
+		Returns: The compact form of <self>: A table of the unique keys, an array with the position of each item's key in
+		that table, and the values of all items. If all keys are unique, the key table is in item order and the array is
+		None. Used by __reduce_ex__().
+		"""
+		if len(self._map) == len(self._items):
+			return list(self.keys()), None, list(self.values())
+		keys = list(self._map)
+		codes = dict(zip(keys, range(len(keys))))
+		key_codes = array(_key_code_typecode(len(keys)), map(codes.__getitem__, self.keys()))
+		return keys, key_codes, list(self.values())
+
+	def _load_packed(self, keys: list[TK], key_codes: array | None, values: Sequence[TV]) -> None:
+		"""
+		Inverse of _pack(). <self> must be empty.
+		"""
+		if key_codes is None:
+			deque_cls = self._DequeCls
+			self._items = self._ItemsDictCls(zip(range(len(keys)), zip(keys, values)))
+			self._map = defaultdict(deque_cls, zip(keys, (deque_cls(((index, value),)) for index, value in enumerate(values))))
+			self._index = len(keys)
+			return
+		count = len(key_codes)
+		self._items = self._ItemsDictCls(zip(range(count), zip(map(keys.__getitem__, key_codes), values)))
+		deque_cls = self._DequeCls
+		per_key = [deque_cls() for _ in keys]
+		appends = [values_of_key.append for values_of_key in per_key]
+		for index, code, value in zip(range(count), key_codes, values):
+			appends[code]((index, value))
+		self._map = defaultdict(deque_cls, zip(keys, per_key))
+		self._index = count
+
+	def __reduce_ex__(self, protocol):
+		"""
+		Pickles the compact form of the dictionary (see _pack()): every key is pickled only once, and the key codes are
+		pickled as a single buffer (out-of-band with protocol 5, in native byte order). The indices are renumbered, and indexes (see
+		create_index() and create_sorted_key_index()) are not pickled.
+		"""
+		keys, key_codes, values = self._pack()
+		typecode = key_codes.typecode if key_codes is not None else ''
+		if protocol >= 5:
+			if key_codes is not None:
+				key_codes = pickle.PickleBuffer(key_codes)
+			if isinstance(values, array):
+				values = pickle.PickleBuffer(values)
+		return _unpack, (type(self), self._constructor_kwargs(), keys, typecode, key_codes, values)
+
+	def dumps(self, protocol: int = pickle.HIGHEST_PROTOCOL) -> bytes:
+		"""
+		Returns: The compact serialized form of the dictionary. Same as pickle.dumps(self, protocol).
+		"""
+		return pickle.dumps(self, protocol)
+
+	def seal_shared(self, *, name: str | None = None) -> SealedOrderedMultiDict[TK, TV]:
+		"""
+		Returns: A read-only copy of the dictionary in a new block of shared memory, that other processes can attach to
+		in O(1) without copying it. See SealedOrderedMultiDict.create_shared().
+		"""
+		from ._sealed import SealedOrderedMultiDict
+		return SealedOrderedMultiDict.create_shared(self, name=name)
+
+	def save_sealed(self, path: str | PathLike[str]) -> None:
+		"""
+		Writes the dictionary into the file at <path>, in a format that SealedOrderedMultiDict.open() can memory-map.
+		See SealedOrderedMultiDict.save().
+		"""
+		from ._sealed import SealedOrderedMultiDict
+		SealedOrderedMultiDict.save(self, path)
+
+	@classmethod
+	def loads(cls, data: bytes) -> Self:
+		"""
+		Inverse of dumps(). Like pickle.loads(), this must never be used with untrusted data.
+
+		Raises: TypeError if <data> is not a serialized instance of <cls>.
+		"""
+		result = pickle.loads(data)
+		if not isinstance(result, cls):
+			raise TypeError(f"expected a serialized {cls.__name__}, but got {type(result).__name__}.")
+		return result
+
+	def _get_change_log(self) -> _ChangeLog[TK, TV] | None:
+		from ._changelog import _ChangeLog
+		return self._find_observer(_ChangeLog)
+
+	def subscribe(self) -> int:
+		"""
+		Registers a replica that wants to receive the changes of this dictionary (see changes_since()), and starts
+		recording the changes if necessary. Changes are kept until every subscriber has acknowledged them.
+
+		Example:
+			>>> omd = OrderedMultiDict([('a', 1)])
+			>>> subscriber = omd.subscribe()
+			>>> replica = OrderedMultiDict()
+			>>> version = replica.apply_changes(omd.changes_since(None))  # a full copy.
+			>>> omd.add('b', 2)
+			>>> version = replica.apply_changes(omd.changes_since(version))  # only (ADD, 1, 'b', 2).
+			>>> omd.acknowledge(subscriber, version)
+
+		Returns: The id of the subscriber.
+		"""
+		if (change_log := self._get_change_log()) is None:
+			from ._changelog import _ChangeLog
+			change_log = _ChangeLog()
+			self._observers.append(change_log)
+		return change_log.subscribe()
+
+	def unsubscribe(self, subscriber: int) -> None:
+		"""
+		Removes a subscriber. Changes that only it has not acknowledged yet are dropped.
+
+		Raises: KeyError if there is no such subscriber.
+		"""
+		if (change_log := self._get_change_log()) is None:
+			raise KeyError(subscriber)
+		change_log.unsubscribe(subscriber)
+
+	def acknowledge(self, subscriber: int, version: int) -> None:
+		"""
+		Marks all changes up to <version> as received by <subscriber>. Changes that every subscriber has acknowledged
+		are dropped.
+
+		Raises: KeyError if there is no such subscriber.
+		"""
+		if (change_log := self._get_change_log()) is None:
+			raise KeyError(subscriber)
+		change_log.acknowledge(subscriber, version)
+
+	@property
+	def change_version(self) -> int:
+		"""
+		The number of changes since the first subscribe(), or 0 if there never was a subscriber.
+		"""
+		if (change_log := self._get_change_log()) is None:
+			return 0
+		return change_log.version
+
+	def changes_since(self, version: int | None) -> ChangeDelta:
+		"""
+		Returns: A delta that brings a replica from <version> to the current version (see apply_changes()). If
+		<version> is None, or if its changes have already been dropped, the delta contains the whole dictionary instead.
+		The delta is a (version, changes) tuple, that can be pickled and sent to the replica.
+		"""
+		from ._changelog import full_changes
+		change_log = self._get_change_log()
+		current = 0 if change_log is None else change_log.version
+		if version is not None and change_log is not None and (changes := change_log.changes_since(version)) is not None:
+			return current, changes
+		return current, full_changes(self._iter_indexed_items())
+
+	def apply_changes(self, delta: ChangeDelta) -> int:
+		"""
+		Applies a delta from changes_since() of another dictionary. The replica must not be modified otherwise.
+
+		Returns: The version of the other dictionary, that this replica now has.
+
+		Raises: ValueError if the replica has been modified, and is out of sync with the other dictionary.
+		"""
+		from ._changelog import apply_changes
+		version, changes = delta
+		apply_changes(self, changes)
+		return version
+
+	def _get_journal(self) -> _Journal[TK, TV] | None:
+		from ._journal import _Journal
+		return self._find_observer(_Journal)
+
+	def enable_journal(self, directory: str | PathLike[str], *, sync_every: int = 1000, snapshot_every: int | None = 1_000_000) -> None:
+		"""
+		Starts a write-ahead journal in <directory>, so that the dictionary can be restored with recover() after a
+		restart or a crash. Every added, removed or replaced item and every clear() is appended to the journal in a
+		compact binary form. The records are written and fsync'ed in groups of <sync_every> (see sync_journal()), so
+		after a crash, up to <sync_every> - 1 of the last modifications can be lost. After <snapshot_every> records, the
+		whole dictionary is written into a snapshot in its compact serialized form (see dumps()), and the journal is
+		started over. Enabling the journal writes the first snapshot.
+
+		Example:
+			>>> omd = OrderedMultiDict([('a', 1)])
+			>>> omd.enable_journal('omd-journal')
+			>>> omd.add('b', 2)
+			>>> omd.disable_journal()
+			>>> print(OrderedMultiDict.recover('omd-journal').items())  # _ItemsView([('a', 1), ('b', 2)])
+
+		Raises: ValueError if the journal is already enabled.
+		"""
+		if self._get_journal() is not None:
+			raise ValueError("the journal is already enabled.")
+		from ._journal import enable_journal
+		enable_journal(self, directory, sync_every=sync_every, snapshot_every=snapshot_every)
+
+	def sync_journal(self) -> None:
+		"""
+		Writes and fsyncs all pending records of the journal. Does nothing if the journal is not enabled.
+		"""
+		if (journal := self._get_journal()) is not None:
+			journal.sync()
+
+	def checkpoint_journal(self) -> None:
+		"""
+		Writes a snapshot of the dictionary and starts the journal over, which makes recover() faster.
 
-	def __getstate__(self) -> list[tuple[TK, TV]]:
-		return list(self._items.values())
+		Raises: ValueError if the journal is not enabled.
+		"""
+		if (journal := self._get_journal()) is None:
+			raise ValueError("the journal is not enabled.")
+		journal.checkpoint()
+
+	def disable_journal(self) -> None:
+		"""
+		Writes all pending records and closes the journal. The snapshot and the journal stay on disk, so recover() can
+		still restore the dictionary. Does nothing if the journal is not enabled.
+		"""
+		if (journal := self._get_journal()) is not None:
+			journal.close()
+			self._observers.remove(journal)
+
+	@classmethod
+	def recover(cls, directory: str | PathLike[str], *, sync_every: int = 1000, snapshot_every: int | None = 1_000_000) -> Self:
+		"""
+		Restores the dictionary from the snapshot and the journal in <directory> (see enable_journal()). The snapshot is
+		loaded, and the records in the journal are replayed. A truncated or corrupt record at the end of the journal,
+		e.g. from a crash while it was written, and everything after it is ignored. Indexes (see create_index()) are not
+		journaled and must be created again.
+		The journal stays enabled for the returned dictionary. Like pickle.loads(), this must never be used with
+		untrusted data.
+
+		Raises: TypeError if the snapshot does not contain an instance of <cls>. ValueError if <directory> doesn't contain
+		a valid snapshot.
+		"""
+		from ._journal import recover
+		result = recover(directory, sync_every=sync_every, snapshot_every=snapshot_every)
+		if not isinstance(result, cls):
+			result.disable_journal()
+			raise TypeError(f"expected a journal of a {cls.__name__}, but got {type(result).__name__}.")
+		return result
 
-	def __setstate__(self, state: list[tuple[TK, TV]]):
-		self._load(state)
+
+class _KeyGrouping[TK: Hashable]:
+	"""
+	Key codes of all items of an OrderedMultiDict and everything needed to reduce its values per key with numpy.
+	"""
+
+	def __init__(self, np: Any, key_codes: np.ndarray, keys: list[TK]):
+		self.np = np
+		self.key_codes: np.ndarray = key_codes
+		self.keys: list[TK] = keys
+		self.counts: np.ndarray = np.bincount(key_codes, minlength=len(keys))
+		# a stable sort keeps the values of each key in insertion order, so non-commutative ufuncs work as expected.
+		self.order: np.ndarray = np.argsort(key_codes, kind='stable')
+		self.starts: np.ndarray = np.concatenate(([0], np.cumsum(self.counts)[:-1])) if len(keys) else np.zeros(0, dtype=np.intp)
+
+
+class _MutationObserver[TK: Hashable, TV]:
+	"""
+	Base class for everything that needs to stay in sync with the items of an OrderedMultiDict (e.g. indexes).
+	Observers in OrderedMultiDictBase._observers are notified after every item that was added or removed.
+
+	Bulk operations (e.g. extend(), update(), setall(), popfirstitems(), drain_until()) modify the dictionary first, and
+	then notify the observers of every item, in order. So while an observer is notified, _items and _map might already
+	contain items of the same operation that it hasn't been notified about yet, and lack items whose removal it hasn't
+	been notified about yet. Observers that look at the dictionary must not assume that it matches the notification.
+	"""
+
+	def on_add(self, index: int, key: TK, value: TV) -> None:
+		pass
+
+	def on_remove(self, index: int, key: TK, value: TV) -> None:
+		pass
+
+	def on_replace(self, index: int, key: TK, old_value: TV, value: TV) -> None:
+		"""
+		Called when the value of an item is replaced in place (see replaceall()). The index of the item stays the same.
+		"""
+		self.on_remove(index, key, old_value)
+		self.on_add(index, key, value)
+
+	def on_clear(self) -> None:
+		pass
+
+	def on_reindex(self, indices: Sequence[int]) -> None:
+		"""
+		Called when the items with the internal indices 0 ... n-1 get the internal indices <indices> (see
+		OrderedMultiDictBase._restore_indices()). Observers that keep internal indices must translate them.
+		"""
+		pass
+
+	def copy_for(self, omd: OrderedMultiDictBase[TK, TV, Any]) -> _MutationObserver[TK, TV] | None:
+		"""
+		Returns: An observer for <omd>, which is a new copy of the observed dictionary, or None if the observer should
+		not be copied.
+		"""
+		return None
+
+
+class _SortedKeyIndex[TK: Hashable, TV](_MutationObserver[TK, TV]):
+	"""
+	All unique keys of an OrderedMultiDict in a sorted list. See OrderedMultiDictBase.create_sorted_key_index().
+	"""
+
+	def __init__(self, omd: OrderedMultiDictBase[TK, TV, Any], keys: list[TK] | None = None):
+		self._omd: OrderedMultiDictBase[TK, TV, Any] = omd
+		self.keys: list[TK] = sorted(omd._map) if keys is None else keys
+
+	@override
+	def on_add(self, index: int, key: TK, value: TV) -> None:
+		keys = self.keys
+		i = bisect_left(keys, key)
+		if i == len(keys) or keys[i] != key:
+			keys.insert(i, key)
+
+	@override
+	def on_remove(self, index: int, key: TK, value: TV) -> None:
+		if key not in self._omd._map:
+			keys = self.keys
+			i = bisect_left(keys, key)
+			if i < len(keys) and keys[i] == key:
+				del keys[i]
+
+	@override
+	def on_clear(self) -> None:
+		self.keys.clear()
+
+	@override
+	def copy_for(self, omd: OrderedMultiDictBase[TK, TV, Any]) -> _SortedKeyIndex[TK, TV]:
+		return _SortedKeyIndex(omd, self.keys.copy())
+
+
+class _CursorIndex[TK: Hashable, TV](_MutationObserver[TK, TV]):
+	"""
+	The internal indices of all items of an OrderedMultiDict in ascending order. See
+	OrderedMultiDictBase.create_cursor_index().
+	"""
+
+	def __init__(self, omd: OrderedMultiDictBase[TK, TV, Any], indices: list[int]):
+		self._omd: OrderedMultiDictBase[TK, TV, Any] = omd
+		# removed indices are only dropped from the list once they make up half of it, so removing is O(1) amortized:
+		self.indices: list[int] = indices
+		self.removed: int = 0
+
+	@override
+	def on_add(self, index: int, key: TK, value: TV) -> None:
+		indices = self.indices
+		if not indices or index > indices[-1]:
+			indices.append(index)
+		else:  # only happens if a removed index is still in the list.
+			insort(indices, index)
+
+	@override
+	def on_remove(self, index: int, key: TK, value: TV) -> None:
+		self.removed += 1
+		if self.removed > len(self.indices) // 2:
+			items = self._omd._items
+			self.indices = [i for i in self.indices if i in items]
+			self.removed = 0
+
+	@override
+	def on_replace(self, index: int, key: TK, old_value: TV, value: TV) -> None:
+		pass  # the index stays the same.
+
+	@override
+	def on_clear(self) -> None:
+		self.indices = []
+		self.removed = 0
+
+	@override
+	def copy_for(self, omd: OrderedMultiDictBase[TK, TV, Any]) -> _CursorIndex[TK, TV]:
+		return _CursorIndex(omd, list(omd._items))
+
+	def iter_from(self, cursor: int) -> Iterator[int]:
+		items = self._omd._items
+		indices = self.indices
+		pos = bisect_right(indices, cursor)
+		while pos < len(indices):
+			if (index := indices[pos]) in items:
+				yield index
+			pos += 1
+
+
+_FINGERPRINT_MODULUS: int = (1 << 61) - 1
+_FINGERPRINT_BASE: int = 0x1F3D5B79A2C4E687 % _FINGERPRINT_MODULUS
+_FINGERPRINT_BASE_INVERSE: int = pow(_FINGERPRINT_BASE, -1, _FINGERPRINT_MODULUS)
+
+
+class _Fingerprint[TK: Hashable, TV](_MutationObserver[TK, TV]):
+	"""
+	The polynomial hash sum(hash((key, value)) * BASE**position) mod 2**61-1 over all items of an OrderedMultiDict.
+	See OrderedMultiDictBase.enable_fingerprint().
+
+	Appending an item and removing the first or the last item update the hash in O(1). Anything else marks it as dirty,
+	and it is recomputed by get().
+	"""
+
+	def __init__(self, omd: OrderedMultiDictBase[TK, TV, Any]):
+		self._omd: OrderedMultiDictBase[TK, TV, Any] = omd
+		self.value: int = 0
+		self.length: int = 0
+		self.power: int = 1  # BASE**length
+		# the internal indices of the first and the last item, or None if they are unknown:
+		self.first: int | None = None
+		self.last: int | None = None
+		self.dirty: bool = True
+
+	@staticmethod
+	def compute(items: Iterable[tuple[TK, TV]]) -> tuple[int, int, int]:
+		"""
+		Returns: The hash of <items>, their number and BASE**number.
+		"""
+		value = 0
+		power = 1
+		length = 0
+		for item in items:
+			value = (value + hash(item) * power) % _FINGERPRINT_MODULUS
+			power = power * _FINGERPRINT_BASE % _FINGERPRINT_MODULUS
+			length += 1
+		return value, length, power
+
+	def get(self) -> int:
+		if self.dirty:
+			omd = self._omd
+			self.value, self.length, self.power = self.compute(omd.items())  # might raise TypeError: unhashable type
+			items = omd._items
+			self.first = next(iter(items)) if items else None
+			self.last = next(reversed(items)) if items else None
+			self.dirty = False
+		return self.value
+
+	@override
+	def on_add(self, index: int, key: TK, value: TV) -> None:
+		# items are always added at the end.
+		if self.dirty:
+			return
+		try:
+			item_hash = hash((key, value))
+		except TypeError:
+			self.dirty = True  # get() raises the TypeError.
+			return
+		self.value = (self.value + item_hash * self.power) % _FINGERPRINT_MODULUS
+		self.power = self.power * _FINGERPRINT_BASE % _FINGERPRINT_MODULUS
+		self.length += 1
+		if self.first is None:
+			self.first = index
+		self.last = index
+
+	@override
+	def on_remove(self, index: int, key: TK, value: TV) -> None:
+		if self.dirty:
+			return
+		if index != self.first and index != self.last:
+			self.dirty = True
+			return
+		self.length -= 1
+		if not self.length:
+			self.value = 0
+			self.power = 1
+			self.first = self.last = None
+			return
+		item_hash = hash((key, value))
+		items = self._omd._items
+		# during bulk modifications, <items> might already lack items whose removal we haven't been notified about yet,
+		# and contain items whose addition we haven't been notified about yet. Then the neighbour is unknown:
+		if index == self.first:
+			first = next(iter(items), None)
+			if first is None or first < index:
+				self.dirty = True
+				return
+			# every other item moves one position to the front:
+			self.value = (self.value - item_hash) * _FINGERPRINT_BASE_INVERSE % _FINGERPRINT_MODULUS
+			self.first = first
+		else:
+			last = next(reversed(items), None)
+			if last is None:
+				self.dirty = True
+				return
+			self.value = (self.value - item_hash * self.power * _FINGERPRINT_BASE_INVERSE) % _FINGERPRINT_MODULUS
+			self.last = last if last < index else None
+		self.power = self.power * _FINGERPRINT_BASE_INVERSE % _FINGERPRINT_MODULUS
+
+	@override
+	def on_replace(self, index: int, key: TK, old_value: TV, value: TV) -> None:
+		self.dirty = True
+
+	@override
+	def on_clear(self) -> None:
+		self.value = 0
+		self.length = 0
+		self.power = 1
+		self.first = self.last = None
+		self.dirty = False
+
+	@override
+	def copy_for(self, omd: OrderedMultiDictBase[TK, TV, Any]) -> _Fingerprint[TK, TV]:
+		result = _Fingerprint(omd)
+		if not self.dirty:
+			result.value, result.length, result.power = self.value, self.length, self.power
+			items = omd._items  # the copy might use other internal indices.
+			result.first = next(iter(items)) if items else None
+			result.last = next(reversed(items)) if items else None
+			result.dirty = False
+		return result
+
+
+class _ValueIndex[TK: Hashable, TV](_MutationObserver[TK, TV]):
+	"""
+	A secondary index over func(value) for all items of an OrderedMultiDict. See OrderedMultiDictBase.create_index().
+	"""
+
+	def __init__(self, name: str, func: Callable[[TV], Hashable], indexed_items: Iterable[tuple[int, TK, TV]]):
+		self.name: str = name
+		self.func: Callable[[TV], Hashable] = func
+		# func(value) -> {index: (key, value)}. Items are usually added in ascending index order, so most buckets are in
+		# insertion order. Buckets that aren't (see replaceall()) are sorted lazily by lookup().
+		self.buckets: dict[Hashable, dict[int, tuple[TK, TV]]] = {}
+		self.unsorted: set[Hashable] = set()
+		for index, key, value in indexed_items:
+			self.on_add(index, key, value)
+
+	@override
+	def on_add(self, index: int, key: TK, value: TV) -> None:
+		indexed_value = self.func(value)
+		if (bucket := self.buckets.get(indexed_value)) is None:
+			bucket = self.buckets[indexed_value] = {}
+		elif index < next(reversed(bucket)):
+			self.unsorted.add(indexed_value)
+		bucket[index] = (key, value)
+
+	@override
+	def on_remove(self, index: int, key: TK, value: TV) -> None:
+		indexed_value = self.func(value)
+		bucket = self.buckets[indexed_value]
+		del bucket[index]
+		if not bucket:
+			del self.buckets[indexed_value]
+			self.unsorted.discard(indexed_value)
+
+	@override
+	def on_clear(self) -> None:
+		self.buckets.clear()
+		self.unsorted.clear()
+
+	@override
+	def copy_for(self, omd: OrderedMultiDictBase[TK, TV, Any]) -> _ValueIndex[TK, TV]:
+		result = _ValueIndex(self.name, self.func, ())
+		result.buckets = {indexed_value: bucket.copy() for indexed_value, bucket in self.buckets.items()}
+		result.unsorted = self.unsorted.copy()
+		return result
+
+	def lookup(self, indexed_value: Hashable) -> list[tuple[TK, TV]]:
+		if (bucket := self.buckets.get(indexed_value)) is None:
+			return []
+		if indexed_value in self.unsorted:
+			self.unsorted.discard(indexed_value)
+			bucket = self.buckets[indexed_value] = dict(sorted(bucket.items()))
+		return list(bucket.values())
 
 
 class _ViewBase[TK: Hashable, TV]:
@@ -835,5 +2270,23 @@ class DeOrderedMultiDict[TK: Hashable, TV](OrderedMultiDictBase[TK, TV, deque[tu
 	def _q_popleft(self, queue) -> tuple[int, TV]:
 		return queue.popleft()
 
+	@override
+	def _items_pop_firsts(self, count: int) -> list[tuple[int, tuple[TK, TV]]]:
+		pop = self._items.popitem
+		return [pop(False) for _ in range(count)]
+
+	@override
+	def _shorten_values(self, counts: dict[TK, int], *, last: bool) -> None:
+		# deques cannot delete slices.
+		s_map = self._map
+		for key, count in counts.items():
+			values = s_map[key]
+			if count == len(values):
+				del s_map[key]
+			else:
+				pop = values.pop if last else values.popleft
+				for _ in range(count):
+					pop()
+
 
 __all__ = ['OrderedMultiDict', 'DeOrderedMultiDict']
@@ -0,0 +1,541 @@
+from __future__ import annotations
+
+import mmap
+import pickle
+import struct
+import sys
+import weakref
+from array import array
+from collections.abc import Mapping
+from hashlib import blake2b
+from itertools import accumulate, batched, islice
+from os import PathLike
+from typing import Any, Hashable, Iterable, Iterator, Self, TYPE_CHECKING, overload
+
+if TYPE_CHECKING:
+	from multiprocessing.shared_memory import SharedMemory
+	from ._orderedmultidict import OrderedMultiDictBase
+
+_SENTINEL = object()
+
+_MAGIC: bytes = b'OMDSEAL1'
+_BYTE_ORDER_MARK: int = 0x0102030405060708
+# magic, byte order mark, item count, key count, hash table size, and the offsets of the hash table, the key entries,
+# the per-key item positions, the item key codes and the value offsets:
+_HEADER = struct.Struct('=8s9Q')
+# every key entry is: (offset of the pickled key, length of the pickled key, start in the per-key item positions, count)
+_KEY_ENTRY_SIZE: int = 4
+
+
+def _canonical_bytes(key: Hashable) -> bytes:
+	"""
+	Returns: A byte string that is the same for all keys that are equal, for None, bools, ints, floats, strs, bytes and
+	tuples of those. All other keys are represented by their pickled form.
+	"""
+	if key is None:
+		return b'N'
+	if isinstance(key, int):  # bools are ints, and True == 1.
+		return b'i%d' % key
+	if isinstance(key, float):
+		if key.is_integer():  # 1.0 == 1.
+			return b'i%d' % int(key)
+		return b'f' + key.hex().encode()
+	if isinstance(key, str):
+		return b's' + key.encode('utf-8', 'surrogatepass')
+	if isinstance(key, bytes):
+		return b'b' + key
+	if isinstance(key, tuple):
+		parts = [_canonical_bytes(k) for k in key]
+		return b't' + b''.join(len(part).to_bytes(8, 'little') + part for part in parts)
+	return b'p' + pickle.dumps(key, 4)
+
+
+def _stable_hash(key: Hashable) -> int:
+	"""
+	Returns: A 64-bit hash of <key> that, unlike hash(), is the same in every process.
+	"""
+	return int.from_bytes(blake2b(_canonical_bytes(key), digest_size=8).digest(), 'little')
+
+
+def _build_head(omd: OrderedMultiDictBase[Any, Any, Any]) -> tuple[list[bytes | array], int]:
+	"""
+	Returns: The chunks of the sealed layout of <omd> up to and including the pickled keys, but without the value
+	offsets, which follow the item key codes. And the offset of the value offsets.
+	"""
+	keys = list(omd.unique_keys())
+	codes = dict(zip(keys, range(len(keys))))
+	item_codes = array('Q', map(codes.__getitem__, omd.keys()))
+	count = len(item_codes)
+
+	positions_per_key: list[list[int]] = [[] for _ in keys]
+	for pos, code in enumerate(item_codes):
+		positions_per_key[code].append(pos)
+
+	table_size = 8
+	while table_size < 2 * len(keys):
+		table_size *= 2
+	table = array('Q', bytes(16 * table_size))
+	mask = table_size - 1
+	for code, key in enumerate(keys):
+		slot = (h := _stable_hash(key)) & mask
+		while table[2 * slot + 1]:
+			slot = (slot + 1) & mask
+		table[2 * slot] = h
+		table[2 * slot + 1] = code + 1  # 0 marks an empty slot.
+
+	table_off = _HEADER.size
+	entries_off = table_off + 16 * table_size
+	key_items_off = entries_off + 8 * _KEY_ENTRY_SIZE * len(keys)
+	item_codes_off = key_items_off + 8 * count
+	value_offsets_off = item_codes_off + 8 * count
+	key_blobs_off = value_offsets_off + 8 * (count + 1)
+
+	entries = array('Q')
+	key_items = array('Q')
+	key_blobs = [pickle.dumps(key, 5) for key in keys]
+	offset = key_blobs_off
+	for key_blob, positions in zip(key_blobs, positions_per_key):
+		entries.extend((offset, len(key_blob), len(key_items), len(positions)))
+		key_items.extend(positions)
+		offset += len(key_blob)
+
+	header = _HEADER.pack(
+		_MAGIC, _BYTE_ORDER_MARK, count, len(keys), table_size,
+		table_off, entries_off, key_items_off, item_codes_off, value_offsets_off,
+	)
+	return [header, table, entries, key_items, item_codes, b''.join(key_blobs)], value_offsets_off
+
+
+def _pickle_values(values: Iterable[Any]) -> list[bytes]:
+	return [pickle.dumps(value, 5) for value in values]
+
+
+def _write_chunks(buffer: memoryview, offset: int, chunks: Iterable[bytes | array]) -> None:
+	for chunk in chunks:
+		data = memoryview(chunk).cast('B')
+		buffer[offset:offset + len(data)] = data
+		offset += len(data)
+
+
+def _save_sealed(omd: OrderedMultiDictBase[Any, Any, Any], path: str | PathLike[str]) -> None:
+	head, value_offsets_off = _build_head(omd)
+	with open(path, 'wb') as file:
+		for chunk in head[:-1]:
+			file.write(chunk)
+		# the values are written one by one, so they don't have to be held in memory all at once:
+		file.seek(value_offsets_off + 8 * (len(omd) + 1))
+		file.write(head[-1])
+		value_offsets = array('Q', [file.tell()])
+		for values in batched(omd.values(), 4096):
+			value_blobs = _pickle_values(values)
+			value_offsets.extend(islice(accumulate(map(len, value_blobs), initial=value_offsets[-1]), 1, None))
+			file.write(b''.join(value_blobs))
+		file.seek(value_offsets_off)
+		file.write(value_offsets)
+
+
+def _attach_shared_memory(name: str) -> SharedMemory:
+	from multiprocessing.shared_memory import SharedMemory
+	if sys.version_info >= (3, 13):
+		# don't let the resource tracker of an attaching process unlink the shared memory when that process exits:
+		return SharedMemory(name=name, track=False)
+	return SharedMemory(name=name)
+
+
+def _release(views: list[memoryview], resource: Any) -> None:
+	"""
+	Releases <views> and then closes <resource>, which cannot be closed while views into its buffer exist.
+	"""
+	for view in views:
+		view.release()
+	if resource is not None:
+		resource.close()
+
+
+class SealedOrderedMultiDict[TK: Hashable, TV](Mapping[TK, TV]):
+	"""
+	A read-only OrderedMultiDict that lives in a single buffer, e.g. in shared memory or in a memory-mapped file. Its
+	read API is the same as the one of OrderedMultiDict. Keys and values are unpickled when they are accessed, so opening a
+	SealedOrderedMultiDict takes O(1), regardless of its size.
+
+	The buffer contains a hash table of the unique keys, the positions of the items of every key, the key of every item,
+	and the pickled keys and values. Keys are hashed with a stable hash (see _canonical_bytes()), so a key that is
+	neither None, a bool, int, float, str, bytes, nor a tuple of those is only found by a key that pickles identically.
+
+	Example:
+		>>> omd = OrderedMultiDict([('a', 1), ('b', 2), ('a', 11)])
+		>>> sealed = omd.seal_shared()  # in the parent process
+		>>> sealed = SealedOrderedMultiDict.attach(sealed.name)  # in a worker process, or pickle sealed instead.
+		>>> print(sealed.getall('a'))  # [1, 11]
+		>>> omd.save_sealed('data.omd')
+		>>> with SealedOrderedMultiDict.open('data.omd') as sealed:
+		...     print(sealed.getall('a'))  # [1, 11]
+
+	Note: A SealedOrderedMultiDict should be closed with close() when it isn't needed anymore. Otherwise, it is closed
+	when it is garbage-collected. Shared memory created by create_shared() must also be unlinked by its creator with
+	unlink().
+	"""
+
+	def __init__(self, buffer: Any):
+		"""
+		Opens the sealed layout in <buffer>, which can be any bytes-like object.
+
+		Raises: ValueError if <buffer> does not contain a sealed layout created on a machine with the same byte order.
+		"""
+		self._resource: Any = None
+		self._path: str | PathLike[str] | None = None
+		self._buffer: memoryview = memoryview(buffer).cast('B')
+		try:
+			header = self._read_header(self._buffer)
+		except BaseException:
+			self._buffer.release()  # otherwise <buffer> could not be closed.
+			raise
+		count, key_count, table_size, table_off, entries_off, key_items_off, item_codes_off, value_offsets_off = header
+		self._len: int = count
+		self._key_count: int = key_count
+		self._mask: int = table_size - 1
+		self._table: memoryview = self._section(table_off, 2 * table_size)
+		self._entries: memoryview = self._section(entries_off, _KEY_ENTRY_SIZE * key_count)
+		self._key_items: memoryview = self._section(key_items_off, count)
+		self._item_codes: memoryview = self._section(item_codes_off, count)
+		self._value_offsets: memoryview = self._section(value_offsets_off, count + 1)
+		self._keys: dict[int, TK] = {}  # the keys unpickled so far, by key code.
+		self._finalizer: weakref.finalize = weakref.finalize(self, _release, self._views(), None)
+
+	def _views(self) -> list[memoryview]:
+		return [self._table, self._entries, self._key_items, self._item_codes, self._value_offsets, self._buffer]
+
+	def _own(self, resource: Any) -> None:
+		"""
+		Makes close() close <resource>, which provides the buffer. If close() isn't called, <resource> is closed when the
+		SealedOrderedMultiDict is garbage-collected, after the views into its buffer have been released.
+		"""
+		self._resource = resource
+		self._finalizer.detach()
+		self._finalizer = weakref.finalize(self, _release, self._views(), resource)
+
+	@staticmethod
+	def _read_header(buffer: memoryview) -> tuple[int, ...]:
+		if len(buffer) < _HEADER.size:
+			raise ValueError("buffer does not contain a SealedOrderedMultiDict.")
+		magic, byte_order_mark, *header = _HEADER.unpack_from(buffer)
+		if magic != _MAGIC:
+			raise ValueError("buffer does not contain a SealedOrderedMultiDict.")
+		if byte_order_mark != _BYTE_ORDER_MARK:
+			raise ValueError("the SealedOrderedMultiDict was created on a machine with a different byte order.")
+		count, value_offsets_off = header[0], header[-1]
+		last_value_offset_off = value_offsets_off + 8 * count
+		if last_value_offset_off + 8 > len(buffer) or struct.unpack_from('=Q', buffer, last_value_offset_off)[0] > len(buffer):
+			raise ValueError("buffer is too small for the SealedOrderedMultiDict it contains.")
+		return tuple(header)
+
+	def _section(self, offset: int, length: int) -> memoryview:
+		return self._buffer[offset:offset + 8 * length].cast('Q')
+
+	@classmethod
+	def create_shared(cls, omd: OrderedMultiDictBase[TK, TV, Any], *, name: str | None = None) -> Self:
+		"""
+		Returns: A SealedOrderedMultiDict with all items of <omd> in a new block of shared memory (see
+		multiprocessing.shared_memory). Other processes can attach to it by its name (see attach()).
+		"""
+		head, value_offsets_off = _build_head(omd)
+		value_blobs = _pickle_values(omd.values())
+		values_off = value_offsets_off + 8 * (len(value_blobs) + 1) + len(head[-1])
+		value_offsets = array('Q', accumulate(map(len, value_blobs), initial=values_off))
+		from multiprocessing.shared_memory import SharedMemory
+		shared_memory = SharedMemory(name=name, create=True, size=value_offsets[-1])
+		try:
+			_write_chunks(shared_memory.buf, 0, head[:-1])
+			_write_chunks(shared_memory.buf, value_offsets_off, [value_offsets, head[-1], *value_blobs])
+			result = cls(shared_memory.buf)
+		except BaseException:
+			shared_memory.close()
+			shared_memory.unlink()
+			raise
+		result._own(shared_memory)
+		return result
+
+	@classmethod
+	def attach(cls, name: str) -> Self:
+		"""
+		Returns: The SealedOrderedMultiDict in the block of shared memory called <name>. Takes O(1).
+		"""
+		shared_memory = _attach_shared_memory(name)
+		try:
+			result = cls(shared_memory.buf)
+		except BaseException:
+			shared_memory.close()
+			raise
+		result._own(shared_memory)
+		return result
+
+	@classmethod
+	def save(cls, omd: OrderedMultiDictBase[TK, TV, Any], path: str | PathLike[str]) -> None:
+		"""
+		Writes all items of <omd> into the file at <path>, which can then be opened with open(). The values are
+		pickled one at a time, so this only needs little memory in addition to <omd>.
+		"""
+		_save_sealed(omd, path)
+
+	@classmethod
+	def open(cls, path: str | PathLike[str]) -> Self:
+		"""
+		Returns: The SealedOrderedMultiDict in the file at <path> (see save()). The file is memory-mapped, so opening it
+		takes O(1), and lookups and iteration only read the parts of the file they touch.
+
+		Raises: ValueError if the file does not contain a SealedOrderedMultiDict.
+		"""
+		with open(path, 'rb') as file:
+			mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+		try:
+			result = cls(mapped)
+		except BaseException:
+			mapped.close()
+			raise
+		result._own(mapped)
+		result._path = path
+		return result
+
+	@property
+	def path(self) -> str | PathLike[str] | None:
+		"""
+		The path of the file, or None if the SealedOrderedMultiDict wasn't opened with open().
+		"""
+		return self._path
+
+	@property
+	def name(self) -> str | None:
+		"""
+		The name of the block of shared memory, or None if the SealedOrderedMultiDict isn't in shared memory.
+		"""
+		return getattr(self._resource, 'name', None)
+
+	def close(self) -> None:
+		"""
+		Releases the buffer. The SealedOrderedMultiDict cannot be used afterward.
+		"""
+		self._finalizer()
+
+	def unlink(self) -> None:
+		"""
+		Destroys the block of shared memory. Should be called once, by the process that called create_shared().
+		"""
+		if self.name is None:
+			raise ValueError("the SealedOrderedMultiDict is not in shared memory.")
+		self._resource.unlink()
+
+	def __enter__(self) -> Self:
+		return self
+
+	def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+		self.close()
+
+	def __reduce__(self):
+		if self.name is not None:
+			return type(self).attach, (self.name,)
+		if self._path is not None:
+			return type(self).open, (self._path,)
+		return type(self), (bytes(self._buffer),)
+
+	def _find(self, key: TK) -> int:
+		"""
+		Returns: The key code of <key>, or -1 if <key> is not in the dictionary.
+		"""
+		hash(key)  # raise a TypeError for unhashable keys, like a dict.
+		table = self._table
+		mask = self._mask
+		slot = (h := _stable_hash(key)) & mask
+		while code := table[2 * slot + 1]:
+			if table[2 * slot] == h and self._key(code - 1) == key:
+				return code - 1
+			slot = (slot + 1) & mask
+		return -1
+
+	def _key(self, code: int) -> TK:
+		if (key := self._keys.get(code, _SENTINEL)) is _SENTINEL:
+			offset, length = self._entries[_KEY_ENTRY_SIZE * code:_KEY_ENTRY_SIZE * code + 2]
+			key = self._keys[code] = pickle.loads(self._buffer[offset:offset + length])
+		return key  # type: ignore
+
+	def _value(self, pos: int) -> TV:
+		return pickle.loads(self._buffer[self._value_offsets[pos]:self._value_offsets[pos + 1]])
+
+	def _item(self, pos: int) -> tuple[TK, TV]:
+		return self._key(self._item_codes[pos]), self._value(pos)
+
+	def _positions(self, key: TK) -> memoryview | None:
+		"""
+		Returns: The positions of all items of <key>, or None if <key> is not in the dictionary.
+		"""
+		if (code := self._find(key)) < 0:
+			return None
+		start, count = self._entries[_KEY_ENTRY_SIZE * code + 2:_KEY_ENTRY_SIZE * code + 4]
+		return self._key_items[start:start + count]
+
+	@overload
+	def get(self, key: TK) -> TV | None: ...
+	@overload
+	def get[TT](self, key: TK, default: TT) -> TV | TT: ...
+
+	def get[TT](self, key: TK, default: TT | None = None) -> TV | TT | None:
+		""" same as getlast(...)
+		"""
+		return self.getlast(key, default)
+
+	@overload
+	def getfirst(self, key: TK) -> TV | None: ...
+	@overload
+	def getfirst[TT](self, key: TK, default: TT) -> TV | TT: ...
+
+	def getfirst[TT](self, key: TK, default: TT | None = None) -> TV | TT | None:
+		if (positions := self._positions(key)) is not None:
+			return self._value(positions[0])
+		return default
+
+	@overload
+	def getlast(self, key: TK) -> TV | None: ...
+	@overload
+	def getlast[TT](self, key: TK, default: TT) -> TV | TT: ...
+
+	def getlast[TT](self, key: TK, default: TT | None = None) -> TV | TT | None:
+		""" same as get(...)
+		"""
+		if (positions := self._positions(key)) is not None:
+			return self._value(positions[-1])
+		return default
+
+	def getall[TT](self, key: TK, default: TT = _SENTINEL) -> list[TV] | TT:  # type: ignore
+		"""
+		Returns: The list of values for <key> if <key> is in the dictionary,
+		else <default>. If <default> is not provided, an empty list is
+		returned.
+		"""
+		if (positions := self._positions(key)) is not None:
+			return [self._value(pos) for pos in positions]
+		elif default is _SENTINEL:
+			return []
+		else:
+			return default
+
+	def contains_item(self, key: TK, value: TV) -> bool:
+		if (positions := self._positions(key)) is not None:
+			return any(self._value(pos) == value for pos in positions)
+		return False
+
+	def contains_value(self, value: TV) -> bool:
+		return value in self.values()
+
+	def items(self) -> _SealedItemsView[TK, TV]:  # type: ignore
+		return _SealedItemsView(self)
+
+	def keys(self) -> _SealedKeysView[TK]:  # type: ignore
+		return _SealedKeysView(self)
+
+	def unique_keys(self) -> _SealedUniqueKeysView[TK]:
+		return _SealedUniqueKeysView(self)
+
+	def values(self) -> _SealedValuesView[TV]:  # type: ignore
+		return _SealedValuesView(self)
+
+	def __getitem__(self, key: TK) -> TV:
+		if (positions := self._positions(key)) is not None:
+			return self._value(positions[-1])
+		raise KeyError(key)
+
+	def __contains__(self, key: object) -> bool:
+		return self._find(key) >= 0  # type: ignore
+
+	def __len__(self) -> int:
+		return self._len
+
+	def __bool__(self) -> bool:
+		return self._len != 0
+
+	def __iter__(self) -> Iterator[TK]:
+		return iter(self.keys())
+
+	def __eq__(self, other) -> bool:
+		from ._orderedmultidict import OrderedMultiDictBase
+		if not isinstance(other, (SealedOrderedMultiDict, OrderedMultiDictBase)):
+			return NotImplemented
+		if len(self) != len(other):
+			return False
+		return all(a == b for a, b in zip(self.items(), other.items()))
+
+	def __ne__(self, other) -> bool:
+		return not self.__eq__(other)
+
+	def __str__(self) -> str:
+		return '{%s}' % ', '.join(f'{p[0]!r}: {p[1]!r}' for p in self.items())
+
+	def __repr__(self) -> str:
+		return f'{self.__class__.__name__}({list(self.items())!r})'
+
+
+class _SealedViewBase[TK: Hashable, TV]:
+
+	def __init__(self, impl: SealedOrderedMultiDict[TK, TV]):
+		self._impl: SealedOrderedMultiDict[TK, TV] = impl
+
+	def __len__(self) -> int:
+		return len(self._impl)
+
+	def __repr__(self):
+		return f'{type(self).__name__}({list(self)})'  # type: ignore
+
+
+class _SealedItemsView[TK: Hashable, TV](_SealedViewBase[TK, TV]):
+
+	def __contains__(self, item: tuple[TK, TV]) -> bool:
+		if not isinstance(item, tuple) or len(item) != 2:
+			return False
+		return self._impl.contains_item(*item)
+
+	def __iter__(self) -> Iterator[tuple[TK, TV]]:
+		return map(self._impl._item, range(len(self._impl)))
+
+	def __reversed__(self) -> Iterator[tuple[TK, TV]]:
+		return map(self._impl._item, reversed(range(len(self._impl))))
+
+
+class _SealedValuesView[TV](_SealedViewBase[Any, TV]):
+
+	def __contains__(self, value: TV) -> bool:
+		return any(v == value for v in self)
+
+	def __iter__(self) -> Iterator[TV]:
+		return map(self._impl._value, range(len(self._impl)))
+
+	def __reversed__(self) -> Iterator[TV]:
+		return map(self._impl._value, reversed(range(len(self._impl))))
+
+
+class _SealedKeysView[TK: Hashable](_SealedViewBase[TK, Any]):
+
+	def __contains__(self, key: TK) -> bool:
+		return key in self._impl
+
+	def __iter__(self) -> Iterator[TK]:
+		return map(self._impl._key, self._impl._item_codes)
+
+	def __reversed__(self) -> Iterator[TK]:
+		return map(self._impl._key, reversed(self._impl._item_codes))
+
+
+class _SealedUniqueKeysView[TK: Hashable](_SealedViewBase[TK, Any]):
+
+	def __contains__(self, key: TK) -> bool:
+		return key in self._impl
+
+	def __iter__(self) -> Iterator[TK]:
+		# the key codes are in order of first appearance.
+		return map(self._impl._key, range(self._impl._key_count))
+
+	def __reversed__(self) -> Iterator[TK]:
+		return map(self._impl._key, reversed(range(self._impl._key_count)))
+
+	def __len__(self) -> int:
+		return self._impl._key_count
+
+
+__all__ = ['SealedOrderedMultiDict']
@@ -0,0 +1,504 @@
+from __future__ import annotations
+
+import pickle
+import sqlite3
+from collections import Counter
+from collections.abc import MutableMapping
+from itertools import islice
+from os import PathLike
+from typing import Any, Hashable, Iterable, Iterator, Self, overload
+
+from ._orderedmultidict import DeOrderedMultiDict, _SENTINEL
+
+
+class SpillingOrderedMultiDict[TK: Hashable, TV](MutableMapping[TK, TV]):
+	"""
+	An OrderedMultiDict that keeps at most <max_items_in_memory> of its newest items in memory and spills older items to
+	a SQLite database on disk. Spilled items are read back transparently by getall(), popfirstitem(), iteration, etc.
+	The keys of all spilled items are kept in memory, so a lookup only reads the disk if the key actually has spilled
+	items.
+
+	Items that are read back are not moved back into memory. spill_count and fetch_count count the items that were
+	written to, and read from the disk.
+
+	Example:
+		>>> with SpillingOrderedMultiDict(max_items_in_memory=2) as omd:
+		...     omd.extend([('a', 1), ('b', 2), ('a', 11), ('c', 3)])
+		...     print(omd.spill_count)   # 2
+		...     print(omd.getall('a'))   # [1, 11]
+		...     print(omd.fetch_count)   # 1
+
+	Note: Values are stored pickled, so they are copies once they have been spilled. A SpillingOrderedMultiDict should be
+	closed with close() when it isn't needed anymore.
+	"""
+
+	def __init__(
+			self,
+			iterable: Iterable[tuple[TK, TV]] | Any = _SENTINEL,
+			/,
+			*,
+			max_items_in_memory: int = 100_000,
+			path: str | PathLike[str] | None = None,
+	):
+		"""
+		<path> is the SQLite database to spill into. Any items already in it are discarded. By default, a temporary
+		database is used that is deleted by close().
+
+		Raises: ValueError if <max_items_in_memory> is negative.
+		"""
+		if max_items_in_memory < 0:
+			raise ValueError(f"max_items_in_memory must be non-negative, got {max_items_in_memory}.")
+		self._max_items_in_memory: int = max_items_in_memory
+		self._hot: DeOrderedMultiDict[TK, TV] = DeOrderedMultiDict()
+		self._connection: sqlite3.Connection = sqlite3.connect('' if path is None else path)
+		self._connection.execute('PRAGMA synchronous = OFF')
+		self._connection.execute('PRAGMA journal_mode = MEMORY')
+		with self._connection:
+			self._connection.execute('DROP TABLE IF EXISTS items')
+			self._connection.execute('CREATE TABLE items (seq INTEGER PRIMARY KEY, key_id INTEGER NOT NULL, value BLOB NOT NULL)')
+			self._connection.execute('CREATE INDEX items_by_key ON items (key_id, seq)')
+		self._next_seq: int = 0
+		# only keys that have spilled items have a key id:
+		self._key_ids: dict[TK, int] = {}
+		self._keys_by_id: dict[int, TK] = {}
+		self._spilled_counts: dict[int, int] = {}  # by key id.
+		self._next_key_id: int = 0
+		self._spilled_len: int = 0
+		self._spill_count: int = 0
+		self._fetch_count: int = 0
+		if iterable is not _SENTINEL:
+			self.extend(iterable)
+
+	@property
+	def max_items_in_memory(self) -> int:
+		return self._max_items_in_memory
+
+	@property
+	def spill_count(self) -> int:
+		"""
+		The number of items that were written to the disk so far.
+		"""
+		return self._spill_count
+
+	@property
+	def fetch_count(self) -> int:
+		"""
+		The number of items that were read from the disk so far.
+		"""
+		return self._fetch_count
+
+	@property
+	def spilled_len(self) -> int:
+		"""
+		The number of items that are currently on the disk.
+		"""
+		return self._spilled_len
+
+	def close(self) -> None:
+		"""
+		Closes the database. The SpillingOrderedMultiDict cannot be used afterward.
+		"""
+		self._connection.close()
+
+	def __enter__(self) -> Self:
+		return self
+
+	def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+		self.close()
+
+	def spill(self, count: int | None = None) -> None:
+		"""
+		Writes the <count> oldest items that are in memory to the disk. If <count> is None, all of them are written.
+		"""
+		hot = self._hot
+		count = len(hot) if count is None else min(count, len(hot))
+		if count <= 0:
+			return
+		key_ids = self._key_ids
+		new_key_ids: dict[TK, int] = {}
+		rows = []
+		for seq, (key, value) in enumerate(islice(hot.items(), count), self._next_seq):
+			if (key_id := key_ids.get(key)) is None and (key_id := new_key_ids.get(key)) is None:
+				key_id = new_key_ids[key] = self._next_key_id + len(new_key_ids)
+			rows.append((seq, key_id, pickle.dumps(value, pickle.HIGHEST_PROTOCOL)))
+		with self._connection:
+			self._connection.executemany('INSERT INTO items VALUES (?, ?, ?)', rows)
+
+		key_ids.update(new_key_ids)
+		self._keys_by_id.update((key_id, key) for key, key_id in new_key_ids.items())
+		self._next_key_id += len(new_key_ids)
+		spilled_counts = self._spilled_counts
+		for key_id, key_count in Counter(row[1] for row in rows).items():
+			spilled_counts[key_id] = spilled_counts.get(key_id, 0) + key_count
+		for _ in range(count):
+			hot.popfirstitem()
+		self._next_seq += count
+		self._spilled_len += count
+		self._spill_count += count
+
+	def _spill_if_needed(self) -> None:
+		if (hot_len := len(self._hot)) > self._max_items_in_memory:
+			# spill a quarter of the budget at once, so not every add() has to write to the disk:
+			self.spill(hot_len - (self._max_items_in_memory - self._max_items_in_memory // 4))
+
+	def _forget_spilled(self, key_id: int, count: int) -> None:
+		self._spilled_len -= count
+		if (remaining := self._spilled_counts[key_id] - count) > 0:
+			self._spilled_counts[key_id] = remaining
+		else:
+			del self._spilled_counts[key_id]
+			del self._key_ids[self._keys_by_id.pop(key_id)]
+
+	def _loads(self, value: bytes) -> TV:
+		self._fetch_count += 1
+		return pickle.loads(value)
+
+	def _spilled_values(self, key_id: int) -> list[TV]:
+		cursor = self._connection.execute('SELECT value FROM items WHERE key_id = ? ORDER BY seq', (key_id,))
+		return [self._loads(value) for (value,) in cursor]
+
+	def _spilled_value(self, key_id: int, *, last: bool, pop: bool) -> TV:
+		order = 'DESC' if last else 'ASC'
+		seq, value = self._connection.execute(
+			f'SELECT seq, value FROM items WHERE key_id = ? ORDER BY seq {order} LIMIT 1', (key_id,)
+		).fetchone()
+		if pop:
+			with self._connection:
+				self._connection.execute('DELETE FROM items WHERE seq = ?', (seq,))
+			self._forget_spilled(key_id, 1)
+		return self._loads(value)
+
+	def _iter_spilled(self, columns: str, *, reverse: bool) -> Iterator[tuple[Any, ...]]:
+		order = 'DESC' if reverse else 'ASC'
+		return self._connection.execute(f'SELECT {columns} FROM items ORDER BY seq {order}')
+
+	def _iter_items(self, *, reverse: bool = False) -> Iterator[tuple[TK, TV]]:
+		keys_by_id = self._keys_by_id
+		if reverse:
+			yield from reversed(self._hot.items())
+		if self._spilled_len:
+			for key_id, value in self._iter_spilled('key_id, value', reverse=reverse):
+				yield keys_by_id[key_id], self._loads(value)
+		if not reverse:
+			yield from self._hot.items()
+
+	def _iter_keys(self, *, reverse: bool = False) -> Iterator[TK]:
+		keys_by_id = self._keys_by_id
+		if reverse:
+			yield from reversed(self._hot.keys())
+		if self._spilled_len:
+			for (key_id,) in self._iter_spilled('key_id', reverse=reverse):
+				yield keys_by_id[key_id]
+		if not reverse:
+			yield from self._hot.keys()
+
+	def _iter_values(self, *, reverse: bool = False) -> Iterator[TV]:
+		if reverse:
+			yield from reversed(self._hot.values())
+		if self._spilled_len:
+			for (value,) in self._iter_spilled('value', reverse=reverse):
+				yield self._loads(value)
+		if not reverse:
+			yield from self._hot.values()
+
+	def add(self, key: TK, value: TV) -> None:
+		self._hot.add(key, value)
+		self._spill_if_needed()
+
+	def addall(self, key: TK, value_list: Iterable[TV]) -> None:
+		for value in value_list:
+			self.add(key, value)
+
+	def extend(self, iterable_or_map: Iterable[tuple[TK, TV]] | Any = _SENTINEL, /, **kwargs: TV) -> None:
+		"""
+		Adds all key:value items from <iterable_or_map>, like OrderedMultiDict.extend(). Older items are spilled while
+		the items are added, so <iterable_or_map> can be larger than the memory budget.
+		"""
+		for key, value in self._iter_arguments(iterable_or_map, kwargs):
+			self.add(key, value)
+
+	def update(self, iterable_or_map: Iterable[tuple[TK, TV]] | Any = _SENTINEL, /, **kwargs: TV) -> None:
+		"""
+		Like OrderedMultiDict.update(): removes all values of every key in <iterable_or_map> and <kwargs>, and then adds
+		all their key:value items. <iterable_or_map> is iterated only once.
+		"""
+		if iterable_or_map is self:
+			iterable_or_map = list(self.items())
+		seen: set[TK] = set()
+		for key, value in self._iter_arguments(iterable_or_map, kwargs):
+			if key not in seen:
+				seen.add(key)
+				self._try_delete_all(key)
+			self.add(key, value)
+
+	@staticmethod
+	def _iter_arguments(iterable_or_map: Iterable[tuple[TK, TV]] | Any, kwargs: dict[str, TV]) -> Iterator[tuple[TK, TV]]:
+		if iterable_or_map is not _SENTINEL:
+			if hasattr(iterable_or_map, 'items'):
+				iterable_or_map = iterable_or_map.items()
+			elif hasattr(iterable_or_map, 'keys'):
+				iterable_or_map = ((k, iterable_or_map[k]) for k in iterable_or_map.keys())
+			yield from iterable_or_map
+		yield from kwargs.items()  # type: ignore
+
+	@overload
+	def get(self, key: TK) -> TV | None: ...
+	@overload
+	def get[TT](self, key: TK, default: TT) -> TV | TT: ...
+
+	def get[TT](self, key: TK, default: TT | None = None) -> TV | TT | None:
+		""" same as getlast(...)
+		"""
+		return self.getlast(key, default)
+
+	@overload
+	def getfirst(self, key: TK) -> TV | None: ...
+	@overload
+	def getfirst[TT](self, key: TK, default: TT) -> TV | TT: ...
+
+	def getfirst[TT](self, key: TK, default: TT | None = None) -> TV | TT | None:
+		if (key_id := self._key_ids.get(key)) is not None:
+			return self._spilled_value(key_id, last=False, pop=False)
+		return self._hot.getfirst(key, default)
+
+	@overload
+	def getlast(self, key: TK) -> TV | None: ...
+	@overload
+	def getlast[TT](self, key: TK, default: TT) -> TV | TT: ...
+
+	def getlast[TT](self, key: TK, default: TT | None = None) -> TV | TT | None:
+		""" same as get(...)
+		"""
+		if key in self._hot:
+			return self._hot.getlast(key)
+		if (key_id := self._key_ids.get(key)) is not None:
+			return self._spilled_value(key_id, last=True, pop=False)
+		return default
+
+	def getall[TT](self, key: TK, default: TT = _SENTINEL) -> list[TV] | TT:  # type: ignore
+		"""
+		Returns: The list of values for <key> if <key> is in the dictionary,
+		else <default>. If <default> is not provided, an empty list is
+		returned.
+		"""
+		if (key_id := self._key_ids.get(key)) is not None:
+			values = self._spilled_values(key_id)
+			values.extend(self._hot.getall(key))
+			return values
+		return self._hot.getall(key, default)
+
+	def contains_item(self, key: TK, value: TV) -> bool:
+		return self._hot.contains_item(key, value) or value in self.getall(key)
+
+	def contains_value(self, value: TV) -> bool:
+		return value in self.values()
+
+	def setall(self, key: TK, value_list: list[TV]) -> None:
+		self._try_delete_all(key)
+		self.addall(key, value_list)
+
+	def delete_all(self, key: TK) -> None:
+		"""
+		Removes all entries for key. Raises a KeyError if key is not in the dictionary.
+		"""
+		if not self._try_delete_all(key):
+			raise KeyError(key)
+
+	def _try_delete_all(self, key: TK) -> bool:
+		found = self._hot._try_delete_all(key)
+		if (key_id := self._key_ids.get(key)) is not None:
+			with self._connection:
+				self._connection.execute('DELETE FROM items WHERE key_id = ?', (key_id,))
+			self._forget_spilled(key_id, self._spilled_counts[key_id])
+			found = True
+		return found
+
+	def popall[TT](self, key: TK, /, default: TT = _SENTINEL) -> list[TV] | TT:  # type: ignore
+		"""
+		If <key> is in the dictionary, pop it and return its list of values. If
+		<key> is not in the dictionary, return <default>. KeyError is raised if
+		<default> is not provided and <key> is not in the dictionary.
+		"""
+		if key in self:
+			values = self.getall(key)
+			self._try_delete_all(key)
+			return values
+		elif default is not _SENTINEL:
+			return default
+		raise KeyError(key)
+
+	def popfirst[TT](self, key: TK, /, default: TT = _SENTINEL) -> TV | TT:  # type: ignore
+		if (key_id := self._key_ids.get(key)) is not None:
+			return self._spilled_value(key_id, last=False, pop=True)
+		return self._hot.popfirst(key, default)
+
+	def poplast[TT](self, key: TK, /, default: TT = _SENTINEL) -> TV | TT:  # type: ignore
+		"""
+		"same as .pop(...)"
+		"""
+		if key in self._hot:
+			return self._hot.poplast(key)
+		if (key_id := self._key_ids.get(key)) is not None:
+			return self._spilled_value(key_id, last=True, pop=True)
+		elif default is not _SENTINEL:
+			return default
+		raise KeyError(key)
+
+	def pop[TT](self, key: TK, /, default: TT = _SENTINEL) -> TV | TT:  # type: ignore
+		return self.poplast(key, default)
+
+	def popfirstitem[TT](self, *, default: TT = _SENTINEL) -> tuple[TK, TV] | TT:  # type: ignore
+		if self._spilled_len:
+			return self._pop_spilled_item(last=False)
+		return self._hot.popfirstitem(default=default)
+
+	def poplastitem[TT](self, *, default: TT = _SENTINEL) -> tuple[TK, TV] | TT:  # type: ignore
+		if self._hot or not self._spilled_len:
+			return self._hot.poplastitem(default=default)
+		return self._pop_spilled_item(last=True)
+
+	def popitem(self) -> tuple[TK, TV]:
+		"""
+		Like OrderedMultiDict.popitem(): removes and returns the first key together with its last value.
+		"""
+		if (key := next(self._iter_keys(), _SENTINEL)) is _SENTINEL:
+			raise KeyError("dictionary is empty")
+		return key, self.poplast(key)  # type: ignore
+
+	def _pop_spilled_item(self, *, last: bool) -> tuple[TK, TV]:
+		seq, key_id, value = next(iter(self._iter_spilled('seq, key_id, value', reverse=last)))
+		with self._connection:
+			self._connection.execute('DELETE FROM items WHERE seq = ?', (seq,))
+		key = self._keys_by_id[key_id]
+		self._forget_spilled(key_id, 1)
+		return key, self._loads(value)
+
+	def clear(self) -> None:
+		with self._connection:
+			self._connection.execute('DELETE FROM items')
+		self._key_ids.clear()
+		self._keys_by_id.clear()
+		self._spilled_counts.clear()
+		self._spilled_len = 0
+		self._hot.clear()
+
+	def items(self) -> _SpillingItemsView[TK, TV]:  # type: ignore
+		return _SpillingItemsView(self)
+
+	def keys(self) -> _SpillingKeysView[TK]:  # type: ignore
+		return _SpillingKeysView(self)
+
+	def unique_keys(self) -> _SpillingUniqueKeysView[TK]:
+		return _SpillingUniqueKeysView(self)
+
+	def values(self) -> _SpillingValuesView[TV]:  # type: ignore
+		return _SpillingValuesView(self)
+
+	def __getitem__(self, key: TK) -> TV:
+		if (value := self.getlast(key, _SENTINEL)) is _SENTINEL:
+			raise KeyError(key)
+		return value  # type: ignore
+
+	def __setitem__(self, key: TK, value: TV) -> None:
+		self.setall(key, [value])
+
+	def __delitem__(self, key: TK) -> None:
+		self.poplast(key)
+
+	def __contains__(self, key: object) -> bool:
+		return key in self._hot or key in self._key_ids
+
+	def __len__(self) -> int:
+		return self._spilled_len + len(self._hot)
+
+	def __bool__(self) -> bool:
+		return bool(self._spilled_len or self._hot)
+
+	def __iter__(self) -> Iterator[TK]:
+		return self._iter_keys()
+
+	def __eq__(self, other) -> bool:
+		from ._orderedmultidict import OrderedMultiDictBase
+		from ._sealed import SealedOrderedMultiDict
+		if not isinstance(other, (SpillingOrderedMultiDict, SealedOrderedMultiDict, OrderedMultiDictBase)):
+			return NotImplemented
+		if len(self) != len(other):
+			return False
+		return all(a == b for a, b in zip(self.items(), other.items()))
+
+	def __ne__(self, other) -> bool:
+		return not self.__eq__(other)
+
+	def __str__(self) -> str:
+		return '{%s}' % ', '.join(f'{p[0]!r}: {p[1]!r}' for p in self.items())
+
+	def __repr__(self) -> str:
+		return f'{self.__class__.__name__}({list(self.items())!r})'
+
+
+class _SpillingViewBase[TK: Hashable, TV]:
+
+	def __init__(self, impl: SpillingOrderedMultiDict[TK, TV]):
+		self._impl: SpillingOrderedMultiDict[TK, TV] = impl
+
+	def __len__(self) -> int:
+		return len(self._impl)
+
+	def __repr__(self):
+		return f'{type(self).__name__}({list(self)})'  # type: ignore
+
+
+class _SpillingItemsView[TK: Hashable, TV](_SpillingViewBase[TK, TV]):
+
+	def __contains__(self, item: tuple[TK, TV]) -> bool:
+		if not isinstance(item, tuple) or len(item) != 2:
+			return False
+		return self._impl.contains_item(*item)
+
+	def __iter__(self) -> Iterator[tuple[TK, TV]]:
+		return self._impl._iter_items()
+
+	def __reversed__(self) -> Iterator[tuple[TK, TV]]:
+		return self._impl._iter_items(reverse=True)
+
+
+class _SpillingValuesView[TV](_SpillingViewBase[Any, TV]):
+
+	def __contains__(self, value: TV) -> bool:
+		return any(v == value for v in self)
+
+	def __iter__(self) -> Iterator[TV]:
+		return self._impl._iter_values()
+
+	def __reversed__(self) -> Iterator[TV]:
+		return self._impl._iter_values(reverse=True)
+
+
+class _SpillingKeysView[TK: Hashable](_SpillingViewBase[TK, Any]):
+
+	def __contains__(self, key: TK) -> bool:
+		return key in self._impl
+
+	def __iter__(self) -> Iterator[TK]:
+		return self._impl._iter_keys()
+
+	def __reversed__(self) -> Iterator[TK]:
+		return self._impl._iter_keys(reverse=True)
+
+
+class _SpillingUniqueKeysView[TK: Hashable](_SpillingViewBase[TK, Any]):
+
+	def __contains__(self, key: TK) -> bool:
+		return key in self._impl
+
+	def __iter__(self) -> Iterator[TK]:
+		return iter(dict.fromkeys(self._impl._iter_keys()))
+
+	def __reversed__(self) -> Iterator[TK]:
+		return reversed(list(self))
+
+	def __len__(self) -> int:
+		return len(self._impl._key_ids.keys() | self._impl._hot.unique_keys())
+
+
+__all__ = ['SpillingOrderedMultiDict']
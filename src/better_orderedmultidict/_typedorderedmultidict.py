@@ -0,0 +1,485 @@
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from functools import partial
+from itertools import islice
+from operator import itemgetter
+from typing import Any, ClassVar, Hashable, Iterable, Iterator, Self, Sequence, Type, override
+
+from ._orderedmultidict import (
+	OrderedMultiDictBase, _DESYNCED_ERROR_MSG, _ItemsView, _KeysView, _SENTINEL, _SupportsKeysAndGetItem, _UniqueKeysView,
+	_ValuesView, _to_array,
+)
+
+_NUMERIC_TYPECODES: str = 'bBhHiIlLqQfd'
+
+
+class _TypedColumn:
+	"""
+	The values of a single key of a TypedOrderedMultiDict. Behaves like a list of (index, value)-pairs, but stores the
+	indices and the values unboxed in two parallel arrays.
+	"""
+	__slots__ = ('indices', 'values')
+
+	def __init__(self, value_type: str):
+		self.indices: array[int] = array('q')
+		self.values: array = array(value_type)
+
+	def copy(self) -> _TypedColumn:
+		result = _TypedColumn.__new__(_TypedColumn)
+		result.indices = array('q', self.indices)
+		result.values = array(self.values.typecode, self.values)
+		return result
+
+	def append(self, pair: tuple[int, Any]) -> None:
+		# append the value first: it might raise a TypeError or a BufferError, and we must not de-sync the arrays.
+		self.values.append(pair[1])
+		self.indices.append(pair[0])
+
+	def pop(self, i: int = -1) -> tuple[int, Any]:
+		value = self.values.pop(i)
+		return self.indices.pop(i), value
+
+	def __getitem__(self, i: int) -> tuple[int, Any]:
+		return self.indices[i], self.values[i]
+
+	def __setitem__(self, i: int, pair: tuple[int, Any]) -> None:
+		self.values[i] = pair[1]  # might raise a TypeError, see append().
+		self.indices[i] = pair[0]
+
+	def __delitem__(self, i: int) -> None:
+		del self.values[i]
+		del self.indices[i]
+
+	def __iter__(self) -> Iterator[tuple[int, Any]]:
+		return zip(self.indices, self.values)
+
+	def __len__(self) -> int:
+		return len(self.indices)
+
+	def __eq__(self, other) -> bool:
+		if type(self) is not type(other):
+			return NotImplemented
+		return self.indices == other.indices and self.values == other.values
+
+	def __repr__(self) -> str:
+		return f'{type(self).__name__}({list(self)!r})'
+
+
+class TypedOrderedMultiDict[TK: Hashable, TV: (int, float)](OrderedMultiDictBase[TK, TV, Any]):
+	"""
+	An OrderedMultiDict for numeric values, that stores the values unboxed in typed arrays (see the array module)
+	instead of in (key, value)- and (index, value)-tuples. This uses roughly half as much memory per item.
+
+	<value_type> is an array typecode, e.g. 'd' for float, or 'q' for int. Adding a value that cannot be stored in an
+	array of that type raises a TypeError or an OverflowError.
+
+	Example:
+		>>> omd = TypedOrderedMultiDict([('a', 1.0), ('b', 2.0)], value_type='d')
+		>>> omd.add('a', 11.0)
+		>>> print(omd.getall('a'))  # [1.0, 11.0]
+		>>> print(omd.getall_view('a').tolist())  # [1.0, 11.0]
+
+	Note: 'value_type' cannot be used as a key in **kwargs.
+	"""
+	_ItemsDictCls: ClassVar[Type[dict]] = dict
+	_STORES_PAIRS: ClassVar[bool] = False
+
+	def __init__(self, iterable_or_map: Iterable[tuple[TK, TV]] | _SupportsKeysAndGetItem[TK, TV] = _SENTINEL, /, *, value_type: str = 'd', **kwargs: TV):  # type: ignore
+		if value_type not in _NUMERIC_TYPECODES or len(value_type) != 1:
+			raise ValueError(f"value_type must be one of the numeric array typecodes {', '.join(_NUMERIC_TYPECODES)}, but got {value_type!r}.")
+		self._value_type: str = value_type
+		self._DequeCls = partial(_TypedColumn, value_type)  # type: ignore
+		# _items only holds the keys. The values are in the _TypedColumns in _map.
+		super().__init__(iterable_or_map, **kwargs)
+
+	@property
+	def value_type(self) -> str:
+		return self._value_type
+
+	@override
+	def _items_pop_first(self, items: dict) -> tuple[int, TK]:  # type: ignore
+		return (k := next(iter(items)), items.pop(k))
+
+	@override
+	def _q_popleft(self, queue: _TypedColumn) -> tuple[int, TV]:
+		return queue.pop(0)
+
+	@override
+	def _key_at(self, index: int) -> TK:
+		return self._items[index]
+
+	@override
+	def _item_at(self, index: int) -> tuple[TK, TV]:
+		key = self._items[index]
+		column = self._map[key]
+		return key, column.values[bisect_left(column.indices, index)]
+
+	@override
+	def _restore_indices(self, indices: Sequence[int], next_index: int) -> None:
+		assert not self._items or next(reversed(self._items)) == len(self._items) - 1
+		for column in self._map.values():
+			column.indices = array('q', map(indices.__getitem__, column.indices))
+		self._items = dict(zip(indices, self._items.values()))
+		self._index = max(next_index, indices[-1] + 1) if indices else next_index
+		self._key_codes_cache = None
+		for observer in self._observers:
+			observer.on_reindex(indices)
+
+	@override
+	def _replace_at(self, index: int, value: TV) -> None:
+		key = self._items[index]
+		column = self._map[key]
+		pos = bisect_left(column.indices, index)
+		old_value = column.values[pos]
+		column.values[pos] = value
+		if self._observers:
+			self._notify_replace(index, key, old_value, column.values[pos])
+
+	def _append(self, key: TK, value: TV, index: int) -> None:
+		s_map = self._map
+		column = s_map[key]  # might raise TypeError: unhashable type
+		try:
+			column.append((index, value))
+		except BaseException:
+			if not column:
+				del s_map[key]
+			raise
+		self._items[index] = key
+		if self._observers:
+			self._notify_add(index, key, column.values[-1])
+
+	@override
+	def _extend_iterable(self, items: Iterable[tuple[TK, TV]]) -> None:
+		index: int = self._index
+		append = self._append
+		try:
+			for k, v in items:
+				append(k, v, index)
+				index += 1
+		finally:
+			self._index = index
+
+	@override
+	def _update_iterable(self, items: Iterable[tuple[TK, TV]], start: int) -> None:
+		s_map = self._map
+		append = self._append
+		for k, v in items:
+			if (column := s_map.get(k)) is not None and column.indices[-1] < start:
+				self._try_delete_all(k)
+			append(k, v, self._index)
+			self._index += 1
+
+	@override
+	def _extend_omd(self, other: OrderedMultiDictBase[TK, TV, Any]) -> None:
+		if not isinstance(other, TypedOrderedMultiDict) or other._value_type != self._value_type:
+			self._extend_iterable(other.items())
+			return
+		if other is self:
+			other = self._new_empty()._copy_from(self)
+		o_items = other._items
+		if not o_items:
+			return
+		start = self._index
+		offset = start - next(iter(o_items))
+		s_map = self._map
+		extended: list[tuple[_TypedColumn, int]] = []
+		try:
+			for key, column in other._map.items():
+				target = s_map[key]
+				extended.append((target, len(target)))
+				target.values.extend(column.values)  # might raise a BufferError
+				target.indices.extend([index + offset for index in column.indices])
+		except BaseException:
+			# undo everything, so we don't end up half-way done:
+			for key, (target, length) in zip(other._map, extended):
+				del target.values[length:]
+				del target.indices[length:]
+				if not target:
+					del s_map[key]
+			raise
+		self._items.update(zip(map(offset.__add__, o_items), o_items.values()))
+		self._index = next(reversed(o_items)) + offset + 1
+		if self._observers:
+			for index, key, value in other._iter_indexed_items():
+				self._notify_add(index + offset, key, value)
+
+	@override
+	def _copy_from(self, others: OrderedMultiDictBase[TK, TV, Any]) -> Self:
+		if not isinstance(others, TypedOrderedMultiDict) or others._value_type != self._value_type:
+			self.clear()
+			self._extend_iterable(others.items())
+			return self
+		self._items = dict(others._items)
+		self._index = others._index
+		self._map = defaultdict(self._DequeCls, {key: column.copy() for key, column in others._map.items()})
+		self._key_codes_cache = None
+		return self
+
+	@override
+	def _new_empty(self) -> Self:
+		return type(self)(value_type=self._value_type)
+
+	@override
+	def _constructor_kwargs(self) -> dict[str, Any]:
+		return {'value_type': self._value_type}
+
+	@override
+	def _pack(self) -> tuple[list[TK], array | None, array]:
+		keys, key_codes, values = super()._pack()
+		return keys, key_codes, array(self._value_type, values)
+
+	@override
+	def _load_packed(self, keys: list[TK], key_codes: array | None, values: Any) -> None:
+		values = _to_array(self._value_type, values)
+		if key_codes is None:
+			key_codes = range(len(keys))  # type: ignore
+		columns = [self._DequeCls() for _ in keys]
+		for index, (code, value) in enumerate(zip(key_codes, values)):
+			column = columns[code]
+			column.indices.append(index)
+			column.values.append(value)
+		self._items = dict(zip(range(len(key_codes)), map(keys.__getitem__, key_codes)))
+		self._map = defaultdict(self._DequeCls, zip(keys, columns))
+		self._index = len(key_codes)
+
+	@override
+	def add(self, key: TK, value: TV) -> None:
+		index: int = self._index
+		self._append(key, value, index)
+		self._index = index + 1
+
+	@override
+	def addall(self, key: TK, value_list: list[TV]) -> None:
+		if not value_list:
+			return
+		values = array(self._value_type, value_list)  # converts all values at once, so we don't end up half-way done.
+		column = self._map[key]
+		try:
+			column.values.extend(values)
+		except BaseException:
+			if not column:
+				del self._map[key]
+			raise
+		index: int = self._index
+		column.indices.extend(range(index, index + len(values)))
+		self._index += len(values)
+		self._items.update(dict.fromkeys(range(index, index + len(values)), key))
+		if self._observers:
+			for i, value in enumerate(values, index):
+				self._notify_add(i, key, value)
+
+	@override
+	def replaceall(self, key: TK, value_list: list[TV]) -> None:
+		if (column := self._get_all_or_none(key)) is None:  # if key not in self:
+			self.addall(key, value_list)
+			return
+		new_values = array(self._value_type, value_list)  # converts all values at once, so we don't end up half-way done.
+		count = min(len(column), len(new_values))
+		old_values = column.values[:count]
+		column.values[:count] = new_values[:count]
+		if self._observers:
+			for index, old_value, value in zip(column.indices, old_values, new_values):
+				self._notify_replace(index, key, old_value, value)
+		if len(new_values) > count:
+			self.addall(key, new_values[count:])
+		elif len(column) > count:
+			removed = [column.pop() for _ in range(len(column) - count)]
+			for index, _ in removed:
+				del self._items[index]
+			if not column:
+				del self._map[key]
+			if self._observers:
+				for index, value in reversed(removed):
+					self._notify_remove(index, key, value)
+
+	@override
+	def getall[TT](self, key: TK, default: TT = _SENTINEL) -> list[TV] | TT:  # type: ignore
+		if (column := self._get_all_or_none(key)) is not None:
+			return column.values.tolist()
+		elif default is _SENTINEL:
+			return []
+		else:
+			return default
+
+	def getall_view(self, key: TK) -> memoryview:
+		"""
+		Returns: A read-only zero-copy memoryview of all values for <key>. The view is empty if <key> is not in the
+		dictionary.
+
+		Note: While the memoryview has not been released, values cannot be added to, or removed from <key>. Trying so
+		raises a BufferError.
+		"""
+		if (column := self._get_all_or_none(key)) is not None:
+			return memoryview(column.values).toreadonly()
+		return memoryview(array(self._value_type)).toreadonly()
+
+	@override
+	def popall[TT](self, key: TK, /, default: TT = _SENTINEL) -> list[TV] | TT:  # type: ignore
+		if (column := self._get_all_or_none(key)) is not None:
+			items = self._items
+			for index in column.indices:
+				del items[index]
+			del self._map[key]
+			if self._observers:
+				for index, value in column:
+					self._notify_remove(index, key, value)
+			return column.values.tolist()
+		elif default is not _SENTINEL:
+			return default
+		raise KeyError(key)
+
+	@override
+	def _popitem[TT](self, default: TT, *, last: bool) -> tuple[TK, TV] | TT:
+		items = self._items
+		if not items:
+			if default is not _SENTINEL:
+				return default
+			raise KeyError("dictionary is empty")
+
+		# look the item up first, because popping from the column might raise a BufferError.
+		index, key = next(reversed(items.items())) if last else next(iter(items.items()))
+		column = self._map[key]
+		popped = column.pop() if last else column.pop(0)
+		assert popped[0] == index, _DESYNCED_ERROR_MSG
+		del items[index]
+		if not column:
+			del self._map[key]
+		if self._observers:
+			self._notify_remove(index, key, popped[1])
+		return key, popped[1]
+
+	@override
+	def _popitems(self, count: int, out: list[tuple[TK, TV]], *, last: bool) -> list[tuple[TK, TV]]:
+		items = self._items
+		count = min(count, len(items))
+		if count <= 0:
+			return out
+		# find the items first, because removing the values from the columns might fail:
+		run = list(islice(reversed(items.items()) if last else items.items(), count))
+		counts = Counter(map(itemgetter(1), run))
+		s_map = self._map
+		removed: list[tuple[_TypedColumn, array, array]] = []
+		try:
+			for key, key_count in counts.items():
+				column = s_map[key]
+				part = slice(len(column) - key_count, None) if last else slice(None, key_count)
+				values = column.values[part]
+				del column.values[part]  # might raise a BufferError, see getall_view().
+				indices = column.indices[part]
+				del column.indices[part]
+				removed.append((column, indices, values))
+		except BufferError:
+			# put the removed values back, so that the columns and _items don't de-sync:
+			for column, indices, values in removed:
+				part = slice(len(column), None) if last else slice(0, 0)
+				column.values[part] = values
+				column.indices[part] = indices
+			raise
+		# the n-th occurrence of a key in <run> is the n-th removed value of that key (from the back, if <last>):
+		removed_values = {key: reversed(values) if last else iter(values) for key, (_, _, values) in zip(counts, removed)}
+		popped = [(key, next(removed_values[key])) for _, key in run]
+		if last:
+			for _ in range(count):
+				items.popitem()
+		else:
+			self._items_pop_firsts(count)
+		for key, (column, _, _) in zip(counts, removed):
+			if not column:
+				del s_map[key]
+		out.extend(popped)
+		if self._observers:
+			for (index, _), item in zip(run, popped):
+				self._notify_remove(index, *item)
+		return out
+
+	@override
+	def contains_value(self, value: TV) -> bool:
+		return any(value in column.values for column in self._map.values())
+
+	@override
+	def items(self) -> _TypedItemsView[TK, TV]:  # type: ignore
+		return _TypedItemsView(self)
+
+	@override
+	def keys(self) -> _TypedKeysView[TK]:  # type: ignore
+		return _TypedKeysView(self)
+
+	@override
+	def unique_keys(self) -> _TypedUniqueKeysView[TK]:
+		return _TypedUniqueKeysView(self)
+
+	@override
+	def values(self) -> _TypedValuesView[TV]:  # type: ignore
+		return _TypedValuesView(self)
+
+	def _iter_items(self) -> Iterator[tuple[TK, TV]]:
+		# the n-th occurrence of a key in _items is the n-th entry in its column.
+		s_map = self._map
+		positions: dict[TK, int] = {}
+		for key in self._items.values():
+			pos = positions.get(key, 0)
+			positions[key] = pos + 1
+			yield key, s_map[key].values[pos]
+
+	@override
+	def _iter_indexed_items(self) -> Iterator[tuple[int, TK, TV]]:
+		return ((index, *item) for index, item in zip(self._items, self._iter_items()))
+
+	def _iter_items_reversed(self) -> Iterator[tuple[TK, TV]]:
+		s_map = self._map
+		positions: dict[TK, int] = {}
+		for key in reversed(self._items.values()):
+			pos = positions.get(key, 0) - 1
+			positions[key] = pos
+			yield key, s_map[key].values[pos]
+
+	@override
+	def __repr__(self) -> str:
+		return f'{self.__class__.__name__}({list(self.items())!r}, value_type={self._value_type!r})'
+
+
+class _TypedItemsView[TK: Hashable, TV](_ItemsView[TK, TV]):
+	_impl: TypedOrderedMultiDict
+
+	def __iter__(self) -> Iterator[tuple[TK, TV]]:
+		return self._impl._iter_items()
+
+	def __reversed__(self) -> Iterator[tuple[TK, TV]]:
+		return self._impl._iter_items_reversed()
+
+
+class _TypedValuesView[TV](_ValuesView[TV]):
+	_impl: TypedOrderedMultiDict
+
+	def __contains__(self, value: TV) -> bool:
+		return self._impl.contains_value(value)
+
+	def __iter__(self) -> Iterator[TV]:
+		return (item[1] for item in self._impl._iter_items())
+
+	def __reversed__(self) -> Iterator[TV]:
+		return (item[1] for item in self._impl._iter_items_reversed())
+
+
+class _TypedKeysView[TK: Hashable](_KeysView[TK]):
+
+	def __iter__(self) -> Iterator[TK]:
+		return iter(self._items)
+
+	def __reversed__(self) -> Iterator[TK]:
+		return reversed(self._items)
+
+
+class _TypedUniqueKeysView[TK: Hashable](_UniqueKeysView[TK]):
+
+	def __iter__(self) -> Iterator[TK]:
+		return iter(dict.fromkeys(self._items))
+
+	def __reversed__(self) -> Iterator[TK]:
+		return reversed(dict.fromkeys(self._items))
+
+
+__all__ = ['TypedOrderedMultiDict']
@@ -0,0 +1,124 @@
+import sys
+from os.path import dirname, join
+import random
+from typing import Any
+
+try:
+	from better_orderedmultidict import OrderedMultiDict, DenseIntOrderedMultiDict
+except ImportError:
+	sys.path.insert(0, join(dirname(dirname(__file__)), 'src'))
+	from better_orderedmultidict import OrderedMultiDict, DenseIntOrderedMultiDict
+from performance_helper import *
+
+
+VALUES_COUNT = 500_000
+KEY_COUNT = 100
+
+
+def _check_omd_size(expected_size: int, actual_size: int) -> str | None:
+	return f"expected {expected_size} elements, but got {actual_size}." if (actual_size != expected_size) else None
+
+
+def _key_range(init_list: list[tuple[int, int]]) -> int:
+	return max((k for k, _ in init_list), default=-1) + 1
+
+
+def _getall_all_keys(init_list: list[tuple[int, int]], omd: OrderedMultiDict):
+	getall = omd.getall
+	for k in range(_key_range(init_list)):
+		getall(k)
+
+
+def _pop_all_keys(init_list: list[tuple[int, int]], omd: OrderedMultiDict):
+	pop = omd.pop
+	for k, _ in init_list:
+		pop(k)
+
+
+CREATE_DICT_OPS: dict[str, Operation[list, Any]] = {op.label: op for op in [
+	Operation(
+		label="OrMuDi",
+		prepare=lambda init_list: None,
+		operation=lambda init_list, _: OrderedMultiDict(init_list)
+	),
+	Operation(
+		label="DIOrMuDi",
+		prepare=lambda init_list: _key_range(init_list),
+		operation=lambda init_list, key_range: DenseIntOrderedMultiDict(init_list, key_range=key_range)
+	),
+]}
+
+
+GETALL_OPS: dict[str, Operation[list, Any]] = {op.label: op for op in [
+	Operation(
+		label="OrMuDi",
+		prepare=lambda init_list: OrderedMultiDict(init_list),
+		operation=_getall_all_keys,
+		check_prepared=lambda init_list, omd: _check_omd_size(len(init_list), len(omd)),
+		share_prepared=True
+	),
+	Operation(
+		label="DIOrMuDi",
+		prepare=lambda init_list: DenseIntOrderedMultiDict(init_list, key_range=_key_range(init_list)),
+		operation=_getall_all_keys,
+		check_prepared=lambda init_list, omd: _check_omd_size(len(init_list), len(omd)),
+		share_prepared=True
+	),
+]}
+
+
+POP_OPS: dict[str, Operation[list, Any]] = {op.label: op for op in [
+	Operation(
+		label="OrMuDi",
+		prepare=lambda init_list: OrderedMultiDict(init_list),
+		operation=_pop_all_keys,
+		check_prepared=lambda init_list, omd: _check_omd_size(len(init_list), len(omd)),
+		share_prepared=False
+	),
+	Operation(
+		label="DIOrMuDi",
+		prepare=lambda init_list: DenseIntOrderedMultiDict(init_list, key_range=_key_range(init_list)),
+		operation=_pop_all_keys,
+		check_prepared=lambda init_list, omd: _check_omd_size(len(init_list), len(omd)),
+		share_prepared=False
+	),
+]}
+
+
+LABELS = {
+	"OrMuDi": "OrderedMultiDict",
+	"DIOrMuDi": "DenseIntOrderedMultiDict",
+}
+
+
+TESTS: dict[str, dict[str, Operation[list, Any]]] = {
+	"create": CREATE_DICT_OPS,
+	"getall for every key": GETALL_OPS,
+	"pop until empty": POP_OPS,
+}
+
+
+def run():
+	long_list = [(i, i) for i in range(VALUES_COUNT)]
+	long_list_common_keys = [(random.randrange(KEY_COUNT), i) for i in range(VALUES_COUNT)]
+	inputs = [
+		(f"Dictionary with {VALUES_COUNT} entries with all keys being different", long_list),
+		(f"Dictionary with {VALUES_COUNT} entries, but only {KEY_COUNT} unique keys distributed randomly", long_list_common_keys)
+	]
+
+	result_tables = []
+	for input_name, input in inputs:
+		results = run_tests(((name, list(ops.values())) for name, ops in TESTS.items()), input, repetitions=5, outer_repetitions=2)
+		result_tables.append((input_name, format_results_table(results, lambda r: default_format_results(r, format_result, highlight_fastest=True), lambda label: LABELS.get(label, label))))
+
+	for input_name, result in result_tables:
+		print(f"{input_name}:")
+		print("")
+		print(result)
+		print("")
+
+
+if __name__ == '__main__':
+	if len(sys.argv) > 1:
+		VALUES_COUNT = int(sys.argv[1])
+	run()
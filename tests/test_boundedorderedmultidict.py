@@ -0,0 +1,144 @@
+import asyncio
+import json
+import os
+import pickle
+import tempfile
+from unittest import TestCase
+
+try:
+	import numpy
+except ImportError:
+	numpy = None
+
+from better_orderedmultidict import BoundedOrderedMultiDict, DeOrderedMultiDict, OrderedMultiDict
+
+
+class TestBoundedOrderedMultiDict(TestCase):
+
+	def test_unbounded(self):
+		items = [(i % 7, i) for i in range(50)]
+		omd = BoundedOrderedMultiDict(items)
+		self.assertEqual(list(omd.items()), items)
+		self.assertEqual(omd.eviction_count, 0)
+		self.assertEqual(omd.weight, 50)
+
+	def test_max_items(self):
+		evicted = []
+		omd = BoundedOrderedMultiDict(max_items=3, on_evict=lambda k, v: evicted.append((k, v)))
+		for i in range(10):
+			omd.add(i % 2, i)
+			self.assertLessEqual(len(omd), 3)
+		self.assertEqual(list(omd.items()), [(1, 7), (0, 8), (1, 9)])
+		self.assertEqual(evicted, [(i % 2, i) for i in range(7)])
+		self.assertEqual(omd.eviction_count, 7)
+
+		omd.extend([('a', 1), ('b', 2)])
+		self.assertEqual(list(omd.items()), [(1, 9), ('a', 1), ('b', 2)])
+		omd.addall('c', [3, 33, 333, 3333])
+		self.assertEqual(list(omd.items()), [('c', 33), ('c', 333), ('c', 3333)])
+		omd.update([('c', 'x'), ('d', 4), ('e', 5), ('f', 6)])
+		self.assertEqual(list(omd.items()), [('d', 4), ('e', 5), ('f', 6)])
+		omd.move_to_end('d')
+		self.assertEqual(list(omd.items()), [('e', 5), ('f', 6), ('d', 4)])
+		self.assertRaises(ValueError, lambda: BoundedOrderedMultiDict(max_items=0))
+
+	def test_update_from_generator(self):
+		omd = BoundedOrderedMultiDict([('a', 0), ('x', 0)], max_items=3, max_per_key=2)
+
+		def items():
+			for i in range(1000):
+				self.assertLessEqual(len(omd), 3)
+				yield 'abcde'[i % 5], i
+
+		omd.update(items())
+		self.assertLessEqual(len(omd), 3)
+		self.assertEqual(list(omd.items()), [('c', 997), ('d', 998), ('e', 999)])
+		omd.update([('e', 1), ('e', 2), ('e', 3)])
+		self.assertEqual(list(omd.items()), [('d', 998), ('e', 2), ('e', 3)])
+
+	def test_max_per_key(self):
+		omd = BoundedOrderedMultiDict([('a', 1), ('b', 2), ('a', 11), ('a', 111)], max_per_key=2)
+		self.assertEqual(list(omd.items()), [('b', 2), ('a', 11), ('a', 111)])
+		omd.addall('b', [22, 222, 2222])
+		self.assertEqual(list(omd.items()), [('a', 11), ('a', 111), ('b', 222), ('b', 2222)])
+		omd.replaceall('a', [1, 2, 3])
+		self.assertEqual(list(omd.items()), [('a', 2), ('b', 222), ('b', 2222), ('a', 3)])
+		self.assertEqual(omd.eviction_count, 4)
+		self.assertEqual(BoundedOrderedMultiDict(DeOrderedMultiDict([(1, 1), (1, 2), (1, 3)]), max_per_key=1).getall(1), [3])
+
+	def test_max_weight(self):
+		omd = BoundedOrderedMultiDict(max_weight=10, weigher=lambda k, v: len(v))
+		omd.add('a', 'xxxx')
+		omd.add('b', 'yyyy')
+		self.assertEqual(omd.weight, 8)
+		omd.add('c', 'zzz')
+		self.assertEqual(list(omd.items()), [('b', 'yyyy'), ('c', 'zzz')])
+		self.assertEqual(omd.weight, 7)
+		omd.replaceall('c', ['zzzzzzz'])
+		self.assertEqual(list(omd.items()), [('c', 'zzzzzzz')])
+		omd.popall('c')
+		self.assertEqual(omd.weight, 0)
+		omd.add('d', 'x' * 11)  # too heavy for the dictionary.
+		self.assertEqual(len(omd), 0)
+		self.assertEqual(omd.weight, 0)
+
+		omd.extend([('a', 'xxxx'), ('b', 'yyyy')])
+		copy = omd.copy()
+		self.assertEqual(copy.weight, 8)
+		copy.add('c', 'zzz')
+		self.assertEqual(list(copy.items()), [('b', 'yyyy'), ('c', 'zzz')])
+		self.assertEqual(list(omd.items()), [('a', 'xxxx'), ('b', 'yyyy')])
+
+	def test_lru_and_counters(self):
+		omd = BoundedOrderedMultiDict([('a', 1), ('b', 2), ('a', 11)], max_items=3, lru=True)
+		self.assertEqual(omd['b'], 2)
+		self.assertEqual(list(omd.items()), [('a', 1), ('a', 11), ('b', 2)])
+		self.assertEqual(omd.getall('a'), [1, 11])
+		self.assertEqual(list(omd.items()), [('b', 2), ('a', 1), ('a', 11)])
+		self.assertIsNone(omd.get('x'))
+		self.assertRaises(KeyError, lambda: omd['x'])
+		omd.add('c', 3)
+		self.assertEqual(list(omd.items()), [('a', 1), ('a', 11), ('c', 3)])
+		self.assertEqual((omd.hit_count, omd.miss_count, omd.eviction_count), (2, 2, 1))
+
+		fifo = BoundedOrderedMultiDict([('a', 1), ('b', 2)], max_items=2)
+		self.assertEqual(fifo.getfirst('a'), 1)
+		fifo.add('c', 3)
+		self.assertEqual(list(fifo.items()), [('b', 2), ('c', 3)])
+		self.assertEqual((fifo.hit_count, fifo.miss_count), (1, 0))
+
+	def test_factories(self):
+		items = [('a', '1'), ('b', '2'), ('a', '3')]
+
+		async def aiter_items():
+			for item in items:
+				yield item
+
+		def check(result):
+			self.assertIs(type(result), BoundedOrderedMultiDict)
+			self.assertEqual(result.max_items, 2)
+			self.assertEqual(list(result.items()), items[1:])
+			self.assertEqual(result.eviction_count, 1)
+
+		omd = OrderedMultiDict(items)
+		check(BoundedOrderedMultiDict.concat(omd, max_items=2))
+		check(BoundedOrderedMultiDict.merge_many([omd], key=lambda item: 0, max_items=2))
+		check(asyncio.run(BoundedOrderedMultiDict.from_async(aiter_items(), max_items=2)))
+		with tempfile.TemporaryDirectory() as directory:
+			path = os.path.join(directory, 'data.tsv')
+			with open(path, 'w') as file:
+				file.write(''.join(f'{k}\t{v}\n' for k, v in items))
+			check(BoundedOrderedMultiDict.from_delimited(path, max_items=2))
+			path = os.path.join(directory, 'data.jsonl')
+			with open(path, 'w') as file:
+				file.write(''.join(json.dumps([k, v]) + '\n' for k, v in items))
+			check(BoundedOrderedMultiDict.from_jsonl(path, key_field=0, value_field=1, max_items=2))
+		if numpy is not None:
+			check(BoundedOrderedMultiDict.from_arrays([0, 1, 0], ['1', '2', '3'], ['a', 'b'], max_items=2))
+
+	def test_pickle(self):
+		omd = BoundedOrderedMultiDict([(i % 3, i) for i in range(10)], max_items=5, max_per_key=2)
+		loaded = pickle.loads(pickle.dumps(omd))
+		self.assertEqual(loaded, omd)
+		self.assertEqual((loaded.max_items, loaded.max_per_key, loaded.max_weight), (5, 2, None))
+		self.assertEqual(repr(loaded), f'BoundedOrderedMultiDict({list(omd.items())!r}, max_items=5, max_per_key=2)')
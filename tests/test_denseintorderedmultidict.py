@@ -0,0 +1,136 @@
+import asyncio
+import json
+import os
+import pickle
+import tempfile
+from unittest import TestCase
+
+try:
+	import numpy
+except ImportError:
+	numpy = None
+
+from better_orderedmultidict import OrderedMultiDict, DenseIntOrderedMultiDict
+
+
+class TestDenseIntOrderedMultiDict(TestCase):
+
+	def setUp(self):
+		self.list_inits = [
+			[], [(1, 1)], [(1, '1'), (2, 2)], [(1, 7), (2, 2), (1, 1)],
+			[(1, 1), (1, 1), (1, '1')], [(0, None), (0, None)],
+			[(3, 1), (1, None), (3, None), (3, 1), (1, None)],
+		]
+
+	def test_init(self):
+		for init in self.list_inits:
+			omd = DenseIntOrderedMultiDict(init, key_range=4)
+			self.assertEqual(list(omd.items()), init)
+			self.assertEqual(list(omd.unique_keys()), list(dict(init)))
+			self.assertEqual(len(omd.unique_keys()), len(dict(init)))
+			self.assertEqual(list(DenseIntOrderedMultiDict(OrderedMultiDict(init), key_range=4).items()), init)
+			self.assertEqual(DenseIntOrderedMultiDict(omd, key_range=4), omd)
+			self.assertEqual(list(DenseIntOrderedMultiDict(omd, key_range=5).items()), init)
+			self.assertEqual(list(OrderedMultiDict(omd).items()), init)
+
+	def test_invalid_keys(self):
+		omd = DenseIntOrderedMultiDict([(0, 0)], key_range=4)
+		self.assertRaises(ValueError, lambda: omd.add(4, 4))
+		self.assertRaises(ValueError, lambda: omd.add(-1, -1))
+		self.assertRaises(TypeError, lambda: omd.add('1', 1))
+		self.assertRaises(ValueError, lambda: omd.extend([(1, 1), (5, 5)]))
+		self.assertRaises(TypeError, lambda: omd.extend([(2, 2), (None, 5)]))
+		self.assertRaises(ValueError, lambda: omd.addall(7, [1, 2]))
+		self.assertEqual(list(omd.items()), [(0, 0), (1, 1), (2, 2)])
+		for nonkey in [4, -1, '1', None, 1.5]:
+			self.assertNotIn(nonkey, omd)
+			self.assertEqual(omd.getall(nonkey), [])
+			self.assertIsNone(omd.get(nonkey))
+			self.assertRaises(KeyError, lambda: omd.pop(nonkey))
+			self.assertRaises(KeyError, lambda: omd.popall(nonkey))
+
+	def test_add_and_pop(self):
+		omd = DenseIntOrderedMultiDict(key_range=3)
+		omd.add(2, 'c')
+		omd.addall(0, ['a', 'aa'])
+		omd.add(2, 'cc')
+		omd[1] = 'b'
+		self.assertEqual(list(omd.items()), [(2, 'c'), (0, 'a'), (0, 'aa'), (2, 'cc'), (1, 'b')])
+		self.assertEqual(omd.getall(2), ['c', 'cc'])
+		self.assertEqual(omd.popfirstitem(), (2, 'c'))
+		self.assertEqual(omd.poplastitem(), (1, 'b'))
+		self.assertEqual(omd.popfirst(0), 'a')
+		self.assertEqual(omd.popall(2), ['cc'])
+		self.assertEqual(list(omd.items()), [(0, 'aa')])
+		self.assertEqual(len(omd._map), 1)
+		omd.clear()
+		self.assertFalse(omd)
+		self.assertEqual(len(omd._map), 0)
+
+	def test_update(self):
+		omd = DenseIntOrderedMultiDict([(0, 'a'), (1, 'b'), (0, 'c')], key_range=4)
+		omd.update(item for item in [(0, 'd'), (3, 'e'), (0, 'f')])
+		self.assertEqual(list(omd.items()), [(1, 'b'), (0, 'd'), (3, 'e'), (0, 'f')])
+		self.assertRaises(ValueError, lambda: omd.update([(4, 'g')]))
+
+	def test_concat(self):
+		omd1 = DenseIntOrderedMultiDict([(0, 'a'), (1, 'b')], key_range=2)
+		omd2 = DenseIntOrderedMultiDict([(3, 'c'), (0, 'd')], key_range=4)
+		result = DenseIntOrderedMultiDict.concat(omd2, omd1)
+		self.assertEqual(result.key_range, 4)
+		self.assertEqual(list(result.items()), [(3, 'c'), (0, 'd'), (0, 'a'), (1, 'b')])
+		self.assertEqual(result.getall(0), ['d', 'a'])
+		self.assertRaises(ValueError, lambda: omd1.__iadd__(omd2))
+		self.assertEqual(list(omd1.items()), [(0, 'a'), (1, 'b')])
+
+	def test_factories(self):
+		items = [(3, 'c'), (0, 'a'), (3, 'cc')]
+
+		async def aiter_items():
+			for item in items:
+				yield item
+
+		def check(result):
+			self.assertIs(type(result), DenseIntOrderedMultiDict)
+			self.assertEqual(result.key_range, 4)
+			self.assertEqual(list(result.items()), items)
+
+		omd = OrderedMultiDict(items)
+		check(DenseIntOrderedMultiDict.concat(omd, key_range=4))
+		check(DenseIntOrderedMultiDict.merge_many([omd], key=lambda item: 0, key_range=4))
+		check(asyncio.run(DenseIntOrderedMultiDict.from_async(aiter_items(), key_range=4)))
+		with tempfile.TemporaryDirectory() as directory:
+			path = os.path.join(directory, 'data.jsonl')
+			with open(path, 'w') as file:
+				file.write(''.join(json.dumps({'key': k, 'value': v}) + '\n' for k, v in items))
+			check(DenseIntOrderedMultiDict.from_jsonl(path, key_range=4))
+		if numpy is not None:
+			check(DenseIntOrderedMultiDict.from_arrays([0, 1, 0], ['c', 'a', 'cc'], [3, 0], key_range=4))
+		self.assertRaises(TypeError, lambda: DenseIntOrderedMultiDict.concat(omd))  # key_range is missing
+		self.assertRaises(ValueError, lambda: DenseIntOrderedMultiDict.concat(omd, key_range=2))
+
+	def test_pickle(self):
+		omd = DenseIntOrderedMultiDict([(3, 'c'), (0, 'a'), (3, 'cc')], key_range=4)
+		for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+			unpickled = pickle.loads(pickle.dumps(omd, protocol))
+			self.assertEqual(unpickled, omd)
+			self.assertEqual(unpickled.key_range, 4)
+			self.assertEqual(unpickled.getall(3), ['c', 'cc'])
+
+	def test_copy(self):
+		for init in self.list_inits:
+			omd1 = DenseIntOrderedMultiDict(init, key_range=4)
+			omd2 = omd1.copy()
+			self.assertEqual(omd1._map, omd2._map)
+			omd2.add(0, 'x')
+			self.assertEqual(list(omd1.items()), init)
+			self.assertEqual(list(omd2.items()), init + [(0, 'x')])
+
+	def test_sorted_key_index(self):
+		omd = DenseIntOrderedMultiDict([(3, 'c'), (1, 'a')], key_range=5)
+		omd.create_sorted_key_index()
+		omd.extend([(4, 'd'), (2, 'b')])
+		omd.add(0, '-')
+		self.assertEqual(omd.items_in_range(1, 3), [(3, 'c'), (1, 'a'), (2, 'b')])
+		omd.popall(3)
+		self.assertEqual(omd.copy().irange(), [0, 1, 2, 4])
@@ -0,0 +1,226 @@
+import asyncio
+import json
+import os
+import pickle
+import tempfile
+from unittest import TestCase
+
+try:
+	import numpy
+except ImportError:
+	numpy = None
+
+from better_orderedmultidict import ExpiringOrderedMultiDict, OrderedMultiDict
+
+
+class FakeClock:
+	def __init__(self):
+		self.now = 0.0
+
+	def __call__(self) -> float:
+		return self.now
+
+
+class TestExpiringOrderedMultiDict(TestCase):
+
+	def setUp(self):
+		self.clock = FakeClock()
+
+	def test_no_ttl(self):
+		items = [(i % 7, i) for i in range(50)]
+		omd = ExpiringOrderedMultiDict(items, clock=self.clock)
+		self.clock.now = 1e9
+		self.assertEqual(omd.expire_now(), 0)
+		self.assertEqual(list(omd.items()), items)
+
+	def test_ttl(self):
+		omd = ExpiringOrderedMultiDict(default_ttl=10, clock=self.clock)
+		omd.add('a', 1)
+		omd.add('b', 2, ttl=5)
+		omd.add('c', 3, ttl=20)
+		self.clock.now = 4.9
+		self.assertEqual(len(omd), 3)
+		self.clock.now = 5
+		self.assertEqual(omd.getall('b'), [])
+		self.assertNotIn('b', omd)
+		self.assertEqual(len(omd), 2)
+		self.clock.now = 10
+		self.assertRaises(KeyError, lambda: omd['a'])
+		self.clock.now = 15
+		omd.extend([('a', 11), ('d', 4)])  # expire at 25
+		self.assertEqual(list(omd.items()), [('c', 3), ('a', 11), ('d', 4)])
+		self.clock.now = 20
+		self.assertEqual(omd.get('c'), None)
+		self.assertEqual(list(omd.items()), [('a', 11), ('d', 4)])
+		self.clock.now = 30
+		self.assertEqual(omd.expire_now(), 2)
+		self.assertEqual(list(omd.items()), [])
+		self.assertFalse(omd)
+
+	def test_iteration(self):
+		omd = ExpiringOrderedMultiDict([('a', 1), ('b', 2)], default_ttl=10, clock=self.clock)
+		omd.add('c', 3, ttl=20)
+		omd.add('a', 4, ttl=20)
+		self.clock.now = 10
+		# iterations remove the expired items before they start:
+		self.assertEqual(list(omd), ['c', 'a'])
+		omd.add('b', 5, ttl=1)
+		self.clock.now = 11
+		self.assertEqual(sorted(omd), ['a', 'c'])
+		omd.add('b', 5, ttl=1)
+		self.clock.now = 12
+		self.assertEqual(list(omd.items()), [('c', 3), ('a', 4)])
+		omd.add('b', 5, ttl=1)
+		self.clock.now = 13
+		self.assertEqual(list(reversed(omd.values())), [4, 3])
+		omd.add('b', 5, ttl=1)
+		self.clock.now = 14
+		self.assertEqual(list(omd.unique_keys()), ['c', 'a'])
+		omd.add('b', 5, ttl=1)
+		self.clock.now = 15
+		self.assertEqual(len(omd.keys()), 2)
+		self.assertNotIn('b', omd.keys())
+
+		# items that expire during an iteration are removed, and the iteration skips them:
+		omd.add('b', 5, ttl=1)
+		seen = []
+		for key in omd:
+			self.clock.now = 16
+			seen.append((key, len(omd), omd.get('b')))
+		self.assertEqual(seen, [('c', 2, None), ('a', 2, None)])
+		omd.add('b', 6, ttl=1)
+		omd.add('d', 7, ttl=10)
+		seen = []
+		for value in reversed(omd.values()):
+			self.clock.now = 17
+			seen.append((value, len(omd)))
+		self.assertEqual(seen, [(7, 3), (4, 3), (3, 3)])
+
+		# a partly consumed iterator that is kept alive does not keep items from expiring:
+		omd.add('b', 8, ttl=1)
+		omd.add('e', 9, ttl=20)
+		iterator = iter(omd.items())
+		self.assertEqual(next(iterator), ('c', 3))
+		self.clock.now = 18
+		self.assertEqual(len(omd), 4)
+		self.assertEqual(list(iterator), [('a', 4), ('d', 7), ('e', 9)])
+		iterator = reversed(omd.keys())
+		self.assertEqual(next(iterator), 'e')
+		self.clock.now = 27
+		self.assertEqual(len(omd), 1)
+		self.assertEqual(list(iterator), [])
+
+	def test_pop(self):
+		omd = ExpiringOrderedMultiDict(default_ttl=10, clock=self.clock)
+		omd.extend([('a', 1), ('b', 2)])
+		self.clock.now = 5
+		omd.extend([('a', 3), ('b', 4), ('c', 5), ('c', 6)])
+		self.clock.now = 10
+		self.assertEqual(omd.popfirstitem(), ('a', 3))
+		self.assertEqual(omd.popfirst('b'), 4)
+		omd.extend([('a', 1), ('b', 2)])
+		self.clock.now = 15
+		self.assertEqual(omd.popall('a', []), [1])
+		self.assertEqual(omd.drain_until(lambda k, v: False), [('b', 2)])
+		self.assertFalse(omd)
+
+	def test_removed_and_replaced_items(self):
+		omd = ExpiringOrderedMultiDict(default_ttl=10, clock=self.clock)
+		for i in range(1000):
+			omd.add(i % 3, i)
+			omd.popfirstitem()
+		# the heap doesn't grow with removed items:
+		self.assertLessEqual(len(omd._expiry.heap), 100)
+		omd.clear()
+		omd.extend([('a', 1), ('b', 2), ('a', 11)])
+		self.clock.now = 5
+		omd.replaceall('a', ['x', 'y', 'z'])  # 'x' and 'y' keep their deadlines, 'z' gets a new one.
+		omd.add('c', 3)
+		self.clock.now = 10
+		self.assertEqual(omd.expire_now(), 3)
+		self.assertEqual(list(omd.items()), [('a', 'z'), ('c', 3)])
+		omd.popall('a')
+		self.clock.now = 15
+		self.assertEqual(omd.expire_now(), 1)
+
+	def test_moved_items_keep_their_deadline(self):
+		omd = ExpiringOrderedMultiDict(clock=self.clock)
+		omd.add('a', 1, ttl=1)
+		omd.add('b', 2, ttl=2)
+		omd.add('c', 3)
+		omd.add('a', 11, ttl=4)
+		omd.move_to_end('a')
+		omd.move_to_end('b')
+		self.assertEqual(list(omd.items()), [('c', 3), ('a', 1), ('a', 11), ('b', 2)])
+		self.clock.now = 1
+		self.assertEqual(omd.getall('a'), [11])
+		self.clock.now = 2
+		self.assertEqual(omd.expire_now(), 1)
+		self.assertEqual(list(omd.keys()), ['c', 'a'])
+		self.clock.now = 4
+		self.assertEqual(omd.expire_now(), 1)
+		self.assertEqual(list(omd.items()), [('c', 3)])
+
+	def test_factories(self):
+		items = [('a', '1'), ('b', '2'), ('a', '3')]
+
+		async def aiter_items():
+			for item in items:
+				yield item
+
+		def check(result):
+			self.assertIs(type(result), ExpiringOrderedMultiDict)
+			self.assertEqual(result.default_ttl, 5)
+			self.assertIs(result.clock, self.clock)
+			self.assertEqual(list(result.items()), items)
+			self.clock.now += 5
+			self.assertEqual(list(result.items()), [])
+
+		omd = OrderedMultiDict(items)
+		check(ExpiringOrderedMultiDict.concat(omd, default_ttl=5, clock=self.clock))
+		check(ExpiringOrderedMultiDict.merge_many([omd], key=lambda item: 0, default_ttl=5, clock=self.clock))
+		check(asyncio.run(ExpiringOrderedMultiDict.from_async(aiter_items(), default_ttl=5, clock=self.clock)))
+		with tempfile.TemporaryDirectory() as directory:
+			path = os.path.join(directory, 'data.tsv')
+			with open(path, 'w') as file:
+				file.write(''.join(f'{k}\t{v}\n' for k, v in items))
+			check(ExpiringOrderedMultiDict.from_delimited(path, default_ttl=5, clock=self.clock))
+			path = os.path.join(directory, 'data.jsonl')
+			with open(path, 'w') as file:
+				file.write(''.join(json.dumps({'key': k, 'value': v}) + '\n' for k, v in items))
+			check(ExpiringOrderedMultiDict.from_jsonl(path, default_ttl=5, clock=self.clock))
+		if numpy is not None:
+			check(ExpiringOrderedMultiDict.from_arrays([0, 1, 0], ['1', '2', '3'], ['a', 'b'], default_ttl=5, clock=self.clock))
+
+	def test_recover(self):
+		with tempfile.TemporaryDirectory() as directory:
+			omd = ExpiringOrderedMultiDict(default_ttl=10, clock=self.clock)
+			omd.extend([('a', 1), ('b', 2), ('a', 3)])
+			omd.popfirstitem()
+			omd.enable_journal(directory)
+			omd.add('c', 4)
+			omd.disable_journal()
+			recovered = ExpiringOrderedMultiDict.recover(directory)
+			recovered.disable_journal()
+			self.assertEqual(list(recovered.items()), [('b', 2), ('a', 3), ('c', 4)])
+			# the deadlines follow the items to their restored indices:
+			self.assertEqual(sorted(recovered._expiry.deadlines), list(recovered._items))
+			recovered.clock.now += 10  # the clock was pickled with the dictionary.
+			self.assertEqual(len(recovered), 0)
+			self.assertEqual(list(recovered.items()), [])
+
+	def test_copy_and_pickle(self):
+		omd = ExpiringOrderedMultiDict(default_ttl=10, clock=self.clock)
+		omd.add('a', 1, ttl=5)
+		omd.add('b', 2)
+		copy = omd.copy()
+		self.assertEqual(copy, omd)
+		self.clock.now = 5
+		self.assertEqual(copy.expire_now(), 1)
+		self.assertEqual(list(copy.items()), [('b', 2)])
+		self.assertEqual(len(omd), 1)
+
+		loaded = pickle.loads(pickle.dumps(ExpiringOrderedMultiDict([('x', 1)], default_ttl=10)))
+		self.assertEqual(loaded.default_ttl, 10)
+		self.assertEqual(list(loaded.items()), [('x', 1)])
+		self.assertEqual(len(loaded._expiry.deadlines), 1)
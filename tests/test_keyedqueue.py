@@ -0,0 +1,146 @@
+import asyncio
+import queue
+import threading
+from unittest import TestCase
+
+from better_orderedmultidict import AsyncKeyedQueue, KeyedQueue, ThreadSafeKeyedQueue
+
+
+class TestKeyedQueue(TestCase):
+
+	def test_round_robin(self):
+		q = KeyedQueue([('a', 1), ('a', 2), ('a', 3), ('b', 4), ('c', 5), ('c', 6)])
+		self.assertEqual(len(q), 6)
+		self.assertEqual(q.keys(), ['a', 'b', 'c'])
+		self.assertEqual([q.get() for _ in range(4)], [('a', 1), ('b', 4), ('c', 5), ('a', 2)])
+		# 'b' gets its next turn after all other keys:
+		q.put('b', 7)
+		self.assertEqual(q.keys(), ['c', 'a', 'b'])
+		self.assertEqual([q.get() for _ in range(3)], [('c', 6), ('a', 3), ('b', 7)])
+		self.assertFalse(q)
+		self.assertRaises(KeyError, q.get)
+
+	def test_weights(self):
+		q = KeyedQueue(weights={'a': 3}, default_weight=2)
+		for i in range(5):
+			q.put('a', i)
+			q.put('b', i)
+		self.assertEqual(q.weight('a'), 3)
+		self.assertEqual(q.weight('b'), 2)
+		self.assertEqual(q.count('a'), 5)
+		self.assertEqual([key for key, _ in (q.get() for _ in range(10))], list('aaabbaabbb'))
+		self.assertEqual(q.count('a'), 0)
+		self.assertRaises(ValueError, q.set_weight, 'a', 0)
+		self.assertRaises(ValueError, KeyedQueue, default_weight=0)
+
+	def test_values_in_order(self):
+		items = [(i % 7, i) for i in range(100)]
+		q = KeyedQueue(items, weights={3: 4})
+		taken = []
+		while q:
+			taken.append(q.get())
+		self.assertEqual(sorted(taken), sorted(items))
+		for key in range(7):
+			self.assertEqual([v for k, v in taken if k == key], [v for k, v in items if k == key])
+
+
+class TestAsyncKeyedQueue(TestCase):
+
+	def test_get_waits(self):
+		async def main():
+			q = AsyncKeyedQueue()
+			getter = asyncio.create_task(q.get())
+			await asyncio.sleep(0)
+			self.assertFalse(getter.done())
+			q.put_nowait('a', 1)
+			self.assertEqual(await getter, ('a', 1))
+			self.assertRaises(asyncio.QueueEmpty, q.get_nowait)
+
+		asyncio.run(main())
+
+	def test_backpressure(self):
+		async def main():
+			q = AsyncKeyedQueue(maxsize=2)
+			await q.put('a', 1)
+			await q.put('a', 2)
+			self.assertTrue(q.full())
+			self.assertRaises(asyncio.QueueFull, q.put_nowait, 'b', 3)
+			putter = asyncio.create_task(q.put('b', 3))
+			await asyncio.sleep(0)
+			self.assertFalse(putter.done())
+			self.assertEqual(await q.get(), ('a', 1))
+			await putter
+			self.assertEqual([await q.get(), await q.get()], [('a', 2), ('b', 3)])
+
+		asyncio.run(main())
+
+	def test_cancelled_getter(self):
+		async def main():
+			q = AsyncKeyedQueue()
+			cancelled = asyncio.create_task(q.get())
+			getter = asyncio.create_task(q.get())
+			await asyncio.sleep(0)
+			cancelled.cancel()
+			q.put_nowait('a', 1)
+			self.assertEqual(await getter, ('a', 1))
+			self.assertTrue(cancelled.cancelled())
+			self.assertEqual(q.qsize(), 0)
+
+		asyncio.run(main())
+
+	def test_producers_and_consumers(self):
+		async def produce(key):
+			for i in range(50):
+				await q.put(key, i)
+
+		async def consume(taken):
+			for _ in range(100):
+				taken.append(await q.get())
+
+		async def main():
+			taken1, taken2 = [], []
+			await asyncio.gather(*[produce(key) for key in 'abcd'], consume(taken1), consume(taken2))
+			taken = taken1 + taken2
+			self.assertEqual(len(taken), 200)
+			for key in 'abcd':
+				self.assertEqual(sorted(v for k, v in taken if k == key), list(range(50)))
+			self.assertTrue(q.empty())
+
+		q = AsyncKeyedQueue(maxsize=5)
+		asyncio.run(main())
+
+
+class TestThreadSafeKeyedQueue(TestCase):
+
+	def test_nowait_and_timeout(self):
+		q = ThreadSafeKeyedQueue(maxsize=1)
+		self.assertRaises(queue.Empty, q.get_nowait)
+		self.assertRaises(queue.Empty, q.get, timeout=0.01)
+		q.put('a', 1)
+		self.assertTrue(q.full())
+		self.assertRaises(queue.Full, q.put_nowait, 'a', 2)
+		self.assertRaises(queue.Full, q.put, 'a', 2, timeout=0.01)
+		self.assertEqual(q.get(), ('a', 1))
+
+	def test_threads(self):
+		q = ThreadSafeKeyedQueue(maxsize=10, weights={'a': 2})
+		taken = []
+
+		def produce(key):
+			for i in range(200):
+				q.put(key, i)
+
+		def consume():
+			for _ in range(300):
+				taken.append(q.get(timeout=10))
+
+		threads = [threading.Thread(target=produce, args=(key,)) for key in 'abc']
+		threads += [threading.Thread(target=consume) for _ in range(2)]
+		for thread in threads:
+			thread.start()
+		for thread in threads:
+			thread.join()
+		self.assertEqual(len(taken), 600)
+		self.assertTrue(q.empty())
+		for key in 'abc':
+			self.assertEqual(sorted(v for k, v in taken if k == key), list(range(200)))
@@ -1,8 +1,19 @@
+import asyncio
+import copy
+import os
+import pickle
+import shutil
+import tempfile
 from typing import Any, Callable
-from unittest import TestCase
+from unittest import TestCase, skipIf
+
+try:
+	import numpy
+except ImportError:
+	numpy = None
 
 from better_orderedmultidict import OrderedMultiDict, DeOrderedMultiDict
-from better_orderedmultidict._orderedmultidict import OrderedMultiDictBase
+from better_orderedmultidict._orderedmultidict import OrderedMultiDictBase, _CursorIndex, _Fingerprint, _SortedKeyIndex
 
 _unique = object()
 _unique_unused = object()
@@ -125,6 +136,20 @@ class TestOrderedMultiDict(TestCase):
 			filtered_items = [item for item in items if item[0] not in update_keys]
 			self.assertEqual(list(omd.items()), filtered_items + kwargs)
 
+		# update by one-shot iterator (e.g. a generator)
+		for update in self.list_updates:
+			new_items = items_list(update)
+			update_keys = {key for key, _ in new_items}
+			for items, omd in self.get_original_omds():
+				omd.update(item for item in new_items)
+				filtered_items = [item for item in items if item[0] not in update_keys]
+				self.assertEqual(list(omd.items()), filtered_items + new_items)
+
+		# update by itself
+		for items, omd in self.get_original_omds():
+			omd.update(omd)
+			self.assertEqual(list(omd.items()), items)
+
 	def test_expand(self):
 		# update by list & dicts
 		for update in self.list_updates + self.dict_updates:
@@ -153,6 +178,307 @@ class TestOrderedMultiDict(TestCase):
 			omd.extend(**dict(kwargs))
 			self.assertEqual(list(omd.items()), items + kwargs)
 
+	def test_concat(self):
+		omds = [self.OMD(init) for init in self.list_inits]
+		# leave gaps in the indices:
+		for omd in omds:
+			if omd:
+				omd.popfirstitem()
+		expected = [item for omd in omds for item in omd.items()]
+		result = self.OMD.concat(*omds)
+		self.assertIs(type(result), self.OMD)
+		self.assertEqual(list(result.items()), expected)
+		self.assertEqual(list(reversed(result.items())), expected[::-1])
+		for key in result.unique_keys():
+			self.assertEqual(result.getall(key), [v for k, v in expected if k == key])
+		self.assertEqual(list(self.OMD.concat().items()), [])
+		self.assertEqual(list(OrderedMultiDict.concat(DeOrderedMultiDict([(1, 1)]), self.OMD([(1, 11)])).items()), [(1, 1), (1, 11)])
+
+		for (items1, omd1), (items2, omd2) in zip(self.get_original_omds(), self.get_original_omds()[::-1]):
+			self.assertEqual(list((omd1 + omd2).items()), items1 + items2)
+			self.assertEqual(list(omd1.items()), items1)
+			omd1 += omd2
+			self.assertEqual(list(omd1.items()), items1 + items2)
+			omd1 += [(1, 'one')]
+			self.assertEqual(list(omd1.items()), items1 + items2 + [(1, 'one')])
+			omd2 += omd2
+			self.assertEqual(list(omd2.items()), items2 + items2)
+			self.assertRaises(TypeError, lambda: omd1 + [(1, 'one')])
+
+	def test_merge_many(self):
+		omds = [self.OMD([(1, 'a'), (3, 'c'), (5, 'e')]), self.OMD(), self.OMD([(2, 'b'), (3, 'cc'), (6, 'f')]), self.OMD([(0, '_')])]
+		self.assertEqual(list(self.OMD.merge_many(omds).items()), [(0, '_'), (1, 'a'), (2, 'b'), (3, 'c'), (3, 'cc'), (5, 'e'), (6, 'f')])
+		merged = self.OMD.merge_many(omds[::-1], key=lambda item: item[1][0])
+		self.assertEqual(list(merged.items()), [(0, '_'), (1, 'a'), (2, 'b'), (3, 'cc'), (3, 'c'), (5, 'e'), (6, 'f')])
+		self.assertEqual(merged.getall(3), ['cc', 'c'])
+		self.assertEqual(list(self.OMD.merge_many([]).items()), [])
+
+	def test_extend_async(self):
+		items = [(i % 7, str(i)) for i in range(1000)]
+
+		async def aiter_items(items, fail_after=None):
+			for i, item in enumerate(items):
+				if i == fail_after:
+					raise ValueError('stream broken')
+				await asyncio.sleep(0)
+				yield item
+
+		async def main():
+			omd = self.OMD([('a', 1)])
+			await omd.extend_async(aiter_items(items), batch_size=64)
+			self.assertEqual(omd, self.OMD([('a', 1)] + items))
+			omd = await self.OMD.from_async(aiter_items(items), batch_size=1)
+			self.assertIs(type(omd), self.OMD)
+			self.assertEqual(omd, self.OMD(items))
+			self.assertEqual(list((await self.OMD.from_async(aiter_items([]))).items()), [])
+			with self.assertRaises(ValueError):
+				await omd.extend_async(aiter_items(items), batch_size=0)
+
+			# all items received before an error are added:
+			omd = self.OMD()
+			with self.assertRaises(ValueError):
+				await omd.extend_async(aiter_items(items, fail_after=100), batch_size=64)
+			self.assertEqual(omd, self.OMD(items[:100]))
+
+			# other tasks run while loading, and cancelling leaves a consistent dictionary:
+			omd = self.OMD()
+			task = asyncio.create_task(omd.extend_async(aiter_items(items), batch_size=10))
+			while len(omd) < 500:
+				await asyncio.sleep(0)
+			task.cancel()
+			with self.assertRaises(asyncio.CancelledError):
+				await task
+			count = len(omd)
+			self.assertEqual(list(omd.items()), items[:count])
+			self.assertEqual(omd._index, count)
+			omd.extend(items[count:])
+			self.assertEqual(omd, self.OMD(items))
+
+		asyncio.run(main())
+
+	def test_from_delimited(self):
+		lines = [f'key {i % 7}\tx\t{i}\trest\tof the line' for i in range(1000)]
+		expected = [(f'key {i % 7}', str(i)) for i in range(1000)]
+		with tempfile.TemporaryDirectory() as directory:
+			path = os.path.join(directory, 'data.tsv')
+			with open(path, 'w', encoding='utf-8', newline='') as file:
+				file.write('\n'.join(['name\tx\tvalue'] + lines))
+			# small chunks, so that lines are spread across several chunks:
+			omd = self.OMD.from_delimited(path, value_col=2, skip_header=True, chunk_size=100)
+			self.assertIs(type(omd), self.OMD)
+			self.assertEqual(list(omd.items()), expected)
+			omd = self.OMD.from_delimited(path, key_col=2, value_col=0, convert=len, skip_header=True, intern_keys=True)
+			self.assertEqual(list(omd.items()), [(v, len(k)) for k, v in expected])
+
+			# interned keys are shared, '\r\n' line breaks, and columns after the last needed one are not split:
+			with open(path, 'w', encoding='utf-8', newline='') as file:
+				file.write(''.join(f'{k}\r\n' for k, _ in expected))
+			omd = self.OMD.from_delimited(path, sep=' ', key_col=1, value_col=0, intern_keys=True)
+			self.assertEqual(list(omd.items()), [(k[4:], 'key') for k, _ in expected])
+			keys = list(omd.keys())
+			self.assertIs(keys[0], keys[7])
+			self.assertEqual(list(self.OMD.from_delimited(path, sep='y ').items()), [('ke', k[4:]) for k, _ in expected])
+
+			with open(path, 'w') as file:
+				file.write('a\t1\nb\t2\nc\n')
+			with self.assertRaisesRegex(ValueError, 'line 3'):
+				self.OMD.from_delimited(path)
+			self.assertRaises(ValueError, lambda: self.OMD.from_delimited(path, sep=''))
+			# errors of convert are not mistaken for short lines:
+			with open(path, 'w') as file:
+				file.write('a\t1\nb\t\n')
+			self.assertRaises(IndexError, lambda: self.OMD.from_delimited(path, convert=lambda value: value[0]))
+			self.assertRaises(ValueError, lambda: self.OMD.from_delimited(path, key_col=-1))
+			open(path, 'w').close()
+			self.assertEqual(list(self.OMD.from_delimited(path).items()), [])
+
+	def test_from_jsonl(self):
+		import json
+		items = [(f'key {i % 7}', {'n': i}) for i in range(1000)]
+		with tempfile.TemporaryDirectory() as directory:
+			path = os.path.join(directory, 'data.jsonl')
+			with open(path, 'w', encoding='utf-8') as file:
+				for k, v in items:
+					file.write(json.dumps({'user': k, 'event': v}) + '\n')
+				file.write('\n  \n')
+			for chunk_size in (100, 1 << 26):
+				omd = self.OMD.from_jsonl(path, key_field='user', value_field='event', intern_keys=True, chunk_size=chunk_size)
+				self.assertIs(type(omd), self.OMD)
+				self.assertEqual(list(omd.items()), items)
+			self.assertRaisesRegex(ValueError, 'key', lambda: self.OMD.from_jsonl(path))
+
+			with open(path, 'w', encoding='utf-8') as file:
+				file.write('["a", 1]\n[2, "b"]\n["c", 3]\n')
+			self.assertEqual(list(self.OMD.from_jsonl(path, key_field=0, value_field=1).items()), [('a', 1), (2, 'b'), ('c', 3)])
+			with open(path, 'w', encoding='utf-8') as file:
+				file.write('["a", 1]\n["b", 2\n]\n')
+			with self.assertRaisesRegex(ValueError, 'line 2'):
+				self.OMD.from_jsonl(path, key_field=0, value_field=1)
+			with open(path, 'w', encoding='utf-8') as file:
+				file.write('{"key":"a","value":[1\n2]}\n{"key":"b","value":1},{"key":"c","value":2}\n')
+			with self.assertRaisesRegex(ValueError, 'line 1'):
+				self.OMD.from_jsonl(path)
+			with open(path, 'w', encoding='utf-8') as file:
+				file.write('{"key":"a","value":1}\n{"key":"b","value":1},{"key":"c","value":2}\n {"key":"d","value":3} \n')
+			with self.assertRaisesRegex(ValueError, 'line 2'):
+				self.OMD.from_jsonl(path)
+			with open(path, 'w', encoding='utf-8') as file:
+				file.write('{"key":"a","value":1}\n {"key":"b","value":2} \n')
+			self.assertEqual(list(self.OMD.from_jsonl(path).items()), [('a', 1), ('b', 2)])
+			with open(path, 'w', encoding='utf-8') as file:
+				file.write('{"k":"a","v":1}\n\n{"k":"b"}\n')
+			with self.assertRaisesRegex(ValueError, r"line 3: every line must contain a 'k' and a 'v' field"):
+				self.OMD.from_jsonl(path, key_field='k', value_field='v')
+			with open(path, 'w', encoding='utf-8') as file:
+				file.write('{"k":"a","v":1}\n\n{"k":[1],"v":2}\n')
+			for intern_keys in (False, True):
+				with self.assertRaisesRegex(TypeError, r"line 3: .*unhashable"):
+					self.OMD.from_jsonl(path, key_field='k', value_field='v', intern_keys=intern_keys)
+
+	def test_pickle(self):
+		for init in self.list_inits + self.dict_inits:
+			omd = self.OMD(init)
+			if omd:
+				omd.popfirstitem()  # leave a gap in the indices
+			for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+				unpickled = pickle.loads(pickle.dumps(omd, protocol))
+				self.assertIs(type(unpickled), self.OMD)
+				self.assertEqual(list(unpickled.items()), list(omd.items()))
+				for key in omd.unique_keys():
+					self.assertEqual(unpickled.getall(key), omd.getall(key))
+			buffers = []
+			data = pickle.dumps(omd, 5, buffer_callback=buffers.append)
+			self.assertEqual(pickle.loads(data, buffers=buffers), omd)
+			self.assertEqual(self.OMD.loads(omd.dumps()), omd)
+			self.assertEqual(copy.deepcopy(omd), omd)
+		self.assertRaises(TypeError, lambda: self.OMD.loads(pickle.dumps([(1, 1)])))
+
+	def _recover_copy(self, directory: str, name: str, **kwargs) -> OrderedMultiDictBase:
+		# recovering from a copy simulates a crash at this point, without taking over the journal of the running dictionary.
+		copied = os.path.join(os.path.dirname(directory), name)
+		shutil.copytree(directory, copied)
+		return self.OMD.recover(copied, **kwargs)
+
+	def test_journal(self):
+		for init in self.list_inits + self.dict_inits:
+			for snapshot_every in [None, 1, 3]:
+				with tempfile.TemporaryDirectory() as tmp:
+					directory = os.path.join(tmp, 'journal')
+					omd = self.OMD(init)
+					omd.enable_journal(directory, sync_every=2, snapshot_every=snapshot_every)
+					self.assertRaises(ValueError, lambda: omd.enable_journal(directory))
+					omd.extend([(1, 'a'), (2, 'b'), (1, 'c'), ('x', 'd')])
+					omd.replaceall(1, ['A', 'C'])
+					omd.add('y', 'e')
+					omd.popfirst(1)
+					omd.popall(2)
+					omd.update([('x', 'f')])
+					omd.move_to_end('y')
+					omd.sync_journal()
+					recovered = self._recover_copy(directory, 'copy1')
+					self.assertIs(type(recovered), self.OMD)
+					self.assertEqual(list(recovered.items()), list(omd.items()))
+					recovered.disable_journal()
+
+					omd.clear()
+					omd.add(3, 3)
+					omd.disable_journal()
+					recovered = self.OMD.recover(directory)
+					self.assertEqual(list(recovered.items()), [(3, 3)])
+					recovered.add(4, 4)  # the journal stays enabled.
+					recovered.disable_journal()
+					self.assertEqual(list(self.OMD.recover(directory, snapshot_every=None).items()), [(3, 3), (4, 4)])
+
+	def test_journal_crash(self):
+		with tempfile.TemporaryDirectory() as tmp:
+			directory = os.path.join(tmp, 'journal')
+			omd = self.OMD([(1, 1)])
+			omd.enable_journal(directory, sync_every=100, snapshot_every=None)
+			omd.add(2, 2)
+			omd.add(3, 3)
+			# not synced yet:
+			self.assertEqual(list(self._recover_copy(directory, 'copy1').items()), [(1, 1)])
+			omd.sync_journal()
+			path = os.path.join(directory, 'journal.omdj')
+			with open(path, 'r+b') as file:
+				file.truncate(os.path.getsize(path) - 1)  # a torn write of the last record.
+			with open(path, 'rb') as file:
+				old_journal = file.read()
+			recovered = self.OMD.recover(directory)
+			self.assertEqual(list(recovered.items()), [(1, 1), (2, 2)])
+			recovered.add(4, 4)
+			recovered.disable_journal()
+			# a journal from before the last snapshot is ignored:
+			with open(path, 'wb') as file:
+				file.write(old_journal)
+			self.assertEqual(list(self.OMD.recover(directory).items()), [(1, 1), (2, 2)])
+			omd.disable_journal()
+			self.assertRaises(ValueError, lambda: omd.checkpoint_journal())
+			with open(os.path.join(directory, 'snapshot.omd'), 'wb') as file:
+				file.write(b'not a snapshot')
+			self.assertRaises(ValueError, lambda: self.OMD.recover(directory))
+
+	def test_change_log(self):
+		for init in self.list_inits + self.dict_inits:
+			omd = self.OMD(init)
+			self.assertEqual(omd.change_version, 0)
+			subscriber1 = omd.subscribe()
+			subscriber2 = omd.subscribe()
+			replica1 = self.OMD([('stale', 0)])
+			replica2 = OrderedMultiDict()
+			version1 = replica1.apply_changes(pickle.loads(pickle.dumps(omd.changes_since(None))))
+			self.assertEqual(list(replica1.items()), list(omd.items()))
+			version2 = replica2.apply_changes(omd.changes_since(None))
+
+			omd.extend([(1, 'a'), (2, 'b'), (1, 'c')])
+			omd.replaceall(1, ['A'])
+			omd.move_to_end(2)
+			omd.popfirstitem()
+			delta = omd.changes_since(version1)
+			self.assertEqual(delta[0], omd.change_version)
+			version1 = replica1.apply_changes(delta)
+			self.assertEqual(list(replica1.items()), list(omd.items()))
+			omd.acknowledge(subscriber1, version1)
+			self.assertEqual(omd.changes_since(version1), (version1, []))
+
+			omd.clear()
+			omd.add('z', 26)
+			for replica, version in [(replica1, version1), (replica2, version2)]:
+				replica.apply_changes(omd.changes_since(version))
+				self.assertEqual(list(replica.items()), list(omd.items()))
+			self.assertEqual(omd.change_version, version1 + 2)
+
+	def test_change_log_truncation(self):
+		omd = self.OMD([(1, 1)])
+		subscriber1 = omd.subscribe()
+		subscriber2 = omd.subscribe()
+		omd.add(2, 2)
+		omd.add(3, 3)
+		omd.acknowledge(subscriber1, 2)
+		self.assertEqual(len(omd._get_change_log().changes), 2)  # subscriber2 hasn't acknowledged anything.
+		omd.acknowledge(subscriber2, 1)
+		self.assertEqual(len(omd._get_change_log().changes), 1)
+		self.assertEqual(omd.changes_since(1), (2, [(1, 2, 3, 3)]))
+		# the changes since version 0 are gone, so the delta contains the whole dictionary:
+		replica = self.OMD([(0, 0)])
+		self.assertEqual(replica.apply_changes(omd.changes_since(0)), 2)
+		self.assertEqual(list(replica.items()), list(omd.items()))
+		omd.unsubscribe(subscriber2)
+		self.assertEqual(omd._get_change_log().changes, [])
+		self.assertRaises(KeyError, lambda: omd.acknowledge(subscriber2, 2))
+		self.assertRaises(ValueError, lambda: omd.acknowledge(subscriber1, 3))
+		self.assertRaises(ValueError, lambda: omd.changes_since(3))
+		omd.unsubscribe(subscriber1)
+		omd.add(4, 4)
+		self.assertEqual(omd._get_change_log().changes, [])  # nobody is subscribed.
+		self.assertEqual(omd.change_version, 3)
+		replica.popfirst(1)  # replicas must not be modified.
+		omd.subscribe()
+		omd.popfirst(1)
+		self.assertRaises(ValueError, lambda: replica.apply_changes(omd.changes_since(3)))
+		replica.add(5, 5)
+		self.assertRaises(ValueError, lambda: replica.apply_changes((4, [(1, 3, 4, 4)])))
+
 	def test_copy(self):
 		for init in self.list_inits + self.dict_inits:
 			omd1 = self.OMD(init)
@@ -170,11 +496,44 @@ class TestOrderedMultiDict(TestCase):
 			self.assertEqual(list(omd1.items()), items_list(init) + [(77, 3210)])
 			self.assertEqual(list(omd2.items()), items_list(init) + [(2, 2)])
 
+	def test_diff_and_patch(self):
+		inits = self.list_inits + self.dict_inits + [
+			[(1, 1), (2, 2), (1, 11)], [(2, 2), (1, 1), (1, 11)], [(1, 11), (2, 2), (1, 1)], [(1, 1), (1, 11), (2, 2), (3, [])],
+		]
+		for init_a in inits:
+			for init_b in inits:
+				a = self.OMD(init_a)
+				b = self.OMD(init_b)
+				diff = a.diff(b)
+				self.assertEqual(bool(diff), list(a.items()) != list(b.items()))
+				a.patch(diff)
+				self.assertEqual(list(a.items()), list(b.items()))
+				for key in a.unique_keys():
+					self.assertEqual(a.getall(key), b.getall(key))
+
+		a = self.OMD([('a', 1), ('b', 2), ('a', 11), ('c', [3])])
+		b = self.OMD([('a', 1), ('b', 22), ('c', [3]), ('a', 11), ('d', 4)])
+		diff = a.diff(b)
+		self.assertEqual(diff.added, {'b': [22], 'd': [4]})
+		self.assertEqual(diff.removed, {'b': [2]})
+		self.assertEqual(diff.moved, ['a', 'c'])
+		self.assertRaises(ValueError, lambda: b.patch(diff))
+		a.patch(diff)
+		self.assertEqual(list(a.items()), list(b.items()))
+		diff = a.diff(OrderedMultiDict([('a', 11), ('a', 1), ('c', [3]), ('b', 22), ('d', 4)]))
+		self.assertEqual((diff.added, diff.removed, diff.moved), ({}, {}, ['a', 'b', 'c']))
+		self.assertFalse(a.diff(a))
+
 	def test_clear(self):
 		for init in self.list_inits + self.dict_inits:
 			omd = self.OMD(init)
+			cursor = omd.last_cursor()
 			omd.clear()
 			self.assertFalse(omd)
+			# the internal index is not reset on purpose:
+			omd.add('new', 1)
+			self.assertGreater(omd.last_cursor(), cursor)
+			self.assertEqual([item[1:] for item in omd.iter_from(cursor)], [('new', 1)])
 
 	def _test_get(self, getter, idx):
 		for init in self.list_inits + self.dict_inits:
@@ -252,6 +611,47 @@ class TestOrderedMultiDict(TestCase):
 					omd.setall(nonkey, new_values)
 					self.assertEqual(omd.getall(nonkey), new_values)
 
+	def test_replaceall(self):
+		for new_values in self.new_values_lists:
+			for init in self.list_inits:
+				omd = self.OMD(init)
+				for key in omd.unique_keys():
+					old_items = list(omd.items())
+					omd.replaceall(key, new_values)
+					self.assertEqual(omd.getall(key), new_values)
+					# the first values take the places of the old values, the surplus values are added at the end:
+					replacements = iter(new_values)
+					expected = [(k, next(replacements, _unique)) if k == key else (k, v) for k, v in old_items]
+					expected = [item for item in expected if item[1] is not _unique]
+					expected += [(key, v) for v in replacements]
+					self.assertEqual(list(omd.items()), expected)
+				omd = self.OMD(init)  # re-init the omd, so we have a fresh one
+				for nonkey in self.nonkeys:
+					omd.replaceall(nonkey, new_values)
+					self.assertEqual(omd.getall(nonkey), new_values)
+					self.assertEqual(list(omd.items())[len(omd) - len(new_values):], [(nonkey, v) for v in new_values])
+
+	def test_replace(self):
+		omd = self.OMD([(1, 1), (2, 2), (1, 11), (3, 3)])
+		omd.replace(1, 'one')
+		self.assertEqual(list(omd.items()), [(1, 'one'), (2, 2), (3, 3)])
+		omd.replace(3, 'three')
+		omd.replace(4, 'four')
+		self.assertEqual(list(omd.items()), [(1, 'one'), (2, 2), (3, 'three'), (4, 'four')])
+		self.assertEqual(list(reversed(omd.items())), [(4, 'four'), (3, 'three'), (2, 2), (1, 'one')])
+
+	def test_move_to_end(self):
+		for init in self.list_inits:
+			for key in dict(init):
+				omd = self.OMD(init)
+				omd.move_to_end(key)
+				expected = [item for item in init if item[0] != key] + [item for item in init if item[0] == key]
+				self.assertEqual(list(omd.items()), expected)
+				self.assertEqual(list(reversed(omd.items())), expected[::-1])
+			omd = self.OMD(init)
+			for nonkey in self.nonkeys:
+				self.assertRaises(KeyError, lambda: omd.move_to_end(nonkey))
+
 	def test_add(self):
 		for init in self.list_inits:
 			omd = self.OMD(init)
@@ -354,6 +754,86 @@ class TestOrderedMultiDict(TestCase):
 			else:
 				self.assertRaises(KeyError, lambda: omd.poplastitem())
 
+	def test_popfirstitems_and_poplastitems(self):
+		for init in self.list_inits:
+			for count in [0, 1, 2, 5, len(init), len(init) + 1]:
+				omd = self.OMD(init)
+				omd.create_index('id', id)  # an observer
+				self.assertEqual(omd.popfirstitems(count), init[:count])
+				self.assertEqual(list(omd.items()), init[count:])
+				for key in omd.unique_keys():
+					self.assertEqual(omd.getall(key), [v for k, v in init[count:] if k == key])
+				self.assertEqual(len(omd._map), len(set(k for k, _ in init[count:])))
+				self.assertEqual(sum(len(bucket) for bucket in omd._get_value_index('id').buckets.values()), len(omd))
+
+				omd = self.OMD(init)
+				out = [('x', 'y')]
+				self.assertIs(omd.poplastitems(count, out), out)
+				self.assertEqual(out[1:], init[::-1][:count])
+				self.assertEqual(list(omd.items()), init[:max(len(init) - count, 0)])
+				omd.add('z', 1)
+				self.assertEqual(omd.getlast('z'), 1)
+
+	def test_drain_until(self):
+		init = [(i % 3, i) for i in range(10)]
+		omd = self.OMD(init)
+		self.assertEqual(omd.drain_until(lambda k, v: v >= 4), init[:4])
+		self.assertEqual(omd.drain_until(lambda k, v: True), [])
+		self.assertEqual(list(omd.items()), init[4:])
+		self.assertEqual(omd.getall(0), [6, 9])
+		out = []
+		self.assertIs(omd.drain_until(lambda k, v: False, out), out)
+		self.assertEqual(out, init[4:])
+		self.assertFalse(omd)
+		self.assertFalse(omd._map)
+
+	def test_views_across_compaction(self):
+		# removing most items from the front compacts _items, and views taken before must keep seeing the dictionary:
+		omd = self.OMD([(i % 3, i) for i in range(10)])
+		items, keys, values = omd.items(), omd.keys(), omd.values()
+		omd.popfirstitems(6)
+		omd.add('x', 1)
+		self.assertEqual(list(items), [(0, 6), (1, 7), (2, 8), (0, 9), ('x', 1)])
+		self.assertEqual(list(keys), [0, 1, 2, 0, 'x'])
+		self.assertEqual(list(values), [6, 7, 8, 9, 1])
+		self.assertEqual(len(items), 5)
+		omd.drain_until(lambda k, v: k == 'x')
+		omd.add('y', 2)
+		self.assertEqual(list(items), [('x', 1), ('y', 2)])
+
+	def test_bulk_pops_with_observers(self):
+		init = [(i % 3, i) for i in range(10)]
+		for pop in [
+			lambda omd: omd.popfirstitems(4),
+			lambda omd: omd.popfirstitems(10),
+			lambda omd: omd.popfirstitems(11),
+			lambda omd: omd.poplastitems(4),
+			lambda omd: omd.poplastitems(10),
+			lambda omd: omd.poplastitems(11),
+			lambda omd: omd.drain_until(lambda k, v: v >= 5),
+			lambda omd: omd.drain_until(lambda k, v: False),
+		]:
+			omd = self.OMD(init)
+			omd.enable_fingerprint()
+			omd.create_cursor_index()
+			omd.create_sorted_key_index()
+			omd.subscribe()
+			replica = self.OMD()
+			version = replica.apply_changes(omd.changes_since(None))
+			removed = pop(omd)
+			remaining = [item for item in init if item not in removed]
+			self.assertEqual(list(omd.items()), remaining)
+			self.assertEqual(omd.fingerprint(), self.OMD(remaining).fingerprint())
+			self.assertEqual([(k, v) for _, k, v in omd.iter_from(-1)], remaining)
+			self.assertEqual(omd._find_observer(_SortedKeyIndex).keys, sorted(set(k for k, _ in remaining)))
+			replica.apply_changes(omd.changes_since(version))
+			self.assertEqual(list(replica.items()), remaining)
+			# the observers keep working afterward:
+			omd.add(5, 'x')
+			omd.popfirstitems(1)
+			self.assertEqual(omd.fingerprint(), self.OMD(omd.items()).fingerprint())
+			self.assertEqual([(k, v) for _, k, v in omd.iter_from(-1)], list(omd.items()))
+
 	def test_popfirst_with_default(self):
 		for new_value in self.new_values:
 			self._test_pop(lambda omd, key: omd.popfirst(key, default=new_value), 0, slice(1, None), default=new_value)
@@ -428,6 +908,245 @@ class TestOrderedMultiDict(TestCase):
 			omd = self.OMD(init)
 			self.assertEqual(list(omd.values()), [item[1] for item in init])
 
+	@skipIf(numpy is None, "numpy is not installed")
+	def test_to_arrays(self):
+		for init in self.list_inits:
+			omd = self.OMD(init)
+			key_codes, values, indices = omd.to_arrays(dtype=object)
+			unique_keys = list(omd.unique_keys())
+			self.assertEqual([(unique_keys[c], v) for c, v in zip(key_codes.tolist(), values.tolist())], init)
+			self.assertEqual(indices.tolist(), list(omd._items.keys()))
+			self.assertEqual(list(self.OMD.from_arrays(key_codes, values, unique_keys).items()), init)
+
+	@skipIf(numpy is None, "numpy is not installed")
+	def test_reduce_by_key(self):
+		omd = self.OMD([('a', 1), ('b', 2), ('a', 11), ('c', 3), ('b', 22)])
+		self.assertEqual(omd.sum_by_key(), {'a': 12, 'b': 24, 'c': 3})
+		self.assertEqual(omd.count_by_key(), {'a': 2, 'b': 2, 'c': 1})
+		self.assertEqual(omd.mean_by_key(), {'a': 6.0, 'b': 12.0, 'c': 3.0})
+		self.assertEqual(omd.reduce_by_key(numpy.subtract), {'a': -10, 'b': -20, 'c': 3})
+		self.assertEqual(omd.sum_by_key(dtype=float), {'a': 12.0, 'b': 24.0, 'c': 3.0})
+
+		# the cached key codes must not go stale:
+		omd.popfirst('a')
+		omd.add('d', 4)
+		self.assertEqual(omd.sum_by_key(), {'b': 24, 'c': 3, 'a': 11, 'd': 4})
+		omd.clear()
+		omd.extend([('x', 1), ('y', 2), ('x', 3), ('y', 4), ('z', 5)])
+		self.assertEqual(omd.sum_by_key(), {'x': 4, 'y': 6, 'z': 5})
+		self.assertEqual(self.OMD().sum_by_key(), {})
+
+	def test_sorted_key_index(self):
+		omd = self.OMD([('b', 2), ('d', 4), ('a', 1), ('c', 3), ('b', 22), ('X-Tag', 5), ('X-Id', 6)])
+		for with_index in (False, True):
+			if with_index:
+				omd.create_sorted_key_index()
+			self.assertEqual(omd.irange('b', 'c'), ['b', 'c'])
+			self.assertEqual(omd.irange('b', 'c', inclusive=(False, False)), [])
+			self.assertEqual(omd.irange(hi='a'), ['X-Id', 'X-Tag', 'a'])
+			self.assertEqual(omd.irange('bb'), ['c', 'd'])
+			self.assertEqual(omd.items_in_range('b', 'c'), [('b', 2), ('c', 3), ('b', 22)])
+			self.assertEqual(omd.items_in_range('b', 'c', key_order=True), [('b', 2), ('b', 22), ('c', 3)])
+			self.assertEqual(omd.keys_with_prefix('X-'), ['X-Id', 'X-Tag'])
+			self.assertEqual(omd.keys_with_prefix('Y'), [])
+
+	def test_sorted_key_index_stays_in_sync(self):
+		def check(omd):
+			self.assertEqual(omd.irange(), sorted(omd.unique_keys()))
+
+		omd = self.OMD([(3, 3), (1, 1), (3, 33)])
+		omd.create_sorted_key_index()
+		omd.create_sorted_key_index()  # no-op
+		self.assertEqual(len(omd._observers), 1)
+		check(omd)
+		omd.add(2, 2)
+		omd.addall(0, [0, 0])
+		omd.extend([(5, 5), (4, 4), (5, 55)])
+		omd.update([(3, 'three')])
+		omd[6] = 6
+		check(omd)
+		self.assertEqual(omd.irange(), [0, 1, 2, 3, 4, 5, 6])
+		omd.pop(4)
+		omd.popfirst(5)
+		check(omd)
+		omd.popall(0)
+		omd.delete_all(6)
+		omd.popfirstitem()
+		omd.poplastitem()
+		check(omd)
+		self.assertEqual(omd.irange(), [2, 5])
+		omd.add(8, 8)
+		omd.add(9, 9)
+		omd.move_to_end(5)
+		omd.move_to_end(8)
+		check(omd)
+		self.assertEqual(omd.irange(), [2, 5, 8, 9])
+		omd.popall(8)
+		omd.popall(9)
+		omd += self.OMD([(1, 1), (7, 7)])
+		check(omd)
+		omd.popall(1)
+		omd.popall(7)
+		copied = omd.copy()
+		copied.add(7, 7)
+		check(copied)
+		check(omd)
+		omd.clear()
+		check(omd)
+		omd.drop_sorted_key_index()
+		self.assertEqual(omd._observers, [])
+
+	def test_iter_from(self):
+		for with_index in [False, True]:
+			for init in self.list_inits + self.dict_inits:
+				omd = self.OMD(init)
+				if with_index:
+					omd.create_cursor_index()
+				self.assertEqual(list(omd.iter_from(-1)), list(omd._iter_indexed_items()))
+				self.assertEqual(list(omd.iter_from(omd.last_cursor())), [])
+				cursor = omd.last_cursor()
+				omd.extend([('p', 'a'), ('q', 'b'), ('p', 'c'), ('r', 'd'), ('q', 'e')])
+				if init:
+					omd.popfirstitem()
+				page = list(omd.iter_from(cursor, limit=2))
+				self.assertEqual([item[1:] for item in page], [('p', 'a'), ('q', 'b')])
+				omd.popfirst('q')  # removes the item at the cursor.
+				omd.replaceall('q', ['E'])
+				omd.add('s', 'f')
+				rest = list(omd.iter_from(page[-1][0]))
+				self.assertEqual([item[1:] for item in rest], [('p', 'c'), ('r', 'd'), ('q', 'E'), ('s', 'f')])
+				all_items = list(omd._iter_indexed_items())
+				for i, (index, _, _) in enumerate(all_items):
+					self.assertEqual(list(omd.iter_from(index)), all_items[i + 1:])
+					self.assertEqual(list(omd.iter_from(index - 1, limit=1)), all_items[i:i + 1])
+				omd.clear()
+				self.assertEqual(list(omd.iter_from(-1)), [])
+				omd.add('t', 'g')
+				self.assertEqual([item[1:] for item in omd.iter_from(cursor)], [('t', 'g')])
+
+	def test_cursor_index_stays_in_sync(self):
+		omd = self.OMD((i % 5, i) for i in range(100))
+		omd.create_cursor_index()
+		for i in range(0, 100, 3):
+			omd.pop(i % 5)
+			omd.add('x', i)
+			omd.add('y', i)
+			omd.move_to_end('x')
+			self.assertEqual(list(omd.iter_from(-1)), list(omd._iter_indexed_items()))
+			self.assertEqual(list(omd.copy().iter_from(-1)), list(omd._iter_indexed_items()))
+		index = omd._find_observer(_CursorIndex)
+		self.assertLessEqual(len(index.indices), 2 * len(omd))
+		omd.drop_cursor_index()
+		self.assertIsNone(omd._find_observer(_CursorIndex))
+
+	def test_fingerprint(self):
+		omd = self.OMD((i % 5, i) for i in range(20))
+		self.assertEqual(omd.fingerprint(), self.OMD(omd.items()).fingerprint())
+		self.assertNotEqual(omd.fingerprint(), self.OMD(reversed(omd.items())).fingerprint())
+		omd.enable_fingerprint()
+		fingerprint = omd._find_observer(_Fingerprint)
+
+		def check(expect_dirty: bool = False):
+			self.assertEqual(fingerprint.dirty, expect_dirty)
+			self.assertEqual(omd.fingerprint(), self.OMD(omd.items()).fingerprint())
+			self.assertEqual(omd.copy().fingerprint(), omd.fingerprint())
+
+		# appending and popping at both ends keep the fingerprint up to date:
+		omd.add('x', 1)
+		omd.extend([('y', 2), (1, 3)])
+		check()
+		omd.popfirstitem()
+		omd.poplastitem()
+		omd.poplastitem()
+		check()
+		omd.poplast('x')  # the last item
+		check()
+		# anything else invalidates it until it is recomputed:
+		omd.popfirst(3)
+		check(expect_dirty=True)
+		omd.replaceall(1, ['a', 'b'])
+		check(expect_dirty=True)
+		omd.update([(2, 'c'), ('z', 'd')])
+		check(expect_dirty=True)
+		omd.clear()
+		check()
+		omd.add('k', [1])  # unhashable
+		self.assertRaises(TypeError, omd.fingerprint)
+		omd.clear()
+		omd.addall('k', [1, 2])
+		check()
+
+		other = omd.copy()
+		self.assertEqual(omd, other)
+		other.add('k', 3)
+		other.poplastitem()
+		other.popfirstitem()
+		other.add('k', 1)
+		self.assertNotEqual(omd.fingerprint(), other.fingerprint())
+		self.assertNotEqual(omd, other)
+		omd.disable_fingerprint()
+		self.assertIsNone(omd._find_observer(_Fingerprint))
+
+		# removing every item of a single-key dictionary:
+		for modify, expected in [
+			(lambda omd: omd.__setitem__(1, 9), [(1, 9)]),
+			(lambda omd: omd.update([(1, 9)]), [(1, 9)]),
+			(lambda omd: omd.replaceall(1, []), []),
+		]:
+			omd = self.OMD([(1, 1), (1, 3)])
+			omd.enable_fingerprint()
+			modify(omd)
+			self.assertEqual(list(omd.items()), expected)
+			self.assertEqual(omd.fingerprint(), self.OMD(expected).fingerprint())
+
+	def test_value_index(self):
+		omd = self.OMD([('a', (1, 'x')), ('b', (2, 'y')), ('a', (3, 'x'))])
+		omd.create_index('second', lambda v: v[1])
+		omd.create_index('first_is_odd', lambda v: v[0] % 2 == 1)
+		self.assertRaises(ValueError, lambda: omd.create_index('second', lambda v: v))
+		self.assertEqual(omd.lookup('second', 'x'), [('a', (1, 'x')), ('a', (3, 'x'))])
+		self.assertEqual(omd.lookup('second', 'z'), [])
+		self.assertRaises(KeyError, lambda: omd.lookup('third', 'x'))
+
+		def check(omd):
+			for name, func in [('second', lambda v: v[1]), ('first_is_odd', lambda v: v[0] % 2 == 1)]:
+				expected = {}
+				for k, v in omd.items():
+					expected.setdefault(func(v), []).append((k, v))
+				for indexed_value, items in expected.items():
+					self.assertEqual(omd.lookup(name, indexed_value), items)
+				self.assertEqual(set(omd._get_value_index(name).buckets), set(expected))
+
+		omd.add('c', (4, 'x'))
+		omd.addall('b', [(5, 'z'), (6, 'x')])
+		omd.extend([('d', (7, 'y')), ('a', (8, 'x'))])
+		omd['e'] = (9, 'x')
+		check(omd)
+		omd.update([('b', (10, 'y'))])
+		omd.pop('a')
+		omd.popfirst('a')
+		check(omd)
+		omd.popall('d')
+		omd.delete_all('e')
+		omd.popfirstitem()
+		omd.poplastitem()
+		check(omd)
+		omd.addall('g', [(12, 'y'), (13, 'x')])
+		omd.replaceall('b', [(14, 'x'), (15, 'x'), (16, 'y')])
+		omd.replace('g', (17, 'x'))
+		check(omd)
+		omd += self.OMD([('h', (18, 'x')), ('b', (19, 'z'))])
+		check(omd)
+		copied = omd.copy()
+		copied.add('f', (11, 'x'))
+		check(copied)
+		check(omd)
+		self.assertNotEqual(copied.lookup('second', 'x'), omd.lookup('second', 'x'))
+		omd.clear()
+		self.assertEqual(omd.lookup('second', 'x'), [])
+		omd.drop_index('second')
+		self.assertRaises(KeyError, lambda: omd.drop_index('second'))
+
 
 class TestDeOrderedMultiDict(TestOrderedMultiDict):
 	OMD = DeOrderedMultiDict
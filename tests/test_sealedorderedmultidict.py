@@ -0,0 +1,131 @@
+import gc
+import os
+import pickle
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from unittest import TestCase
+
+from better_orderedmultidict import OrderedMultiDict, SealedOrderedMultiDict, TypedOrderedMultiDict
+
+
+def _getall_in_worker(sealed: SealedOrderedMultiDict, key):
+	with sealed:
+		return sealed.getall(key)
+
+
+class TestSealedOrderedMultiDict(TestCase):
+
+	def setUp(self):
+		self.list_inits = [
+			[], [(1, 1)], [(1, 1), (2, 2)], [(1, 1), (2, 2), (1, 1)],
+			[(1, 1), (1, 1), (1, 1)], [(None, None), (None, None)],
+			[(False, False)],
+			[(None, 1), (1, 'one'), (None, 2), ('a', [1, 2]), ((1, ('x', b'y')), frozenset()), (1, 2.5)],
+		]
+		self.nonkeys = [object(), 'asdfasdosduf', ('a',), 2.5]
+
+	def check_read_api(self, sealed: SealedOrderedMultiDict, omd: OrderedMultiDict):
+		self.assertEqual(sealed, omd)
+		self.assertEqual(omd, sealed)
+		self.assertEqual(len(sealed), len(omd))
+		self.assertEqual(bool(sealed), bool(omd))
+		self.assertEqual(list(sealed.items()), list(omd.items()))
+		self.assertEqual(list(reversed(sealed.items())), list(reversed(omd.items())))
+		self.assertEqual(list(sealed.keys()), list(omd.keys()))
+		self.assertEqual(list(reversed(sealed.keys())), list(reversed(omd.keys())))
+		self.assertEqual(list(sealed.values()), list(omd.values()))
+		self.assertEqual(list(sealed.unique_keys()), list(omd.unique_keys()))
+		self.assertEqual(list(reversed(sealed.unique_keys())), list(reversed(omd.unique_keys())))
+		self.assertEqual(len(sealed.unique_keys()), len(omd.unique_keys()))
+		self.assertEqual(list(sealed), list(omd))
+		for key, value in omd.items():
+			self.assertIn(key, sealed)
+			self.assertIn((key, value), sealed.items())
+			self.assertIn(value, sealed.values())
+			self.assertEqual(sealed[key], omd[key])
+			self.assertEqual(sealed.get(key), omd.get(key))
+			self.assertEqual(sealed.getfirst(key), omd.getfirst(key))
+			self.assertEqual(sealed.getlast(key), omd.getlast(key))
+			self.assertEqual(sealed.getall(key), omd.getall(key))
+		for nonkey in self.nonkeys:
+			self.assertNotIn(nonkey, sealed)
+			self.assertRaises(KeyError, lambda: sealed[nonkey])
+			self.assertIsNone(sealed.get(nonkey))
+			self.assertEqual(sealed.getall(nonkey), [])
+			self.assertIs(sealed.getall(nonkey, self), self)
+		self.assertRaises(TypeError, lambda: [] in sealed)
+
+	def test_create_shared(self):
+		for init in self.list_inits:
+			omd = OrderedMultiDict(init)
+			with omd.seal_shared() as sealed:
+				self.check_read_api(sealed, omd)
+				with SealedOrderedMultiDict.attach(sealed.name) as attached:
+					self.check_read_api(attached, omd)
+				sealed.unlink()
+
+	def test_save_and_open(self):
+		with tempfile.TemporaryDirectory() as directory:
+			for i, init in enumerate(self.list_inits):
+				omd = OrderedMultiDict(init)
+				path = os.path.join(directory, f'{i}.omd')
+				omd.save_sealed(path)
+				with SealedOrderedMultiDict.open(path) as sealed:
+					self.assertEqual(sealed.path, path)
+					self.assertIsNone(sealed.name)
+					self.check_read_api(sealed, omd)
+					with pickle.loads(pickle.dumps(sealed)) as unpickled:
+						self.check_read_api(unpickled, omd)
+			path = os.path.join(directory, 'invalid.omd')
+			with open(path, 'wb') as file:
+				file.write(b'not sealed')
+			self.assertRaises(ValueError, lambda: SealedOrderedMultiDict.open(path))
+
+	def test_buffer(self):
+		omd = TypedOrderedMultiDict([('a', 1.5), ('b', 2.0), ('a', -1.0)])
+		with omd.seal_shared() as sealed:
+			data = bytes(sealed._buffer)
+			sealed.unlink()
+		with SealedOrderedMultiDict(data) as sealed:
+			self.check_read_api(sealed, OrderedMultiDict(omd))
+			self.assertEqual(pickle.loads(pickle.dumps(sealed)), sealed)
+		self.assertRaises(ValueError, lambda: SealedOrderedMultiDict(b'not sealed'))
+		self.assertRaises(ValueError, lambda: SealedOrderedMultiDict(b'x' * 100))
+		self.assertRaises(ValueError, lambda: SealedOrderedMultiDict(data[:-1]))
+
+	def test_equal_keys(self):
+		omd = OrderedMultiDict([(1, 'int'), ('1', 'str'), ((1, 2.0), 'tuple')])
+		with omd.seal_shared() as sealed:
+			self.assertEqual(sealed.getall(1.0), ['int'])
+			self.assertEqual(sealed.getall(True), ['int'])
+			self.assertEqual(sealed.getall((True, 2)), ['tuple'])
+			self.assertEqual(sealed.getall(b'1'), [])
+			sealed.unlink()
+
+	def test_dropped_without_close(self):
+		# dropping an attached or unpickled instance closes the shared memory after releasing the views into it:
+		omd = OrderedMultiDict([('a', 1), ('b', 2), ('a', 11)])
+		with omd.seal_shared() as sealed:
+			unraisable = []
+			old_hook, sys.unraisablehook = sys.unraisablehook, unraisable.append
+			try:
+				attached = SealedOrderedMultiDict.attach(sealed.name)
+				self.assertEqual(attached.getall('a'), [1, 11])
+				del attached
+				unpickled = pickle.loads(pickle.dumps(sealed))
+				self.assertEqual(unpickled.getall('b'), [2])
+				del unpickled
+				gc.collect()
+			finally:
+				sys.unraisablehook = old_hook
+			self.assertEqual(unraisable, [])
+			sealed.unlink()
+
+	def test_worker_processes(self):
+		omd = OrderedMultiDict((i % 10, i) for i in range(1000))
+		with omd.seal_shared() as sealed:
+			with ProcessPoolExecutor(2) as executor:
+				results = list(executor.map(_getall_in_worker, [sealed] * 10, range(10)))
+			self.assertEqual(results, [omd.getall(key) for key in range(10)])
+			sealed.unlink()
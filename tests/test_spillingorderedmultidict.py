@@ -0,0 +1,149 @@
+import os
+import tempfile
+from unittest import TestCase
+
+from better_orderedmultidict import OrderedMultiDict, SpillingOrderedMultiDict
+
+
+class TestSpillingOrderedMultiDict(TestCase):
+
+	def setUp(self):
+		self.list_inits = [
+			[], [(1, 1)], [(1, 1), (2, 2)], [(1, 1), (2, 2), (1, 1)],
+			[(1, 1), (1, 1), (1, 1)], [(None, None), (None, None)],
+			[(False, False)],
+			[(None, 1), (1, 'one'), (None, 2), ('a', [1, 2]), ((1, ('x', b'y')), frozenset()), (1, 2.5)],
+			[(i % 7, i) for i in range(50)],
+		]
+		self.nonkeys = [object(), 'asdfasdosduf', ('a',), 2.5]
+		self.budgets = [0, 1, 2, 5, 100]
+
+	def check_read_api(self, spilling: SpillingOrderedMultiDict, omd: OrderedMultiDict):
+		self.assertEqual(spilling, omd)
+		self.assertEqual(omd, spilling)
+		self.assertEqual(len(spilling), len(omd))
+		self.assertEqual(bool(spilling), bool(omd))
+		self.assertEqual(list(spilling.items()), list(omd.items()))
+		self.assertEqual(list(reversed(spilling.items())), list(reversed(omd.items())))
+		self.assertEqual(list(spilling.keys()), list(omd.keys()))
+		self.assertEqual(list(reversed(spilling.keys())), list(reversed(omd.keys())))
+		self.assertEqual(list(spilling.values()), list(omd.values()))
+		self.assertEqual(list(reversed(spilling.values())), list(reversed(omd.values())))
+		self.assertEqual(list(spilling.unique_keys()), list(omd.unique_keys()))
+		self.assertEqual(list(reversed(spilling.unique_keys())), list(reversed(omd.unique_keys())))
+		self.assertEqual(len(spilling.unique_keys()), len(omd.unique_keys()))
+		for key, value in omd.items():
+			self.assertIn(key, spilling)
+			self.assertIn((key, value), spilling.items())
+			self.assertIn(value, spilling.values())
+			self.assertEqual(spilling[key], omd[key])
+			self.assertEqual(spilling.get(key), omd.get(key))
+			self.assertEqual(spilling.getfirst(key), omd.getfirst(key))
+			self.assertEqual(spilling.getlast(key), omd.getlast(key))
+			self.assertEqual(spilling.getall(key), omd.getall(key))
+		for nonkey in self.nonkeys:
+			self.assertNotIn(nonkey, spilling)
+			self.assertRaises(KeyError, lambda: spilling[nonkey])
+			self.assertIsNone(spilling.get(nonkey))
+			self.assertEqual(spilling.getall(nonkey), [])
+			self.assertIs(spilling.getall(nonkey, self), self)
+
+	def test_read_api(self):
+		for budget in self.budgets:
+			for init in self.list_inits:
+				omd = OrderedMultiDict(init)
+				with SpillingOrderedMultiDict(init, max_items_in_memory=budget) as spilling:
+					self.assertLessEqual(len(spilling._hot), budget)
+					self.assertEqual(spilling.spilled_len, len(init) - len(spilling._hot))
+					self.check_read_api(spilling, omd)
+					spilling.spill()
+					self.assertEqual(spilling.spilled_len, len(init))
+					self.check_read_api(spilling, omd)
+
+	def test_counters(self):
+		with SpillingOrderedMultiDict(max_items_in_memory=4) as spilling:
+			spilling.extend((i % 3, i) for i in range(10))
+			self.assertEqual(spilling.spill_count, 6)
+			self.assertEqual(spilling.spilled_len, 6)
+			self.assertEqual(spilling.fetch_count, 0)
+			self.assertEqual(spilling.getall(0), [0, 3, 6, 9])
+			self.assertEqual(spilling.fetch_count, 2)
+			self.assertEqual(spilling.getlast(0), 9)  # in memory.
+			self.assertEqual(spilling.fetch_count, 2)
+			self.assertEqual(spilling.popfirstitem(), (0, 0))
+			self.assertEqual(spilling.fetch_count, 3)
+			self.assertEqual(spilling.spilled_len, 5)
+			self.assertEqual(list(spilling.values()), list(range(1, 10)))
+			self.assertEqual(spilling.fetch_count, 8)
+
+	def test_modify(self):
+		for budget in self.budgets:
+			for init in self.list_inits:
+				omd = OrderedMultiDict(init)
+				with SpillingOrderedMultiDict(init, max_items_in_memory=budget) as spilling:
+					for key in list(omd.unique_keys())[::2]:
+						self.assertEqual(spilling.popfirst(key), omd.popfirst(key))
+						self.check_read_api(spilling, omd)
+						self.assertEqual(spilling.pop(key, 'x'), omd.pop(key, 'x'))
+						self.check_read_api(spilling, omd)
+					for key in list(omd.unique_keys())[::3]:
+						self.assertEqual(spilling.popall(key), omd.popall(key))
+						self.check_read_api(spilling, omd)
+					for key in list(omd.unique_keys())[::2]:
+						spilling[key] = 'new'
+						omd[key] = 'new'
+						self.check_read_api(spilling, omd)
+					spilling.extend([(1, 'one'), ('b', 'bee')])
+					omd.extend([(1, 'one'), ('b', 'bee')])
+					self.check_read_api(spilling, omd)
+					while omd:
+						self.assertEqual(spilling.popfirstitem(), omd.popfirstitem())
+						if omd:
+							self.assertEqual(spilling.poplastitem(), omd.poplastitem())
+						self.check_read_api(spilling, omd)
+					self.assertRaises(KeyError, spilling.popfirstitem)
+					self.assertRaises(KeyError, spilling.poplastitem)
+					self.assertIsNone(spilling.popfirstitem(default=None))
+					self.assertRaises(KeyError, lambda: spilling.popall(1))
+					self.assertRaises(KeyError, lambda: spilling.pop(1))
+					self.assertRaises(KeyError, lambda: spilling.popfirst(1))
+
+	def test_clear(self):
+		with SpillingOrderedMultiDict([(1, 1), (2, 2), (1, 11)], max_items_in_memory=1) as spilling:
+			spilling.clear()
+			self.check_read_api(spilling, OrderedMultiDict())
+			spilling.extend([(2, 2), (1, 1)])
+			self.check_read_api(spilling, OrderedMultiDict([(2, 2), (1, 1)]))
+
+	def test_path(self):
+		with tempfile.TemporaryDirectory() as directory:
+			path = os.path.join(directory, 'spill.sqlite')
+			with SpillingOrderedMultiDict([(1, 1), (2, 2)], max_items_in_memory=0, path=path) as spilling:
+				self.assertEqual(spilling.spilled_len, 2)
+				self.assertTrue(os.path.exists(path))
+			with SpillingOrderedMultiDict(path=path) as spilling:
+				self.assertEqual(len(spilling), 0)
+				self.assertEqual(list(spilling.items()), [])
+		self.assertRaises(ValueError, lambda: SpillingOrderedMultiDict(max_items_in_memory=-1))
+
+	def test_mutable_mapping_methods(self):
+		for budget in self.budgets:
+			for init in self.list_inits:
+				omd = OrderedMultiDict(init)
+				with SpillingOrderedMultiDict(init, max_items_in_memory=budget) as spilling:
+					for key in list(omd.unique_keys())[::2]:
+						del spilling[key]
+						del omd[key]
+						self.check_read_api(spilling, omd)
+					for arg in [[(1, 'a'), ('c', 1), (1, 'b'), ('c', 2)], {None: 'x', 2: 'y'}, []]:
+						spilling.update(arg, d=3)
+						omd.update(arg, d=3)
+						self.check_read_api(spilling, omd)
+					spilling.update(spilling)
+					omd.update(omd)
+					self.check_read_api(spilling, omd)
+					while omd:
+						self.assertEqual(spilling.popitem(), omd.popitem())
+						self.check_read_api(spilling, omd)
+					self.assertRaises(KeyError, spilling.popitem)
+					self.assertRaises(KeyError, lambda: spilling.__delitem__(1))
@@ -0,0 +1,266 @@
+import asyncio
+import json
+import os
+import pickle
+import tempfile
+from unittest import TestCase
+
+try:
+	import numpy
+except ImportError:
+	numpy = None
+
+from better_orderedmultidict import OrderedMultiDict, TypedOrderedMultiDict
+
+
+class TestTypedOrderedMultiDict(TestCase):
+
+	def setUp(self):
+		self.list_inits = [
+			[], [(1, 1.0)], [(1, 1.5), (2, 2.0)], [(1, 7.0), (2, 2.0), (1, 1.0)],
+			[('a', 1.0), ('a', 1.0), ('b', -1.0)],
+			[(None, 1.0), (1, 0.5), (None, 3.0), (None, 1.0), (1, 0.0)],
+		]
+
+	def test_init(self):
+		for init in self.list_inits:
+			omd = TypedOrderedMultiDict(init)
+			self.assertEqual(list(omd.items()), init)
+			self.assertEqual(list(reversed(omd.items())), init[::-1])
+			self.assertEqual(list(omd.keys()), [k for k, _ in init])
+			self.assertEqual(list(omd.values()), [v for _, v in init])
+			self.assertEqual(list(omd.unique_keys()), list(dict(init)))
+			self.assertEqual(list(TypedOrderedMultiDict(OrderedMultiDict(init)).items()), init)
+			self.assertEqual(TypedOrderedMultiDict(omd), omd)
+
+		omd = TypedOrderedMultiDict([('a', 1), ('b', 2)], value_type='q', c=3)
+		self.assertEqual(list(omd.items()), [('a', 1), ('b', 2), ('c', 3)])
+		self.assertRaises(ValueError, lambda: TypedOrderedMultiDict(value_type='u'))
+		self.assertRaises(TypeError, lambda: TypedOrderedMultiDict([('a', 'one')]))
+		self.assertRaises(OverflowError, lambda: TypedOrderedMultiDict([('a', 256)], value_type='B'))
+
+	def test_failed_add_does_not_desync(self):
+		omd = TypedOrderedMultiDict([('a', 1)], value_type='q')
+		self.assertRaises(TypeError, lambda: omd.add('b', 'two'))
+		self.assertRaises(TypeError, lambda: omd.addall('a', [2, 'three']))
+		self.assertRaises(TypeError, lambda: omd.add([], 1))
+		self.assertEqual(list(omd.items()), [('a', 1)])
+		self.assertNotIn('b', omd)
+		self.assertEqual(len(omd._map), 1)
+
+	def test_add_and_pop(self):
+		omd = TypedOrderedMultiDict(value_type='q')
+		omd.add('a', 1)
+		omd.addall('b', [2, 22])
+		omd.add('a', 11)
+		omd['c'] = 3
+		self.assertEqual(list(omd.items()), [('a', 1), ('b', 2), ('b', 22), ('a', 11), ('c', 3)])
+		self.assertEqual(omd.getall('a'), [1, 11])
+		self.assertEqual((omd.getfirst('b'), omd.getlast('b'), omd['a']), (2, 22, 11))
+		self.assertEqual(omd.popfirstitem(), ('a', 1))
+		self.assertEqual(omd.poplastitem(), ('c', 3))
+		self.assertEqual(omd.popfirst('b'), 2)
+		self.assertEqual(omd.pop('a'), 11)
+		self.assertEqual(list(omd.items()), [('b', 22)])
+		self.assertEqual(omd.popall('b'), [22])
+		self.assertFalse(omd)
+		self.assertRaises(KeyError, lambda: omd.popfirstitem())
+		self.assertEqual(omd.popall('b', None), None)
+
+	def test_popfirstitems_and_poplastitems(self):
+		for init in self.list_inits:
+			for count in range(len(init) + 2):
+				omd = TypedOrderedMultiDict(init)
+				self.assertEqual(omd.popfirstitems(count), init[:count])
+				self.assertEqual(list(omd.items()), init[count:])
+				omd = TypedOrderedMultiDict(init)
+				self.assertEqual(omd.poplastitems(count), init[::-1][:count])
+				self.assertEqual(list(omd.items()), init[:max(len(init) - count, 0)])
+				self.assertEqual(len(omd._map), len(set(k for k, _ in init[:max(len(init) - count, 0)])))
+
+		omd = TypedOrderedMultiDict([('a', 1.0), ('b', 2.0), ('a', 11.0), ('b', 22.0)])
+		self.assertEqual(omd.drain_until(lambda k, v: v > 10), [('a', 1.0), ('b', 2.0)])
+		view = omd.getall_view('b')
+		self.assertRaises(BufferError, lambda: omd.popfirstitems(2))
+		self.assertEqual(list(omd.items()), [('a', 11.0), ('b', 22.0)])
+		view.release()
+		self.assertEqual(omd.poplastitems(2), [('b', 22.0), ('a', 11.0)])
+		self.assertFalse(omd._map)
+
+	def test_bulk_pops_with_observers(self):
+		init = [(i % 3, float(i)) for i in range(10)]
+		for pop in [
+			lambda omd: omd.popfirstitems(4),
+			lambda omd: omd.popfirstitems(11),
+			lambda omd: omd.poplastitems(11),
+			lambda omd: omd.drain_until(lambda k, v: False),
+		]:
+			omd = TypedOrderedMultiDict(init)
+			omd.enable_fingerprint()
+			omd.create_cursor_index()
+			omd.subscribe()
+			replica = TypedOrderedMultiDict()
+			version = replica.apply_changes(omd.changes_since(None))
+			removed = pop(omd)
+			remaining = [item for item in init if item not in removed]
+			self.assertEqual(list(omd.items()), remaining)
+			self.assertEqual(omd.fingerprint(), TypedOrderedMultiDict(remaining).fingerprint())
+			self.assertEqual([(k, v) for _, k, v in omd.iter_from(-1)], remaining)
+			replica.apply_changes(omd.changes_since(version))
+			self.assertEqual(list(replica.items()), remaining)
+
+	def test_update(self):
+		omd = TypedOrderedMultiDict([('a', 1.0), ('b', 2.0), ('a', 3.0), ('c', 4.0)])
+		omd.update(item for item in [('a', 5.0), ('c', 6.0), ('a', 7.0)])
+		self.assertEqual(list(omd.items()), [('b', 2.0), ('a', 5.0), ('c', 6.0), ('a', 7.0)])
+		omd.update({'b': 8.0}, d=9.0)
+		self.assertEqual(list(omd.items()), [('a', 5.0), ('c', 6.0), ('a', 7.0), ('b', 8.0), ('d', 9.0)])
+
+	def test_replaceall(self):
+		omd = TypedOrderedMultiDict([('a', 1.0), ('b', 2.0), ('a', 3.0)])
+		omd.create_index('sign', lambda v: v > 0)
+		omd.replaceall('a', [4.0, 5.0, 6.0])
+		self.assertEqual(list(omd.items()), [('a', 4.0), ('b', 2.0), ('a', 5.0), ('a', 6.0)])
+		omd.replace('a', -7.0)
+		self.assertEqual(list(omd.items()), [('a', -7.0), ('b', 2.0)])
+		self.assertEqual(omd.lookup('sign', True), [('b', 2.0)])
+		self.assertRaises(TypeError, lambda: omd.replaceall('b', [8.0, 'nine']))
+		self.assertEqual(list(omd.items()), [('a', -7.0), ('b', 2.0)])
+		omd.replaceall('a', [])
+		self.assertEqual(list(omd.items()), [('b', 2.0)])
+		self.assertNotIn('a', omd)
+
+	def test_concat(self):
+		omd1 = TypedOrderedMultiDict([('a', 1), ('b', 2), ('a', 3)], value_type='q')
+		omd2 = TypedOrderedMultiDict([('b', 4), ('c', 5)], value_type='q')
+		omd2.popfirstitem()
+		result = TypedOrderedMultiDict.concat(omd1, omd2, OrderedMultiDict([('a', 6)]))
+		self.assertEqual(result.value_type, 'q')
+		self.assertEqual(list(result.items()), [('a', 1), ('b', 2), ('a', 3), ('c', 5), ('a', 6)])
+		self.assertEqual(result.getall('a'), [1, 3, 6])
+		self.assertEqual(list(OrderedMultiDict(omd1).items()), list(omd1.items()))
+		self.assertEqual(list((OrderedMultiDict() + omd1).items()), list(omd1.items()))
+
+		omd3 = TypedOrderedMultiDict([('c', 7), ('b', 8)], value_type='q')
+		view = omd3.getall_view('b')
+		self.assertRaises(BufferError, lambda: omd3.__iadd__(omd1))
+		self.assertEqual(list(omd3.items()), [('c', 7), ('b', 8)])
+		self.assertEqual(list(omd3._map), ['c', 'b'])
+		view.release()
+		omd1 += omd1
+		self.assertEqual(list(omd1.items()), [('a', 1), ('b', 2), ('a', 3)] * 2)
+
+	def test_factories(self):
+		items = [('a', 1), ('b', 2), ('a', 3)]
+
+		async def aiter_items():
+			for item in items:
+				yield item
+
+		def check(result):
+			self.assertIs(type(result), TypedOrderedMultiDict)
+			self.assertEqual(result.value_type, 'b')
+			self.assertEqual(list(result.items()), items)
+
+		omd = OrderedMultiDict(items)
+		check(TypedOrderedMultiDict.concat(omd, value_type='b'))
+		check(TypedOrderedMultiDict.merge_many([omd], key=lambda item: 0, value_type='b'))
+		check(asyncio.run(TypedOrderedMultiDict.from_async(aiter_items(), value_type='b')))
+		with tempfile.TemporaryDirectory() as directory:
+			path = os.path.join(directory, 'data.tsv')
+			with open(path, 'w') as file:
+				file.write(''.join(f'{k}\t{v}\n' for k, v in items))
+			check(TypedOrderedMultiDict.from_delimited(path, convert=int, value_type='b'))
+			path = os.path.join(directory, 'data.jsonl')
+			with open(path, 'w') as file:
+				file.write(''.join(json.dumps({'key': k, 'value': v}) + '\n' for k, v in items))
+			check(TypedOrderedMultiDict.from_jsonl(path, value_type='b'))
+		if numpy is not None:
+			check(TypedOrderedMultiDict.from_arrays([0, 1, 0], [1, 2, 3], ['a', 'b'], value_type='b'))
+		self.assertRaises(OverflowError, lambda: TypedOrderedMultiDict.concat(OrderedMultiDict([('a', 1000)]), value_type='b'))
+
+	def test_pickle(self):
+		for init in self.list_inits:
+			omd = TypedOrderedMultiDict(init)
+			for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+				self.assertEqual(pickle.loads(pickle.dumps(omd, protocol)), omd)
+			buffers = []
+			data = pickle.dumps(omd, 5, buffer_callback=buffers.append)
+			self.assertEqual(pickle.loads(data, buffers=buffers), omd)
+		omd = TypedOrderedMultiDict([('a', 1), ('b', 2), ('a', 3)], value_type='q')
+		unpickled = TypedOrderedMultiDict.loads(omd.dumps())
+		self.assertEqual(unpickled.value_type, 'q')
+		self.assertEqual(unpickled.getall('a'), [1, 3])
+
+	def test_iter_from(self):
+		omd = TypedOrderedMultiDict([('a', 1), ('b', 2), ('a', 3)], value_type='q')
+		cursor = omd.last_cursor()
+		omd.addall('b', [4, 5])
+		omd.popfirst('b')
+		self.assertEqual(list(omd.iter_from(-1)), [(0, 'a', 1), (2, 'a', 3), (3, 'b', 4), (4, 'b', 5)])
+		self.assertEqual(list(omd.iter_from(cursor, limit=1)), [(3, 'b', 4)])
+
+	def test_journal(self):
+		with tempfile.TemporaryDirectory() as directory:
+			omd = TypedOrderedMultiDict([('a', 1), ('b', 2), ('a', 3)], value_type='q')
+			omd.enable_journal(directory, sync_every=1, snapshot_every=4)
+			omd.replaceall('a', [11, 33])
+			omd.add('c', 4)
+			omd.popfirst('b')
+			omd.addall('a', [5, 6])
+			omd.disable_journal()
+			recovered = TypedOrderedMultiDict.recover(directory)
+			self.assertEqual(recovered, omd)
+			self.assertEqual(recovered.value_type, 'q')
+			recovered.disable_journal()
+			self.assertRaises(TypeError, lambda: OrderedMultiDict.recover(directory))
+
+	def test_copy(self):
+		for init in self.list_inits:
+			omd1 = TypedOrderedMultiDict(init)
+			omd2 = omd1.copy()
+			self.assertEqual(omd1, omd2)
+			self.assertEqual(omd1._map, omd2._map)
+			omd2.add(2, 2.0)
+			self.assertEqual(list(omd1.items()), init)
+			self.assertEqual(list(omd2.items()), init + [(2, 2.0)])
+
+	def test_getall_view(self):
+		omd = TypedOrderedMultiDict([('a', 1.0), ('b', 2.0), ('a', 11.0)])
+		view = omd.getall_view('a')
+		self.assertEqual(view.tolist(), [1.0, 11.0])
+		self.assertTrue(view.readonly)
+		self.assertRaises(BufferError, lambda: omd.add('a', 111.0))
+		self.assertRaises(BufferError, lambda: omd.poplastitem())
+		self.assertEqual(list(omd.items()), [('a', 1.0), ('b', 2.0), ('a', 11.0)])
+		view.release()
+		omd.add('a', 111.0)
+		self.assertEqual(omd.getall_view('a').tolist(), [1.0, 11.0, 111.0])
+		self.assertEqual(len(omd.getall_view('x')), 0)
+
+	def test_contains(self):
+		omd = TypedOrderedMultiDict([('a', 1.0), ('b', 2.0)])
+		self.assertIn('a', omd)
+		self.assertIn(2.0, omd.values())
+		self.assertNotIn(3.0, omd.values())
+		self.assertIn(('b', 2.0), omd.items())
+		self.assertNotIn(('b', 1.0), omd.items())
+
+	def test_sorted_key_index(self):
+		omd = TypedOrderedMultiDict([('b', 2), ('a', 1)], value_type='q')
+		omd.create_sorted_key_index()
+		omd.extend([('d', 4), ('c', 3)])
+		omd.addall('e', [5, 55])
+		self.assertEqual(omd.items_in_range('b', 'd'), [('b', 2), ('d', 4), ('c', 3)])
+		omd.popall('e')
+		omd.poplastitem()
+		omd.popfirstitem()
+		self.assertEqual(omd.irange(), ['a', 'd'])
+
+	def test_value_index(self):
+		omd = TypedOrderedMultiDict([('a', 1), ('b', 2), ('a', 3)], value_type='q')
+		omd.create_index('odd', lambda v: v % 2 == 1)
+		omd.addall('c', [5, 6])
+		omd.popfirst('a')
+		self.assertEqual(omd.lookup('odd', True), [('a', 3), ('c', 5)])
+		self.assertEqual(omd.lookup('odd', False), [('b', 2), ('c', 6)])